@@ -21,46 +21,14 @@ if [ ! -x "$PYTHON" ]; then
 fi
 
 # ─────────────────────────────────────────────
-# LAYER 1 – DATA COLLECTION
-# ─────────────────────────────────────────────
-echo "▶️ Running Data Collector" | tee -a "$LOG_FILE"
-$PYTHON "$SCRIPT_DIR/1_data_collector.py" >> "$LOG_FILE" 2>&1
-
-# ─────────────────────────────────────────────
-# LAYER 2 – SCREENER (TESTING MODE)
-# ─────────────────────────────────────────────
-echo "▶️ Running Screener (TESTING MODE)" | tee -a "$LOG_FILE"
-$PYTHON "$SCRIPT_DIR/2_screener.py" --mode testing >> "$LOG_FILE" 2>&1
-
-# ─────────────────────────────────────────────
-# LAYER 3 – ANALYZER
-# ─────────────────────────────────────────────
-echo "▶️ Running Analyzer" | tee -a "$LOG_FILE"
-$PYTHON "$SCRIPT_DIR/3_analyzer.py" >> "$LOG_FILE" 2>&1
-
-# ─────────────────────────────────────────────
-# LAYER 4 – NOTIFIER
-# ─────────────────────────────────────────────
-echo "▶️ Running Notifier" | tee -a "$LOG_FILE"
-$PYTHON "$SCRIPT_DIR/4_notifier.py" >> "$LOG_FILE" 2>&1 || \
-echo "⚠️ Notifier skipped (credentials missing)" | tee -a "$LOG_FILE"
-
-# ─────────────────────────────────────────────
-# LAYER 5 – TRACKER
-# ─────────────────────────────────────────────
-echo "▶️ Running EOD Tracker" | tee -a "$LOG_FILE"
-$PYTHON "$SCRIPT_DIR/5_tracker.py" >> "$LOG_FILE" 2>&1
-
-# ─────────────────────────────────────────────
-# LAYER 6 – REPORTER (SUNDAY ONLY)
-# ─────────────────────────────────────────────
-DAY=$(date +%u)
-if [ "$DAY" -eq 7 ]; then
-  echo "📊 Sunday detected — Running Weekly Reporter" | tee -a "$LOG_FILE"
-  $PYTHON "$SCRIPT_DIR/6_reporter.py" >> "$LOG_FILE" 2>&1
-else
-  echo "⏭️ Not Sunday — Skipping Reporter" | tee -a "$LOG_FILE"
-fi
+# LAYERS 1–6 – ONE PROCESS
+# collect → screen (TESTING MODE) → analyze → notify / track → report
+# The reporter only runs on Sundays; per-stage wall times go to
+# logs/pipeline_timings_YYYYMMDD.json
+# ─────────────────────────────────────────────
+echo "▶️ Running Pipeline" | tee -a "$LOG_FILE"
+$PYTHON "$SCRIPT_DIR/pipeline.py" --mode testing >> "$LOG_FILE" 2>&1 || \
+echo "⚠️ Pipeline finished with failed stages (see $LOG_DIR/pipeline_$(date +%Y%m%d).txt)" | tee -a "$LOG_FILE"
 
 echo "✅ Trading System Run Complete: $(date)" | tee -a "$LOG_FILE"
 echo "=================================================" | tee -a "$LOG_FILE"
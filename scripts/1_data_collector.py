@@ -4,12 +4,30 @@ Runs: Daily 8:00 AM
 Purpose: Fetch all required data from free sources
 """
 
-import yfinance as yf
 import pandas as pd
-import requests
 from datetime import datetime, timedelta
 import json
+import io
+import os
 import time
+import argparse
+
+import numpy as np
+
+import bar_store
+import breadth
+import checkpoint
+import columnar
+import delivery
+import indicators
+import levels
+import metrics
+import parallel
+import patterns
+import regime
+import stage_log
+import strength
+from market_data import Fetcher, chunked
 
 # ═══════════════════════════════════════════════════════
 # CONFIGURATION
@@ -27,12 +45,10 @@ LOG_FILE = f'logs/data_collection_{datetime.now().strftime("%Y%m%d")}.txt'
 # LOGGING
 # ═══════════════════════════════════════════════════════
 
-def log(message):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_msg = f"[{timestamp}] {message}"
-    print(log_msg)
-    with open(LOG_FILE, 'a') as f:
-        f.write(log_msg + '\n')
+log = stage_log.get_logger('data_collection', LOG_FILE)
+
+
+FETCHER = Fetcher.from_config(CONFIG, log=log)
 
 
 # ═══════════════════════════════════════════════════════
@@ -61,202 +77,519 @@ def load_watchlist():
 # FUNCTION 2: Fetch Price Data from Yahoo Finance
 # ═══════════════════════════════════════════════════════
 
-def fetch_price_data(symbols):
-    """Fetch OHLCV data for all stocks"""
-
-    all_data = []
-
-    for symbol in symbols:
-        try:
-            log(f"Fetching data for {symbol}...")
-
-            # Get 6 months data for MA calculations
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period='6mo')
-
-            if hist.empty:
-                log(f"  WARNING: No data for {symbol}")
-                continue
-
-            # Get latest data
-            latest = hist.iloc[-1]
-
-            # Calculate moving averages
-            hist['MA20'] = hist['Close'].rolling(20).mean()
-            hist['MA50'] = hist['Close'].rolling(50).mean()
-            hist['MA200'] = hist['Close'].rolling(200).mean()
-
-            # Calculate RSI
-            delta = hist['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            hist['RSI'] = 100 - (100 / (1 + rs))
-
-            # Calculate ADX (simplified)
-            # For production, use ta-lib: from ta.trend import ADXIndicator
-            hist['ADX'] = 30  # Placeholder - replace with actual calculation
-
-            # Calculate ATR
-            high_low = hist['High'] - hist['Low']
-            high_close = abs(hist['High'] - hist['Close'].shift())
-            low_close = abs(hist['Low'] - hist['Close'].shift())
-            ranges = pd.concat([high_low, high_close, low_close], axis=1)
-            true_range = ranges.max(axis=1)
-            hist['ATR'] = true_range.rolling(14).mean()
-
-            # Get volume metrics
-            vol_20d = hist['Volume'].rolling(20).mean().iloc[-1]
-            vol_5d = hist['Volume'].rolling(5).mean().iloc[-1]
-
-            # Check 20-day high for breakout
-            high_20d = hist['High'].rolling(20).max().iloc[-21]  # 20 days ago
-
-            # Compile data
-            stock_data = {
-                'Symbol': symbol.replace('.NS', ''),
-                'Date': hist.index[-1].strftime('%Y-%m-%d'),
-                'Close': round(latest['Close'], 2),
-                'Open': round(latest['Open'], 2),
-                'High': round(latest['High'], 2),
-                'Low': round(latest['Low'], 2),
-                'Volume': int(latest['Volume']),
-                'MA20': round(hist['MA20'].iloc[-1], 2),
-                'MA50': round(hist['MA50'].iloc[-1], 2),
-                'MA200': round(hist['MA200'].iloc[-1], 2),
-                'RSI': round(hist['RSI'].iloc[-1], 2),
-                'ADX': round(hist['ADX'].iloc[-1], 2),
-                'ATR': round(hist['ATR'].iloc[-1], 2),
-                'Vol_20D_Avg': int(vol_20d),
-                'Vol_5D_Avg': int(vol_5d),
-                'High_20D': round(high_20d, 2),
-                'Support': round(hist['Low'].rolling(10).min().iloc[-1], 2),
-                'Resistance': round(hist['High'].max(), 2)
-            }
-
-            all_data.append(stock_data)
-
-            time.sleep(0.5)  # Rate limiting
-
-        except Exception as e:
-            log(f"  ERROR fetching {symbol}: {e}")
-            continue
-
-    df = pd.DataFrame(all_data)
-
-    # Save to CSV
-    today = datetime.now().strftime('%Y%m%d')
-    output_file = f"{OUTPUT_DIR}raw_data_{today}.csv"
-    df.to_csv(output_file, index=False)
+def fetch_histories(symbols):
+    """6 months of OHLCV straight from Yahoo (no bar store)"""
+
+    log(f"Downloading {len(symbols)} symbols ({FETCHER.mode})")
+
+    start = time.perf_counter()
+    histories, stats = FETCHER.fetch(symbols, period='6mo')
+    elapsed = time.perf_counter() - start
+
+    failed = [s for chunk in stats for s in chunk['failed']]
+    log(f"Download: {len(histories)}/{len(symbols)} symbols "
+        f"in {len(stats)} chunks, {elapsed:.2f}s",
+        count=len(histories), failed=len(failed), seconds=round(elapsed, 2))
+    if failed:
+        log(f"  WARNING: No data for {len(failed)} symbols: {', '.join(failed)}")
+
+    return histories
+
+
+def store_sync(symbols, full=False):
+    """Bring the local bar store up to date for these symbols"""
+
+    stats = bar_store.sync(
+        symbols,
+        FETCHER,
+        backfill_period=CONFIG.get('bar_store_backfill_period', '2y'),
+        full=full,
+        log=log
+    )
+
+    log(f"Bar store: {stats['delta']} delta updates, "
+        f"{stats['backfilled']} backfilled, {len(stats['failed'])} failed")
+    if stats['failed']:
+        log(f"  WARNING: No data for {', '.join(stats['failed'])}")
+
+    return stats
+
+
+def months_ago(months):
+    return pd.Timestamp.now().normalize() - pd.DateOffset(months=months)
+
+
+def scratch_frame(panel):
+    """raw_data rows computed from the full panel in one vectorized pass"""
+    workers = CONFIG.get('indicator_workers', 1)
+    if workers > 1 and len(panel['symbols']) >= CONFIG.get('indicator_parallel_min_symbols', 200):
+        return parallel.compute_sharded(panel, workers, resistance_since=months_ago(6), log=log)
+
+    values = indicators.compute(panel)
+    return indicators.latest_frame(panel, values, resistance_since=months_ago(6))
+
+
+def incremental_frame(symbols, verify=False):
+    """
+    Advance yesterday's indicator checkpoint by the bars it has not seen
+
+    Symbols whose checkpointed last bar is no longer in the store unchanged
+    (new listings, re-adjusted history) are rebuilt from their stored bars.
+    With verify=True the result is diffed against a from-scratch
+    computation and the checkpoint is rebuilt on drift.
+    """
+
+    saved = checkpoint.load('indicators')
+    saved_symbols, saved_dates, arrays = saved if saved is not None else ([], None, None)
+
+    # Read back only as far as the oldest checkpoint, if every symbol has one
+    since = None
+    known = dict(zip(saved_symbols, saved_dates if saved is not None else []))
+    if symbols and all(s in known for s in symbols):
+        since = pd.Timestamp(min(known[s] for s in symbols))
+
+    panel = bar_store.load_panel(symbols, since=since)
+    symbols, dates = panel['symbols'], panel['dates']
+
+    state = indicators.IndicatorState(len(symbols))
+    resumed = np.zeros(len(symbols), dtype=bool)
+
+    if saved is not None and len(dates):
+        cur, old = checkpoint.align(saved_symbols, symbols)
+        rows = np.minimum(np.searchsorted(dates, saved_dates[old]), len(dates) - 1)
+        same_bar = (dates[rows] == saved_dates[old]) & np.isclose(
+            panel['close'][rows, cur], arrays['last_close'][old],
+            rtol=bar_store.ADJUSTMENT_TOLERANCE
+        )
+        cur, old = cur[same_bar], old[same_bar]
+        state.restore(arrays, saved_dates, cur, old)
+        resumed[cur] = True
+
+    if since is not None and not resumed.all():
+        panel = bar_store.load_panel(symbols)
+        dates = panel['dates']
+
+    after = np.where(resumed, state.last_date, np.datetime64('1900-01-01'))
+    start = int(np.searchsorted(dates, after.min(), side='right')) if len(after) else 0
+    tail = dict(panel, **{f: panel[f][start:] for f in indicators.PANEL_FIELDS}, dates=dates[start:])
+    state.update_panel(tail, after=after)
+
+    log(f"Indicators: {int(resumed.sum())} resumed from checkpoint, "
+        f"{int((~resumed).sum())} rebuilt, {len(dates) - start} bars applied")
+
+    df = state.frame(symbols, resistance_since=months_ago(6))
+
+    if verify:
+        if since is not None and resumed.all():
+            panel = bar_store.load_panel(symbols)
+        drift = diff_frames(df, scratch_frame(panel))
+
+        if drift:
+            log(f"VERIFY: {len(drift)} columns drifted - rebuilding checkpoint")
+            for column, (count, worst, one_sided) in drift.items():
+                log(f"  {column}: {count} stocks, max diff {worst}, "
+                    f"{one_sided} NaN on one side only")
+            state = indicators.IndicatorState(len(symbols))
+            state.update_panel(panel)
+            df = state.frame(symbols, resistance_since=months_ago(6))
+        else:
+            log("VERIFY: incremental indicators match a full recompute")
+
+    checkpoint.update('indicators', symbols, state.last_date, state.state())
+    return df
+
 
-    log(f"Saved data for {len(df)} stocks to {output_file}")
+def diff_frames(actual, expected, tolerance=0.011):
+    """
+    {column: (mismatching rows, max abs diff, rows NaN on one side only)}
+    between two raw_data frames
+
+    One-sided NaNs count as mismatches but have no numeric difference, so
+    they are reported separately rather than folded into the max diff.
+    """
+    a = actual.set_index('Symbol').sort_index()
+    e = expected.set_index('Symbol').reindex(a.index)
+    drift = {}
+
+    for column in a.columns:
+        if column == 'Date':
+            bad = a[column] != e[column]
+            worst, one_sided = '', 0
+        else:
+            gap = (a[column] - e[column]).abs()
+            lone_nan = a[column].isna() != e[column].isna()
+            numeric = gap > tolerance
+            bad = lone_nan | numeric
+            worst = round(float(gap[numeric].max()), 4) if numeric.any() else 0
+            one_sided = int(lone_nan.sum())
+
+        if bad.any():
+            drift[column] = (int(bad.sum()), worst, one_sided)
+
+    return drift
+
+
+def partial_path(day):
+    return f"{OUTPUT_DIR}raw_data_{day}.partial.csv"
+
+
+def load_partial(path):
+    """Rows already collected today; a torn last line from a crash is dropped"""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=indicators.RAW_DATA_COLUMNS)
+
+    with open(path, 'r') as f:
+        text = f.read()
+    text = text[:text.rfind('\n') + 1]
+    if not text:
+        return pd.DataFrame(columns=indicators.RAW_DATA_COLUMNS)
+
+    return pd.read_csv(io.StringIO(text))
+
+
+def append_partial(path, rows):
+    """Append finished rows and fsync, so they survive a crash"""
+    if rows.empty:
+        return
+
+    text = rows.to_csv(index=False, header=not os.path.exists(path))
+    with open(path, 'a') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def collect_batch(symbols, backfill=False, verify=False):
+    """Fetch bars and compute raw_data rows for one batch of symbols"""
+
+    if CONFIG.get('bar_store', True):
+        with metrics.timer('collector.fetch'):
+            store_sync(symbols, full=backfill)
+        with metrics.timer('collector.indicators'):
+            if CONFIG.get('incremental_indicators', True):
+                return incremental_frame(symbols, verify=verify)
+            return scratch_frame(bar_store.load_panel(symbols))
+
+    with metrics.timer('collector.fetch'):
+        histories = fetch_histories(symbols)
+    with metrics.timer('collector.indicators'):
+        return scratch_frame(indicators.build_panel(histories))
+
+
+@metrics.timer('collector.fetch_price_data')
+def fetch_price_data(symbols, backfill=False, verify=False, resume=False, persist=True):
+    """
+    Fetch OHLCV data for all stocks
+
+    Symbols are collected in batches of collect_batch_size and each
+    finished batch is appended to raw_data_YYYYMMDD.partial.csv. With
+    resume=True, symbols already in today's partial file are skipped.
+    persist=False skips writing raw_data_YYYYMMDD.cols/.csv.
+    """
+
+    today = datetime.now().strftime('%Y%m%d')
+    partial = partial_path(today)
+
+    if not resume and os.path.exists(partial):
+        os.remove(partial)
+
+    done = load_partial(partial)
+    if resume:
+        log(f"Resuming: {len(done)} stocks already collected today")
+
+    collected = set(done['Symbol'].astype(str))
+    todo = [s for s in symbols if s.replace('.NS', '') not in collected]
+    batches = list(chunked(todo, CONFIG.get('collect_batch_size', 250)))
+
+    start = time.perf_counter()
+
+    for n, batch in enumerate(batches, start=1):
+        if len(batches) > 1:
+            log(f"Batch {n}/{len(batches)}: {len(batch)} symbols")
+        rows = collect_batch(batch, backfill=backfill, verify=verify)
+        with metrics.timer('collector.csv_write'):
+            append_partial(partial, rows)
+        metrics.count('collector.symbols', len(batch))
+        metrics.count('collector.rows', len(rows))
+
+    df = load_partial(partial)
+
+    elapsed = time.perf_counter() - start
+    log(f"Computed indicators for {len(df) - len(done)} stocks in {elapsed:.2f}s",
+        count=len(df) - len(done), seconds=round(elapsed, 2))
+
+    if not df.empty:
+        df = add_panel_columns(df)
+        df = add_levels(df)
+
+    deliveries = fetch_delivery_data()
+    if deliveries is not None and not df.empty:
+        df = df.merge(deliveries, on='Symbol', how='left')
+        stale = (df['Delivery_Date'] < df['Date']).sum()
+        if stale:
+            log(f"  WARNING: Delivery data older than price data for {stale} stocks")
+
+    skipped = len(symbols) - len(df)
+    if skipped:
+        log(f"  WARNING: Skipped {skipped} stocks with no data or under "
+            f"{indicators.MIN_BARS} bars of history")
+
+    if persist:
+        with metrics.timer('collector.save'):
+            paths = columnar.save(
+                df, f"{OUTPUT_DIR}raw_data_{today}",
+                fmt=CONFIG.get('handoff_format', 'columnar'),
+                csv=CONFIG.get('handoff_csv', True)
+            )
+        log(f"Saved data for {len(df)} stocks to {', '.join(paths)}")
+
+    if os.path.exists(partial):
+        os.remove(partial)
 
     return df
 
 
+@metrics.timer('collector.panel_columns')
+def add_panel_columns(df):
+    """
+    Relative strength vs Nifty (RS_1M/3M/6M) and chart patterns at each
+    symbol's last stored bar, from one read of the recent bars
+    """
+
+    if not CONFIG.get('bar_store', True):
+        log("Relative strength / patterns: need the bar store - skipped")
+        return df
+
+    try:
+        symbols = [s + '.NS' for s in df['Symbol'].astype(str)]
+        panel = bar_store.load_panel(symbols, since=months_ago(8))
+        if not panel['symbols']:
+            return df
+
+        values = patterns.detect(panel)
+        index_close = strength.index_closes(panel['dates'])
+        if np.isnan(index_close).all():
+            log(f"Relative strength: no {regime.NIFTY} bars stored - skipped")
+        else:
+            values.update(strength.excess_returns(panel['close'], index_close))
+
+        live = ~np.isnan(panel['close'])
+        last = len(live) - 1 - np.argmax(live[::-1], axis=0)
+        cols = np.arange(len(panel['symbols']))
+
+        table = pd.DataFrame({'Symbol': [s.replace('.NS', '') for s in panel['symbols']]})
+        for name, arr in values.items():
+            table[name] = np.round(arr[last, cols], 2)
+        table['Pattern'] = patterns.tags(table)
+
+        found = {name: int(table[name].sum()) for name in patterns.PATTERNS}
+        log("Patterns: " + ", ".join(f"{n} {c}" for n, c in found.items()), **found)
+        return df.merge(table, on='Symbol', how='left')
+
+    except Exception as e:
+        log(f"ERROR computing relative strength / patterns: {e}")
+        return df
+
+
+@metrics.timer('collector.levels')
+def add_levels(df):
+    """Nearest support / resistance zones from each symbol's swing pivots"""
+
+    if not CONFIG.get('bar_store', True):
+        log("Levels: need the bar store - skipped")
+        return df
+
+    try:
+        symbols = [s + '.NS' for s in df['Symbol'].astype(str)]
+        table = levels.update(symbols, log=log)
+        table[levels.COLUMNS] = table[levels.COLUMNS].round(2)
+        return df.merge(table, on='Symbol', how='left')
+
+    except Exception as e:
+        log(f"ERROR computing levels: {e}")
+        return df
+
+
 # ═══════════════════════════════════════════════════════
 # FUNCTION 3: Fetch NSE Bhav Copy (Delivery %)
 # ═══════════════════════════════════════════════════════
 
+@metrics.timer('collector.delivery')
 def fetch_delivery_data():
     """
-    Fetch delivery percentage from NSE
-    Note: NSE API requires proper headers and cookies
-    For production, implement proper NSE scraping
+    Delivery % from NSE security-wise bhav copies dropped in data/
+    (nse_bhav_copy_*.csv/zip or sec_bhavdata_full_*.csv/zip)
     """
 
-    # Placeholder - implement NSE scraping
-    # For now, assume 50% delivery for all stocks
-
-    log("NOTE: Using placeholder delivery data (50%)")
-    log("TODO: Implement NSE Bhav Copy scraping")
+    try:
+        start = time.perf_counter()
+        history = delivery.ingest(
+            max_days=CONFIG.get('delivery_history_days', 60), log=log
+        )
+        table = delivery.delivery_table(history)
+        elapsed = time.perf_counter() - start
+
+        if table.empty:
+            log("WARNING: No bhav copy files found - delivery % unavailable")
+            return None
+
+        log(f"Delivery data: {len(table)} symbols as of "
+            f"{table['Delivery_Date'].iloc[0]} ({elapsed:.2f}s)",
+            count=len(table), seconds=round(elapsed, 2))
+        return table
 
-    return None
+    except Exception as e:
+        log(f"ERROR loading delivery data: {e}")
+        return None
 
 
 # ═══════════════════════════════════════════════════════
 # FUNCTION 4: Check Market Regime
 # ═══════════════════════════════════════════════════════
 
-def check_market_regime():
+@metrics.timer('collector.regime')
+def check_market_regime(backfill=False):
     """Check if Nifty is above key MAs"""
 
     try:
-        nifty = yf.Ticker('^NSEI')
-        hist = nifty.history(period='1y')
-
-        hist['MA50'] = hist['Close'].rolling(50).mean()
-        hist['MA200'] = hist['Close'].rolling(200).mean()
-
-        latest = hist.iloc[-1]
-
-        regime = {
-            'Date': hist.index[-1].strftime('%Y-%m-%d'),
-            'Nifty_Close': float(round(latest['Close'], 2)),
-            'MA50': float(round(latest['MA50'], 2)),
-            'MA200': float(round(latest['MA200'], 2)),
-            'Above_MA50': bool(latest['Close'] > latest['MA50']),
-            'Above_MA200': bool(latest['Close'] > latest['MA200'])
-        }
-
-        # Fetch VIX
-        vix = yf.Ticker('^INDIAVIX')
-        vix_hist = vix.history(period='5d')
-        regime['VIX'] = float(round(vix_hist['Close'].iloc[-1], 2))
-
-        # Decision
-        if regime['Above_MA50'] and regime['Above_MA200'] and regime['VIX'] < 20:
-            regime['Status'] = 'GREEN'
-            regime['Trade'] = True
-        else:
-            regime['Status'] = 'YELLOW'
-            regime['Trade'] = False
+        store = CONFIG.get('bar_store', True)
+        if store:
+            regime.update(FETCHER, CONFIG, backfill=backfill, log=log)
 
-        log(f"Market Regime: {regime['Status']} (Nifty: {regime['Nifty_Close']}, VIX: {regime['VIX']})")
+        snapshot = regime.current(CONFIG, fetcher=None if store else FETCHER, refresh=True)
+        log(f"Market Regime: {regime.describe(snapshot)}")
 
         # Save
-        with open(f"{OUTPUT_DIR}market_regime.json", 'w') as f:
-            json.dump(regime, f, indent=2)
+        regime.save(snapshot, f"{OUTPUT_DIR}market_regime.json")
 
-        return regime
+        return snapshot
 
     except Exception as e:
         log(f"ERROR checking market regime: {e}")
         return {'Trade': False}
 
 
+@metrics.timer('collector.breadth')
+def update_breadth(symbols):
+    """Watchlist breadth from the bar store, folded into the regime snapshot"""
+
+    if not CONFIG.get('bar_store', True):
+        log("Breadth: needs the bar store - skipped")
+        return
+
+    try:
+        start = time.perf_counter()
+        since = breadth.since_for_update(breadth.load_history())
+        breadth.update(bar_store.load_panel(symbols, since=since), log=log)
+
+        snapshot = regime.current(CONFIG, refresh=True)
+        regime.save(snapshot, f"{OUTPUT_DIR}market_regime.json")
+        log(f"Market Regime (with breadth): {regime.describe(snapshot)} "
+            f"in {time.perf_counter() - start:.2f}s")
+
+    except Exception as e:
+        log(f"ERROR computing breadth: {e}")
+
+
 # ═══════════════════════════════════════════════════════
 # MAIN EXECUTION
 # ═══════════════════════════════════════════════════════
 
-def main():
+def repair_store(symbols):
+    """Fill gaps in stored bars using Nifty's trading calendar"""
+    calendar = bar_store.load_bars('^NSEI')
+    if calendar is None:
+        log("Bar store: ^NSEI not stored yet - cannot repair gaps")
+        return
+
+    repaired = bar_store.repair(
+        symbols, calendar['date'], FETCHER, log=log
+    )
+    log(f"Bar store: repaired {repaired} symbols")
+
+
+def log_cache_stats():
+    summary = FETCHER.cache_summary()
+    if summary:
+        log(summary)
+
+
+def run(backfill=False, verify=False, resume=False, repair=False, persist=True):
+    """
+    Whole collection stage
+
+    Returns:
+        DataFrame: raw_data rows (empty if collection was skipped)
+    """
+
     log("=" * 50)
     log("STARTING DATA COLLECTION")
     log("=" * 50)
 
     # Step 1: Check market regime
-    regime = check_market_regime()
+    market = check_market_regime(backfill=backfill)
 
-    if regime['Status'] == 'RED':
+    if market['Status'] == 'RED':
         log("RED market regime - Skipping data collection")
-        return
+        log_cache_stats()
+        return pd.DataFrame()
 
-    log(f"{regime['Status']} regime - Proceeding with data collection")
+    log(f"{market['Status']} regime - Proceeding with data collection")
 
     # Step 2: Load watchlist
     watchlist = load_watchlist()
 
     if not watchlist:
         log("ERROR: Empty watchlist - Aborting")
-        return
+        return pd.DataFrame()
+
+    if repair:
+        repair_store(watchlist)
 
     # Step 3: Fetch price data
-    data = fetch_price_data(watchlist)
+    data = fetch_price_data(
+        watchlist, backfill=backfill, verify=verify, resume=resume, persist=persist
+    )
+
+    # Step 4: Market breadth
+    update_breadth(watchlist)
+
+    log_cache_stats()
 
     log("=" * 50)
     log("DATA COLLECTION COMPLETE")
     log("=" * 50)
 
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Re-download the full backfill period into the bar store"
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Diff incremental indicators against a full recompute"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip stocks already collected by an interrupted run today"
+    )
+    parser.add_argument(
+        "--repair",
+        action="store_true",
+        help="Fill missing trading days in the bar store before collecting"
+    )
+    args = parser.parse_args()
+
+    with metrics.session('data_collection', log=log):
+        run(backfill=args.backfill, verify=args.verify, resume=args.resume, repair=args.repair)
+
 
 if __name__ == "__main__":
     main()
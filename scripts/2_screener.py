@@ -4,98 +4,55 @@ Runs: Daily 9:00 AM (after data collection)
 Purpose: Apply 3-layer filters and identify candidates
 """
 
-import pandas as pd
-import json
 from datetime import datetime
 import argparse
 
+import columnar
+import metrics
+import rules
+import stage_log
+
+# pandas and the modules that pull it in are imported where used: the daily
+# run never needs replay, replay never needs the rest, and --help needs none
+
 # ═══════════════════════════════════════════════════════
 # PATHS
 # ═══════════════════════════════════════════════════════
 
 DATA_DIR = "data/"
 OUTPUT_DIR = "output/"
+SETTINGS_FILE = "config/settings.json"
+FILTERS_FILE = "config/filters.json"
 LOG_FILE = f"logs/screening_{datetime.now().strftime('%Y%m%d')}.txt"
 
 # ═══════════════════════════════════════════════════════
 # LOGGING
 # ═══════════════════════════════════════════════════════
 
-def log(message):
-    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    msg = f"[{ts}] {message}"
-    print(msg)
-    with open(LOG_FILE, "a") as f:
-        f.write(msg + "\n")
-
-# ═══════════════════════════════════════════════════════
-# LOAD BASE FILTERS
-# ═══════════════════════════════════════════════════════
-
-with open("config/filters.json", "r") as f:
-    BASE_FILTERS = json.load(f)
+log = stage_log.get_logger('screening', LOG_FILE)
 
 # ═══════════════════════════════════════════════════════
 # FILTER MODES
 # ═══════════════════════════════════════════════════════
 
 def load_filters(mode):
-    if mode == "testing":
-        log("Running in TESTING mode (VERY RELAXED – DO NOT TRADE)")
-        return {
-            "mode": "testing",
-            "layer1": {
-                "min_volume": 100000,
-                "min_price": 50,
-                "max_price": 10000
-            },
-            "layer2": {
-                "rsi_min": 40,
-                "rsi_max": 80,
-                "adx_min": 10,
-                "volume_surge": 0.8
-            },
-            "layer3": {
-                "max_extension": 25,
-                "min_rr": 1.2
-            }
-        }
-
-    elif mode == "relaxed":
-        log("Running in RELAXED mode")
-        return {
-            "mode": "relaxed",
-            "layer1": {
-                "min_volume": 200000,
-                "min_price": 100,
-                "max_price": 5000
-            },
-            "layer2": {
-                "rsi_min": 45,
-                "rsi_max": 75,
-                "adx_min": 15,
-                "volume_surge": 1.1
-            },
-            "layer3": {
-                "max_extension": 15,
-                "min_rr": 1.8
-            }
-        }
-
-    else:
-        log("Running in STANDARD mode")
-        BASE_FILTERS["mode"] = "standard"
-        return BASE_FILTERS
+    """Compiled rules for a mode from filters.json"""
+    ruleset = rules.load(mode, FILTERS_FILE)
+    note = "" if ruleset.tradeable else " (VERY RELAXED – DO NOT TRADE)"
+    log(f"Running in {ruleset.label} mode{note}")
+    return ruleset
 
 # ═══════════════════════════════════════════════════════
 # LOAD DATA
 # ═══════════════════════════════════════════════════════
 
+@metrics.timer('screener.load_data')
 def load_latest_data():
+    import pandas as pd
+
     today = datetime.now().strftime("%Y%m%d")
-    file = f"{DATA_DIR}raw_data_{today}.csv"
     try:
-        df = pd.read_csv(file)
+        df, file = columnar.load(f"{DATA_DIR}raw_data_{today}")
         log(f"Loaded {len(df)} stocks from {file}")
         return df
     except Exception as e:
@@ -103,172 +60,269 @@ def load_latest_data():
         return pd.DataFrame()
 
 # ═══════════════════════════════════════════════════════
-# LAYER 1 – LIQUIDITY FILTER
+# RELATIVE STRENGTH RANKING
 # ═══════════════════════════════════════════════════════
 
-def layer1_filter(df, F):
-    start = len(df)
+@metrics.timer('screener.rank_strength')
+def rank_strength(df):
+    """
+    RS_Score and RS_Percentile of every stock against today's universe
+
+    Ranked before any filter, so a percentile means the same thing in
+    every mode. Without RS columns (no Nifty bars stored) both are NaN
+    and the RS filter lets everything through.
+    """
+    import pandas as pd
+    import strength
 
-    df = df[df["Vol_20D_Avg"] >= F["layer1"]["min_volume"]]
-    log(f"  Volume filter: {len(df)} remain")
+    present = {name: df[name].to_numpy(dtype=float) for name in strength.HORIZONS if name in df}
+    ranked = strength.rank(present, (len(df),))
 
-    df = df[
-        (df["Close"] >= F["layer1"]["min_price"]) &
-        (df["Close"] <= F["layer1"]["max_price"])
-    ]
-    log(f"  Price filter: {len(df)} remain")
+    if pd.isna(ranked['RS_Percentile']).all():
+        log("Relative strength: no RS data in raw_data - not ranked")
+    else:
+        leaders = int((ranked['RS_Percentile'] >= 80).sum())
+        log(f"Relative strength: ranked {int(pd.notna(ranked['RS_Score']).sum())} stocks "
+            f"({leaders} at or above the 80th percentile)")
 
-    log(f"LAYER 1: Removed {start - len(df)}")
-    return df
+    return df.assign(**ranked)
 
 # ═══════════════════════════════════════════════════════
-# LAYER 2 – MOMENTUM FILTER
+# WEEKLY & MONTHLY CONFIRMATION
 # ═══════════════════════════════════════════════════════
 
-def layer2_filter(df, F):
-    start = len(df)
-    mode = F.get("mode", "standard")
-
-    if mode == "testing":
-        df = df[df["Close"] > df["MA20"]]
-        log(f"  TESTING MA filter: {len(df)} remain")
+@metrics.timer('screener.timeframes')
+def add_timeframes(df, ruleset):
+    """
+    W_* / M_* columns for the rules that use them, from the cached
+    weekly / monthly bars (updated here, last period only)
+    """
+    import timeframes
 
-    elif mode == "relaxed":
-        df = df[
-            (df["Close"] > df["MA50"]) &
-            (df["MA50"] > df["MA200"])
-        ]
-        log(f"  RELAXED MA filter: {len(df)} remain")
+    wanted = timeframes.needed(ruleset.inputs)
+    if not wanted:
+        return df
 
-    else:
-        df = df[
-            (df["Close"] > df["MA50"]) &
-            (df["Close"] > df["MA200"]) &
-            (df["MA20"] > df["MA50"]) &
-            (df["MA50"] > df["MA200"])
-        ]
-        log(f"  STANDARD MA filter: {len(df)} remain")
-
-    df = df[
-        (df["RSI"] >= F["layer2"]["rsi_min"]) &
-        (df["RSI"] <= F["layer2"]["rsi_max"])
-    ]
-    log(f"  RSI filter: {len(df)} remain")
-
-    df = df[df["ADX"] >= F["layer2"]["adx_min"]]
-    log(f"  ADX filter: {len(df)} remain")
-
-    df = df.copy()
-    df["Vol_Ratio"] = df["Vol_5D_Avg"] / df["Vol_20D_Avg"]
-    df = df[df["Vol_Ratio"] >= F["layer2"]["volume_surge"]]
-    log(f"  Volume surge: {len(df)} remain")
-
-    log(f"LAYER 2: Removed {start - len(df)}")
-    return df
+    try:
+        symbols = [s + ".NS" for s in df["Symbol"].astype(str)]
+        table = timeframes.latest(symbols, wanted, log=log)
+        return df.drop(columns=[c for c in table.columns[1:] if c in df]).merge(table, on="Symbol", how="left")
+    except Exception as e:
+        log(f"ERROR computing weekly/monthly bars: {e}")
+        return df
 
 # ═══════════════════════════════════════════════════════
-# LAYER 3 – RISK & STRUCTURE
+# LAYERS 1-3 – LIQUIDITY, MOMENTUM, RISK & STRUCTURE
 # ═══════════════════════════════════════════════════════
 
-def layer3_filter(df, F):
-    df = df.copy()
-    start = len(df)
+@metrics.timer('screener.apply_rules')
+def apply_rules(df, ruleset):
+    """
+    Every layer's rules as one fused mask over the columns
 
-    df = df[df["Close"] > df["High_20D"]]
-    log(f"  Breakout filter: {len(df)} remain")
+    Returns:
+        DataFrame: surviving rows with the derived fields (Entry, SL,
+        Target, RR, Risk_Pct, ...) filled in
+    """
 
-    df["Pct_Above_MA20"] = ((df["Close"] - df["MA20"]) / df["MA20"]) * 100
-    df = df[df["Pct_Above_MA20"] <= F["layer3"]["max_extension"]]
-    log(f"  Extension filter: {len(df)} remain")
+    columns = ruleset.columns(df)
+    mask, survivors = ruleset.evaluate(columns)
+    log_funnel(ruleset, len(df), survivors)
 
-    df["Entry"] = df["Close"]
-    df["SL"] = df["Support"] * 0.995
-    df["Risk_Per_Share"] = df["Entry"] - df["SL"]
-    df["Target"] = df["Entry"] + (2 * df["Risk_Per_Share"])
-    df["RR"] = (df["Target"] - df["Entry"]) / df["Risk_Per_Share"]
+    passed = df.loc[mask]
+    return passed.assign(**{name: columns[name][mask] for name in ruleset.derived})
 
-    df = df[df["RR"] >= F["layer3"]["min_rr"]]
-    log(f"  RR filter: {len(df)} remain")
 
-    df["Risk_Pct"] = (df["Risk_Per_Share"] / df["Entry"]) * 100
+def log_funnel(ruleset, start, survivors):
+    """Per-rule survivors and per-layer removals"""
+    funnel = ruleset.funnel(start, survivors)
+    layer_start = start
+    for i, (layer, name, remain, removed) in enumerate(funnel):
+        log(f"  {name}: {remain} remain", rule=name, remain=remain, removed=removed)
+        if i + 1 == len(funnel) or funnel[i + 1][0] != layer:
+            log(f"LAYER {layer}: Removed {layer_start - remain}")
+            layer_start = remain
 
-    if F.get("mode") == "testing":
-        df = df[df["Risk_Pct"] <= 12]
-        log(f"  TESTING Risk % filter: {len(df)} remain")
-    else:
-        df = df[df["Risk_Pct"] <= 5]
-        log(f"  Risk % filter: {len(df)} remain")
+# ═══════════════════════════════════════════════════════
+# SCORE MODE – WEIGHTED RULES, TOP K
+# ═══════════════════════════════════════════════════════
 
-    log(f"LAYER 3: Removed {start - len(df)}")
-    return df
+@metrics.timer('screener.apply_scores')
+def apply_scores(df, ruleset):
+    """
+    Gate layers filter; every other rule adds to a 0-100 score and the
+    top_k scores are kept, so a quiet day still yields a ranked list
+
+    Returns:
+        DataFrame: the picks, best first, with Score and one
+        Score_<rule> column per scored rule (points that sum to Score)
+    """
+
+    columns = ruleset.columns(df)
+    chosen, survivors, total, breakdown = ruleset.select_top(columns)
+    log_funnel(ruleset, len(df), survivors)
+
+    passed = int(survivors[-1]) if len(survivors) else len(df)
+    log(f"SCORING: top {ruleset.top_k} of {passed} by weighted score "
+        f"({len(ruleset.scored)} rules)", candidates=passed, picked=int(chosen.sum()))
+
+    picks = df.loc[chosen].assign(
+        **{name: columns[name][chosen] for name in ruleset.derived},
+        Score=total[chosen],
+        **{name: points[chosen] for name, points in breakdown.items()}
+    )
+    return picks.sort_values("Score", ascending=False)
 
 # ═══════════════════════════════════════════════════════
 # MAIN
 # ═══════════════════════════════════════════════════════
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument(
-        "--mode",
-        choices=["standard", "relaxed", "testing"],
-        default="standard",
-        help="Screening mode"
-    )
-    args = parser.parse_args()
+def run(df=None, mode="standard", persist=True):
+    """
+    Whole screening stage
+
+    Args:
+        df: raw_data frame from the collector; read from today's .cols/.csv if None
+        mode: a mode from filters.json (standard / relaxed / testing)
+        persist: Write shortlist_YYYYMMDD.cols/.csv
 
-    FILTERS = load_filters(args.mode)
+    Returns:
+        DataFrame: the shortlist (empty if nothing passed)
+    """
+    import pandas as pd
+    import regime
+
+    FILTERS = load_filters(mode)
 
     log("=" * 70)
     log("STARTING SCREENING")
 
-    if args.mode == "testing":
-        log("⚠️ TESTING MODE – OUTPUT IS NOT FOR TRADING")
+    if not FILTERS.tradeable:
+        log(f"⚠️ {FILTERS.label} MODE – OUTPUT IS NOT FOR TRADING")
+
+    market = regime.latest(log=log)
+    if market:
+        log(f"Market regime: {regime.describe(market)}")
+        if not market["Trade"] and mode == "standard":
+            log("⚠️ Regime does not favour new longs – review shortlist with care")
 
-    df = load_latest_data()
+    if df is None:
+        df = load_latest_data()
     if df.empty:
         log("No data available")
-        return
+        return pd.DataFrame()
 
     log(f"Starting universe: {len(df)} stocks")
 
-    df = layer1_filter(df, FILTERS)
-    if df.empty:
-        log("No stocks after Layer 1")
-        return
-
-    df = layer2_filter(df, FILTERS)
-    if df.empty:
-        log("No stocks after Layer 2")
-        return
-
-    df = layer3_filter(df, FILTERS)
+    df = rank_strength(df)
+    df = add_timeframes(df, FILTERS)
+    if FILTERS.select == "score":
+        df = apply_scores(df, FILTERS)
+    else:
+        df = apply_rules(df, FILTERS)
     if df.empty:
-        log("No stocks after Layer 3")
-        return
-
-    output_cols = [
-        "Symbol", "Entry", "SL", "Target", "RR",
-        "Risk_Pct", "MA20", "MA50", "MA200",
-        "RSI", "ADX", "ATR"
-    ]
-
-    shortlist = df[output_cols].round(2)
-    shortlist["Mode"] = args.mode
+        log("No stocks passed the filters")
+        return pd.DataFrame()
 
-    today = datetime.now().strftime("%Y%m%d")
-    file = f"{OUTPUT_DIR}shortlist_{today}.csv"
-    shortlist.to_csv(file, index=False)
+    # Pattern / RS columns are absent when raw_data came without the bar store
+    shortlist = df.reindex(columns=rules.shortlist_columns(FILTERS)).round(2)
+    shortlist["Mode"] = mode
 
     log("=" * 70)
     log(f"SCREENING COMPLETE: {len(shortlist)} stocks")
-    log(f"Saved to: {file}")
+
+    if persist:
+        today = datetime.now().strftime("%Y%m%d")
+        config = regime.settings(SETTINGS_FILE)
+        paths = columnar.save(
+            shortlist, f"{OUTPUT_DIR}shortlist_{today}",
+            fmt=config.get('handoff_format', 'columnar'),
+            csv=config.get('handoff_csv', True)
+        )
+        log(f"Saved to: {', '.join(paths)}")
+
     log("=" * 70)
 
     print("\n" + "=" * 90)
     print("SHORTLIST")
     print("=" * 90)
-    print(shortlist[["Symbol", "Entry", "SL", "Target", "RR", "Mode"]].to_string(index=False))
+    shown = ["Symbol", "Entry", "SL", "Target", "RR"] + (["Score"] if "Score" in shortlist else []) + ["Mode"]
+    print(shortlist[shown].to_string(index=False))
     print("=" * 90)
 
+    return shortlist
+
+
+# ═══════════════════════════════════════════════════════
+# REPLAY
+# ═══════════════════════════════════════════════════════
+
+@metrics.timer('screener.replay')
+def run_replay(mode="standard", source="store", start=None, end=None, persist=True):
+    """
+    The filters over every stored (or archived) day at once
+
+    Returns:
+        tuple: (per-day shortlists, per-day funnel) DataFrames
+    """
+    import replay
+
+    FILTERS = load_filters(mode)
+
+    log("=" * 70)
+    log("STARTING SCREENER REPLAY")
+
+    shortlists, funnel, summary = replay.run(
+        FILTERS, source=source, start=start, end=end, persist=persist, log=log
+    )
+    if funnel.empty:
+        return shortlists, funnel
+
+    days = len(funnel)
+    active = int((funnel["Shortlisted"] > 0).sum())
+    log(f"REPLAY COMPLETE: {len(shortlists)} picks over {days} days "
+        f"({active} days with a shortlist, {len(shortlists) / days:.2f} per day)",
+        picks=len(shortlists), days=days)
+
+    log("Funnel (survivors per day):")
+    for row in summary.itertuples(index=False):
+        log(f"  L{row.Layer} {row.Rule:<20} mean {row.Mean_Remain:>8.1f}  "
+            f"min {row.Min_Remain:>5}  max {row.Max_Remain:>5}  removed {row.Removed_Pct:>5.1f}%")
+    log("=" * 70)
+
+    return shortlists, funnel
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--mode",
+        choices=rules.modes(FILTERS_FILE),
+        default="standard",
+        help="Screening mode"
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Replay the filters over history instead of screening today"
+    )
+    parser.add_argument(
+        "--source",
+        choices=["store", "archive"],
+        default="store",
+        help="Replay input: bar store (recomputed) or archived raw_data files"
+    )
+    parser.add_argument("--start", help="Replay from this date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Replay up to this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if args.replay:
+        with metrics.session('screening_replay', log=log):
+            run_replay(mode=args.mode, source=args.source, start=args.start, end=args.end)
+        return
+
+    with metrics.session('screening', log=log):
+        run(mode=args.mode)
+
 if __name__ == "__main__":
     main()
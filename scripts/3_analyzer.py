@@ -4,10 +4,15 @@ Runs: Daily 9:15 AM
 Purpose: Calculate position sizes and generate final signals
 """
 
-import pandas as pd
 import json
 from datetime import datetime
 
+import columnar
+import metrics
+import stage_log
+
+# pandas (and regime, which needs it) are imported where used
+
 # ═══════════════════════════════════════════════════════
 # CONFIGURATION
 # ═══════════════════════════════════════════════════════
@@ -27,22 +32,19 @@ LOG_FILE = f"logs/analysis_{datetime.now().strftime('%Y%m%d')}.txt"
 # LOGGING
 # ═══════════════════════════════════════════════════════
 
-def log(message):
-    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    msg = f"[{ts}] {message}"
-    print(msg)
-    with open(LOG_FILE, "a") as f:
-        f.write(msg + "\n")
+log = stage_log.get_logger('analysis', LOG_FILE)
 
 # ═══════════════════════════════════════════════════════
 # LOAD SHORTLIST
 # ═══════════════════════════════════════════════════════
 
+@metrics.timer('analyzer.load_shortlist')
 def load_shortlist():
+    import pandas as pd
+
     today = datetime.now().strftime("%Y%m%d")
-    file = f"{OUTPUT_DIR}shortlist_{today}.csv"
     try:
-        df = pd.read_csv(file)
+        df, _ = columnar.load(f"{OUTPUT_DIR}shortlist_{today}")
         log(f"Loaded {len(df)} stocks from shortlist")
         return df
     except Exception as e:
@@ -54,6 +56,8 @@ def load_shortlist():
 # ═══════════════════════════════════════════════════════
 
 def check_existing_positions():
+    import pandas as pd
+
     try:
         tracker = pd.read_csv(f"{OUTPUT_DIR}trade_tracker.csv")
         return len(tracker[tracker["Status"] == "ACTIVE"])
@@ -106,8 +110,12 @@ def calculate_charges(position_value):
 # GENERATE SIGNALS
 # ═══════════════════════════════════════════════════════
 
-def generate_signals(df):
+@metrics.timer('analyzer.generate_signals')
+def generate_signals(df, market=None):
+    import pandas as pd
+
     signals = []
+    status = market["Status"] if market else "UNKNOWN"
 
     for _, row in df.iterrows():
         qty, position = calculate_position_size(row["Entry"], row["SL"], CAPITAL)
@@ -119,7 +127,7 @@ def generate_signals(df):
         min_target = row["Entry"] * (1 + breakeven_pct / 100 + 0.02)
 
         if row["Target"] < min_target:
-            log(f"SKIP {row['Symbol']}: Target too low after charges")
+            log(f"SKIP {row['Symbol']}: Target too low after charges", level='debug', symbol=row['Symbol'])
             continue
 
         expected_profit = (row["Target"] - row["Entry"]) * qty
@@ -146,7 +154,8 @@ def generate_signals(df):
             "Breakeven": round(min_target, 2),
             "Net_Expectancy_Pct": round(net_expectancy_pct, 2),
             "ATR": atr,
-            "Mode": row.get("Mode", "unknown")
+            "Mode": row.get("Mode", "unknown"),
+            "Regime": status
         }
 
         signals.append(signal)
@@ -170,40 +179,63 @@ def select_top_trades(signals, max_trades):
 # MAIN
 # ═══════════════════════════════════════════════════════
 
-def main():
+def run(df=None, persist=True):
+    """
+    Whole analysis stage
+
+    Args:
+        df: shortlist from the screener; read from today's .cols/.csv if None
+        persist: Write daily_signals_YYYYMMDD.cols/.csv
+
+    Returns:
+        DataFrame: final signals (empty if none)
+    """
+    import pandas as pd
+    import regime
+
     log("=" * 60)
     log("STARTING TRADE ANALYSIS")
     log("=" * 60)
 
-    df = load_shortlist()
+    if df is None:
+        df = load_shortlist()
     if df.empty:
         log("No shortlist available")
-        return
+        return pd.DataFrame()
 
     active = check_existing_positions()
     available = MAX_TRADES - active
 
+    market = regime.latest(log=log)
+    if market:
+        log(f"Market regime: {regime.describe(market)}")
+
     log(f"Active positions: {active}/{MAX_TRADES}")
     log(f"Available slots: {available}")
 
     if available <= 0:
         log("Portfolio full")
-        return
+        return pd.DataFrame()
 
-    signals = generate_signals(df)
+    signals = generate_signals(df, market)
     if signals.empty:
         log("No valid signals after analysis")
-        return
+        return pd.DataFrame()
 
     final_signals = select_top_trades(signals, available)
 
-    today = datetime.now().strftime("%Y%m%d")
-    outfile = f"{OUTPUT_DIR}daily_signals_{today}.csv"
-    final_signals.to_csv(outfile, index=False)
-
     log("=" * 60)
     log(f"ANALYSIS COMPLETE: {len(final_signals)} signals")
-    log(f"Saved to: {outfile}")
+
+    if persist:
+        today = datetime.now().strftime("%Y%m%d")
+        paths = columnar.save(
+            final_signals, f"{OUTPUT_DIR}daily_signals_{today}",
+            fmt=CONFIG.get('handoff_format', 'columnar'),
+            csv=CONFIG.get('handoff_csv', True)
+        )
+        log(f"Saved to: {', '.join(paths)}")
+
     log("=" * 60)
 
     print("\n" + "=" * 90)
@@ -216,5 +248,11 @@ def main():
     )
     print("=" * 90)
 
+    return final_signals
+
+def main():
+    with metrics.session('analysis', log=log):
+        run()
+
 if __name__ == "__main__":
     main()
@@ -4,12 +4,14 @@ Runs: Daily 9:30 AM
 Purpose: Update Google Sheets and send alerts
 """
 
-import pandas as pd
+import csv
 import json
-import requests
 from datetime import datetime
 import os
 
+import metrics
+import stage_log
+
 OUTPUT_DIR = "output/"
 LOG_FILE = f"logs/notification_{datetime.now().strftime('%Y%m%d')}.txt"
 
@@ -17,12 +19,7 @@ LOG_FILE = f"logs/notification_{datetime.now().strftime('%Y%m%d')}.txt"
 # LOGGING
 # ═══════════════════════════════════════════════════════
 
-def log(message):
-    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    msg = f"[{ts}] {message}"
-    print(msg)
-    with open(LOG_FILE, "a") as f:
-        f.write(msg + "\n")
+log = stage_log.get_logger('notification', LOG_FILE)
 
 # ═══════════════════════════════════════════════════════
 # SAFE CREDENTIAL LOADER
@@ -55,15 +52,18 @@ TELEGRAM_CHAT_ID = CREDS.get("telegram_chat_id")
 # TELEGRAM NOTIFICATION
 # ═══════════════════════════════════════════════════════
 
+@metrics.timer('notifier.send_telegram_alert')
 def send_telegram_alert(signals):
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
         log("Telegram not configured – skipping")
         return
 
     try:
+        import requests
+
         message = f"📊 *TRADE SIGNALS – {datetime.now().strftime('%d %b %Y')}*\n\n"
 
-        for _, row in signals.iterrows():
+        for row in signals:
             message += (
                 f"*{row['Stock']}*\n"
                 f"Entry: ₹{row['Entry']}\n"
@@ -93,19 +93,35 @@ def send_telegram_alert(signals):
 # MAIN
 # ═══════════════════════════════════════════════════════
 
-def main():
+def run(signals=None):
+    """Send today's signals; read from today's .csv/.cols if not passed in"""
     log("=" * 60)
     log("STARTING NOTIFICATION")
     log("=" * 60)
 
-    today = datetime.now().strftime("%Y%m%d")
-    file = f"{OUTPUT_DIR}daily_signals_{today}.csv"
-
-    try:
-        signals = pd.read_csv(file)
-        log(f"Loaded {len(signals)} signals")
-    except:
-        log("No signals file found – nothing to notify")
+    if signals is None:
+        today = datetime.now().strftime("%Y%m%d")
+        base = f"{OUTPUT_DIR}daily_signals_{today}"
+
+        # csv / columnar records, not pandas: the notifier's runtime is
+        # mostly imports, and numpy is only loaded without the CSV
+        try:
+            if os.path.exists(base + ".csv"):
+                with open(base + ".csv", newline="") as f:
+                    signals = list(csv.DictReader(f))
+            else:
+                import columnar
+                signals = columnar.records(base + columnar.EXTENSION)
+            log(f"Loaded {len(signals)} signals")
+        except:
+            log("No signals file found – nothing to notify")
+            return
+    else:
+        # DataFrame handed over in-process by the pipeline
+        signals = signals.to_dict("records")
+
+    if not signals:
+        log("No signals today – nothing to notify")
         return
 
     send_telegram_alert(signals)
@@ -114,5 +130,9 @@ def main():
     log("NOTIFICATION COMPLETE")
     log("=" * 60)
 
+def main():
+    with metrics.session('notification', log=log):
+        run()
+
 if __name__ == "__main__":
     main()
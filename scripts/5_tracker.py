@@ -5,29 +5,41 @@ Purpose: Update positions, calculate P&L, check triggers
 """
 
 import pandas as pd
-import yfinance as yf
+import json
 from datetime import datetime
 
+import columnar
+import levels
+import metrics
+import regime
+import stage_log
+from market_data import Fetcher
+
 # ═══════════════════════════════════════════════════════
 # CONFIGURATION
 # ═══════════════════════════════════════════════════════
 
+with open('config/settings.json', 'r') as f:
+    CONFIG = json.load(f)
+
 OUTPUT_DIR = 'output/'
 LOG_FILE = f'logs/tracking_{datetime.now().strftime("%Y%m%d")}.txt'
 
+# Flag an open position this close (%) under its nearest resistance zone
+NEAR_RESISTANCE_PCT = 1.5
+
 
-def log(message):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    msg = f"[{timestamp}] {message}"
-    print(msg)
-    with open(LOG_FILE, 'a') as f:
-        f.write(msg + '\n')
+log = stage_log.get_logger('tracking', LOG_FILE)
+
+
+FETCHER = Fetcher.from_config(CONFIG, log=log)
 
 
 # ═══════════════════════════════════════════════════════
 # LOAD TRACKER (TYPE SAFE)
 # ═══════════════════════════════════════════════════════
 
+@metrics.timer('tracker.load_tracker')
 def load_tracker():
     try:
         df = pd.read_csv(f"{OUTPUT_DIR}trade_tracker.csv")
@@ -60,17 +72,22 @@ def load_tracker():
 # UPDATE CURRENT PRICES
 # ═══════════════════════════════════════════════════════
 
+@metrics.timer('tracker.update_current_prices')
 def update_current_prices(df):
     active_idx = df[df['Status'] == 'ACTIVE'].index
+    symbols = sorted({df.at[idx, 'Stock'] + '.NS' for idx in active_idx})
+
+    prices, errors = FETCHER.map(lambda s: FETCHER.history(s, period='1d'), symbols)
+    metrics.count('tracker.price_fetches', len(symbols))
+    metrics.count('tracker.price_errors', len(errors))
+
+    for symbol, error in errors.items():
+        log(f"Price fetch error {symbol}: {error}")
 
     for idx in active_idx:
-        symbol = df.at[idx, 'Stock'] + '.NS'
-        try:
-            hist = yf.Ticker(symbol).history(period='1d')
-            if not hist.empty:
-                df.at[idx, 'Current'] = round(hist['Close'].iloc[-1], 2)
-        except Exception as e:
-            log(f"Price fetch error {symbol}: {e}")
+        hist = prices.get(df.at[idx, 'Stock'] + '.NS')
+        if hist is not None and not hist.empty:
+            df.at[idx, 'Current'] = round(hist['Close'].iloc[-1], 2)
 
     return df
 
@@ -97,6 +114,7 @@ def calculate_pnl(df):
 # CHECK TRIGGERS
 # ═══════════════════════════════════════════════════════
 
+@metrics.timer('tracker.check_triggers')
 def check_triggers(df):
     actions = []
 
@@ -135,6 +153,16 @@ def check_triggers(df):
                 'Message': f"T1 hit. Book 50%. Trail SL to ₹{trail_sl}"
             })
 
+        # NEAR RESISTANCE (zone from the stored swing pivots)
+        index = levels.load_index(row['Stock'] + '.NS')
+        zone = index.resistance(row['Current']) if index is not None else None
+        if zone is not None and zone['price'] <= row['Current'] * (1 + NEAR_RESISTANCE_PCT / 100):
+            actions.append({
+                'Stock': row['Stock'],
+                'Rule': 'NEAR_RESISTANCE',
+                'Message': f"Resistance zone ₹{zone['price']:.2f} ({zone['touches']} touches) just overhead"
+            })
+
         # MONTH END
         if row['Days_Held'] >= 25:
             actions.append({
@@ -150,12 +178,12 @@ def check_triggers(df):
 # ADD NEW TRADES
 # ═══════════════════════════════════════════════════════
 
-def add_new_trades(tracker):
+def add_new_trades(tracker, signals=None):
     today = datetime.now().strftime('%Y%m%d')
-    file = f"{OUTPUT_DIR}daily_signals_{today}.csv"
 
     try:
-        signals = pd.read_csv(file)
+        if signals is None:
+            signals, _ = columnar.load(f"{OUTPUT_DIR}daily_signals_{today}")
 
         for _, row in signals.iterrows():
             tracker = pd.concat([tracker, pd.DataFrame([{
@@ -200,13 +228,27 @@ def update_days_held(df):
 # MAIN
 # ═══════════════════════════════════════════════════════
 
-def main():
+def run(signals=None):
+    """
+    Whole tracking stage; trade_tracker.csv is state and is always saved
+
+    Args:
+        signals: today's signals from the analyzer; read from today's .cols/.csv if None
+
+    Returns:
+        DataFrame: the updated tracker
+    """
+
     log("=" * 50)
     log("STARTING EOD TRACKING")
     log("=" * 50)
 
+    market = regime.latest(CONFIG, log=log)
+    if market:
+        log(f"Market regime: {regime.describe(market)}")
+
     tracker = load_tracker()
-    tracker = add_new_trades(tracker)
+    tracker = add_new_trades(tracker, signals)
     tracker = update_current_prices(tracker)
     tracker = calculate_pnl(tracker)
     tracker = update_days_held(tracker)
@@ -216,6 +258,10 @@ def main():
     tracker.to_csv(f"{OUTPUT_DIR}trade_tracker.csv", index=False)
     log("Tracker updated and saved")
 
+    summary = FETCHER.cache_summary()
+    if summary:
+        log(summary)
+
     print("\nACTIVE POSITIONS:")
     active = tracker[tracker['Status'] == 'ACTIVE']
     if not active.empty:
@@ -233,6 +279,13 @@ def main():
     log("EOD TRACKING COMPLETE")
     log("=" * 50)
 
+    return tracker
+
+
+def main():
+    with metrics.session('tracking', log=log):
+        run()
+
 
 if __name__ == "__main__":
     main()
@@ -5,23 +5,15 @@ Source of truth: trade_history.csv (CLOSED TRADES ONLY)
 Enhanced with visual graphs and charts - OPTIMIZED VERSION
 """
 
-import pandas as pd
 import json
-import requests
 from datetime import datetime, timedelta
 from pathlib import Path
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import cm
 from textwrap import wrap
-import matplotlib
-
-matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
 import warnings
 
+import metrics
+import stage_log
+
 # Suppress warnings
 warnings.filterwarnings('ignore', category=FutureWarning)
 warnings.filterwarnings('ignore', category=UserWarning)
@@ -39,28 +31,43 @@ Path(REPORT_DIR).mkdir(parents=True, exist_ok=True)
 Path(GRAPH_DIR).mkdir(parents=True, exist_ok=True)
 Path("logs").mkdir(exist_ok=True)
 
-# Set style for all graphs
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (10, 6)
-plt.rcParams['font.size'] = 10
-plt.rcParams['font.family'] = 'DejaVu Sans'  # Better Unicode support
+
+# ─────────────────────────────────────────────
+# PLOTTING (imported on first chart – a run with
+# no closed trades never pays for matplotlib)
+# ─────────────────────────────────────────────
+_PLT = None
+
+
+def pyplot():
+    global _PLT
+    if _PLT is None:
+        import matplotlib
+        matplotlib.use('Agg')  # Non-interactive backend
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        # Set style for all graphs
+        sns.set_style("whitegrid")
+        plt.rcParams['figure.figsize'] = (10, 6)
+        plt.rcParams['font.size'] = 10
+        plt.rcParams['font.family'] = 'DejaVu Sans'  # Better Unicode support
+        _PLT = plt
+    return _PLT
 
 
 # ─────────────────────────────────────────────
 # LOGGING
 # ─────────────────────────────────────────────
-def log(msg):
-    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    line = f"[{ts}] {msg}"
-    print(line)
-    with open(LOG_FILE, "a") as f:
-        f.write(line + "\n")
+log = stage_log.get_logger('reporting', LOG_FILE)
 
 
 # ─────────────────────────────────────────────
 # LOAD TRADE HISTORY
 # ─────────────────────────────────────────────
 def load_trade_history():
+    import pandas as pd  # not needed to import the reporter (e.g. by the pipeline)
+
     try:
         df = pd.read_csv(f"{OUTPUT_DIR}trade_history.csv")
 
@@ -233,9 +240,11 @@ def analyze_by_day(df):
 # GRAPH GENERATION (FIXED RUPEE SYMBOL)
 # ─────────────────────────────────────────────
 
+@metrics.timer('reporter.generate_equity_curve')
 def generate_equity_curve(df):
     """Graph 1: Cumulative P&L over time (Equity Curve)"""
     try:
+        plt = pyplot()
         ts = datetime.now().strftime('%Y%m%d_%H%M%S')
         filepath = f"{GRAPH_DIR}equity_curve_{ts}.png"
 
@@ -275,9 +284,11 @@ def generate_equity_curve(df):
         return None
 
 
+@metrics.timer('reporter.generate_win_loss_distribution')
 def generate_win_loss_distribution(df):
     """Graph 2: Distribution of Wins vs Losses"""
     try:
+        plt = pyplot()
         ts = datetime.now().strftime('%Y%m%d_%H%M%S')
         filepath = f"{GRAPH_DIR}win_loss_dist_{ts}.png"
 
@@ -326,9 +337,11 @@ def generate_win_loss_distribution(df):
         return None
 
 
+@metrics.timer('reporter.generate_sector_performance')
 def generate_sector_performance(sector_stats):
     """Graph 3: Performance by Sector"""
     try:
+        plt = pyplot()
         if sector_stats is None or sector_stats.empty:
             return None
 
@@ -368,9 +381,11 @@ def generate_sector_performance(sector_stats):
         return None
 
 
+@metrics.timer('reporter.generate_day_of_week_analysis')
 def generate_day_of_week_analysis(day_stats):
     """Graph 4: Performance by Day of Week"""
     try:
+        plt = pyplot()
         if day_stats is None or day_stats.empty:
             return None
 
@@ -413,9 +428,11 @@ def generate_day_of_week_analysis(day_stats):
         return None
 
 
+@metrics.timer('reporter.generate_monthly_performance')
 def generate_monthly_performance(df):
     """Graph 5: Month-by-Month Performance - FIXED"""
     try:
+        plt = pyplot()
         ts = datetime.now().strftime('%Y%m%d_%H%M%S')
         filepath = f"{GRAPH_DIR}monthly_performance_{ts}.png"
 
@@ -475,9 +492,13 @@ def generate_monthly_performance(df):
         return None
 
 
+@metrics.timer('reporter.generate_rr_analysis')
 def generate_rr_analysis(df):
     """Graph 6: Risk-Reward Analysis - FIXED"""
+    import pandas as pd
+
     try:
+        plt = pyplot()
         if 'RR' not in df.columns:
             return None
 
@@ -536,9 +557,11 @@ def generate_rr_analysis(df):
         return None
 
 
+@metrics.timer('reporter.generate_drawdown_chart')
 def generate_drawdown_chart(df):
     """Graph 7: Drawdown Chart"""
     try:
+        plt = pyplot()
         ts = datetime.now().strftime('%Y%m%d_%H%M%S')
         filepath = f"{GRAPH_DIR}drawdown_{ts}.png"
 
@@ -666,7 +689,12 @@ def save_report(text_report, metrics):
 # ─────────────────────────────────────────────
 # GENERATE ENHANCED PDF WITH GRAPHS
 # ─────────────────────────────────────────────
+@metrics.timer('reporter.generate_pdf')
 def generate_pdf(text_report, graph_paths):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import cm
+
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     pdf_path = f"{REPORT_DIR}weekly_report_{ts}.pdf"
 
@@ -723,6 +751,8 @@ def send_pdf_to_telegram(pdf_path):
             log("Telegram credentials not configured - skipping")
             return
 
+        import requests
+
         url = f"https://api.telegram.org/bot{token}/sendDocument"
 
         with open(pdf_path, "rb") as pdf:
@@ -746,7 +776,8 @@ def send_pdf_to_telegram(pdf_path):
 # ─────────────────────────────────────────────
 # MAIN
 # ─────────────────────────────────────────────
-def main():
+def run():
+    """Weekly report from trade_history.csv; returns the PDF path or None"""
     log("=" * 80)
     log("STARTING WEEKLY REPORT WITH GRAPHS")
     log("=" * 80)
@@ -805,6 +836,13 @@ def main():
     log(f"Graphs saved: {GRAPH_DIR}")
     log("=" * 80)
 
+    return pdf
+
+
+def main():
+    with metrics.session('reporting', log=log):
+        run()
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -336,6 +336,10 @@ def cleanup_temp_data(older_than_days=30, dry_run=False):
     total_deleted += deleted
     total_space += space
 
+    # raw_data_*.cols are kept: they are the archive the screener replays
+    # (2_screener.py --replay --source archive) and are far smaller than
+    # the CSV copies
+
     # Clean NSE bhav copies
     deleted, space = clean_directory(
         data_dir,
@@ -384,6 +388,16 @@ def cleanup_temp_output(older_than_days=7, dry_run=False):
     total_deleted += deleted
     total_space += space
 
+    deleted, space = clean_directory(
+        output_dir,
+        'daily_signals_*.cols',
+        older_than_days=older_than_days,
+        preserve_latest=False,
+        dry_run=dry_run
+    )
+    total_deleted += deleted
+    total_space += space
+
     # Clean shortlists
     deleted, space = clean_directory(
         output_dir,
@@ -395,6 +409,16 @@ def cleanup_temp_output(older_than_days=7, dry_run=False):
     total_deleted += deleted
     total_space += space
 
+    deleted, space = clean_directory(
+        output_dir,
+        'shortlist_*.cols',
+        older_than_days=older_than_days,
+        preserve_latest=False,
+        dry_run=dry_run
+    )
+    total_deleted += deleted
+    total_space += space
+
     # Clean template files
     deleted, space = clean_directory(
         output_dir,
@@ -0,0 +1,308 @@
+"""
+BAR STORE: LOCAL OHLCV HISTORY
+Purpose: Persist daily bars per symbol so each run only fetches the delta
+Layout: data/bars/<SYMBOL>.npy (structured NumPy array, memory-mapped reads)
+"""
+
+import os
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+
+import stage_log
+
+STORE_DIR = 'data/bars/'
+
+BAR_DTYPE = np.dtype([
+    ('date', 'datetime64[D]'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8')
+])
+
+FRAME_COLUMNS = {
+    'open': 'Open',
+    'high': 'High',
+    'low': 'Low',
+    'close': 'Close',
+    'volume': 'Volume'
+}
+
+# Close drift on the overlapping bar that means Yahoo re-adjusted history
+ADJUSTMENT_TOLERANCE = 0.005
+
+
+# ═══════════════════════════════════════════════════════
+# PATHS & CONVERSION
+# ═══════════════════════════════════════════════════════
+
+def symbol_path(symbol, store_dir=STORE_DIR):
+    """File for a symbol ('^NSEI' -> '_NSEI.npy')"""
+    name = symbol.replace('^', '_').replace('/', '_')
+    return os.path.join(store_dir, f"{name}.npy")
+
+
+def frame_to_bars(frame):
+    """yfinance OHLCV frame -> sorted structured array"""
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+
+    bars = np.empty(len(frame), dtype=BAR_DTYPE)
+    bars['date'] = index.values.astype('datetime64[D]')
+    for field, column in FRAME_COLUMNS.items():
+        bars[field] = frame[column].to_numpy(dtype='f8')
+
+    bars = bars[~np.isnan(bars['close'])]
+    return bars[np.argsort(bars['date'], kind='stable')]
+
+
+def bars_to_frame(bars):
+    """Structured array -> OHLCV frame indexed by Date"""
+    data = {column: np.asarray(bars[field]) for field, column in FRAME_COLUMNS.items()}
+    index = pd.DatetimeIndex(np.asarray(bars['date']).astype('datetime64[ns]'), name='Date')
+    return pd.DataFrame(data, index=index)
+
+
+def merge_bars(old, new):
+    """Union by date; bars in `new` replace stored bars for the same date"""
+    if old is None or len(old) == 0:
+        return new
+    if new is None or len(new) == 0:
+        return old
+
+    combined = np.concatenate([old, new])[::-1]
+    _, first = np.unique(combined['date'], return_index=True)
+    return combined[first]
+
+
+# ═══════════════════════════════════════════════════════
+# READ / WRITE
+# ═══════════════════════════════════════════════════════
+
+def load_bars(symbol, store_dir=STORE_DIR, mmap=True):
+    """Stored bars for a symbol, or None if not in the store"""
+    path = symbol_path(symbol, store_dir)
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+
+def load_frame(symbol, store_dir=STORE_DIR, since=None):
+    """Stored bars as an OHLCV frame, optionally only dates >= since"""
+    bars = load_bars(symbol, store_dir)
+    if bars is None or len(bars) == 0:
+        return pd.DataFrame(columns=list(FRAME_COLUMNS.values()))
+
+    if since is not None:
+        cut = np.searchsorted(bars['date'], np.datetime64(pd.Timestamp(since).date(), 'D'))
+        bars = bars[cut:]
+
+    return bars_to_frame(bars)
+
+
+def load_panel(symbols, store_dir=STORE_DIR, since=None):
+    """
+    Stored bars for many symbols as a (dates x symbols) panel
+
+    Returns:
+        dict in indicators.build_panel() layout; symbols with no stored
+        bars are left out
+    """
+
+    cut = None
+    if since is not None:
+        cut = np.datetime64(pd.Timestamp(since).date(), 'D')
+
+    loaded = {}
+    for symbol in symbols:
+        bars = load_bars(symbol, store_dir)
+        if bars is None or len(bars) == 0:
+            continue
+        if cut is not None:
+            bars = bars[np.searchsorted(bars['date'], cut):]
+        if len(bars):
+            loaded[symbol] = bars
+
+    names = list(loaded)
+    if names:
+        dates = np.unique(np.concatenate([loaded[s]['date'] for s in names]))
+    else:
+        dates = np.array([], dtype='datetime64[D]')
+
+    panel = {'symbols': names, 'dates': dates}
+    for field in FRAME_COLUMNS:
+        panel[field] = np.full((len(dates), len(names)), np.nan)
+
+    for j, symbol in enumerate(names):
+        bars = loaded[symbol]
+        rows = np.searchsorted(dates, bars['date'])
+        for field in FRAME_COLUMNS:
+            panel[field][rows, j] = bars[field]
+
+    return panel
+
+
+def last_date(symbol, store_dir=STORE_DIR):
+    """Date of the latest stored bar, or None"""
+    bars = load_bars(symbol, store_dir)
+    if bars is None or len(bars) == 0:
+        return None
+    return pd.Timestamp(bars['date'][-1])
+
+
+def write_bars(symbol, bars, store_dir=STORE_DIR):
+    """Atomically replace a symbol's file"""
+    os.makedirs(store_dir, exist_ok=True)
+    path = symbol_path(symbol, store_dir)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, np.ascontiguousarray(bars, dtype=BAR_DTYPE))
+    os.replace(tmp, path)
+
+
+def append_frame(symbol, frame, store_dir=STORE_DIR):
+    """Merge freshly fetched bars into the store, returns total bar count"""
+    new = frame_to_bars(frame)
+    old = load_bars(symbol, store_dir, mmap=False)
+    merged = merge_bars(old, new)
+    write_bars(symbol, merged, store_dir)
+    return len(merged)
+
+
+# ═══════════════════════════════════════════════════════
+# GAPS
+# ═══════════════════════════════════════════════════════
+
+def find_gaps(symbol, calendar, store_dir=STORE_DIR):
+    """
+    Trading dates missing from a symbol's bars
+
+    Args:
+        symbol: Yahoo symbol
+        calendar: Reference trading dates (e.g. the ^NSEI bars)
+
+    Returns:
+        list of pd.Timestamp inside the stored date range with no bar
+    """
+
+    bars = load_bars(symbol, store_dir)
+    if bars is None or len(bars) == 0:
+        return []
+
+    calendar = np.asarray(calendar, dtype='datetime64[D]')
+    dates = bars['date']
+    inside = calendar[(calendar >= dates[0]) & (calendar <= dates[-1])]
+    missing = np.setdiff1d(inside, dates, assume_unique=True)
+    return [pd.Timestamp(d) for d in missing]
+
+
+# ═══════════════════════════════════════════════════════
+# SYNC (FETCH ONLY WHAT IS MISSING)
+# ═══════════════════════════════════════════════════════
+
+def _adjusted(old_bars, frame):
+    """True if the re-fetched overlap bar no longer matches what we stored"""
+    new = frame_to_bars(frame)
+    if len(new) == 0:
+        return False
+
+    last = old_bars[-1]
+    overlap = new[new['date'] == last['date']]
+    if len(overlap) == 0 or last['close'] == 0:
+        return False
+
+    return abs(overlap['close'][0] / last['close'] - 1) > ADJUSTMENT_TOLERANCE
+
+
+def sync(symbols, fetcher, backfill_period='2y', full=False,
+         store_dir=STORE_DIR, log=print):
+    """
+    Bring the store up to date for a list of symbols through a
+    market_data.Fetcher
+
+    Symbols already in the store are fetched from their last stored date
+    (inclusive, so the overlap bar doubles as an adjustment check). New
+    symbols, symbols whose history was re-adjusted by a split/dividend and
+    everything when full=True are re-downloaded over backfill_period.
+
+    Returns:
+        dict: counts of 'delta', 'backfilled', 'failed' symbols
+    """
+
+    stats = {'delta': 0, 'backfilled': 0, 'failed': []}
+
+    backfill = []
+    by_start = defaultdict(list)
+
+    for symbol in symbols:
+        last = None if full else last_date(symbol, store_dir)
+        if last is None:
+            backfill.append(symbol)
+        else:
+            by_start[last].append(symbol)
+
+    for start, group in sorted(by_start.items()):
+        log(f"Bar store: delta for {len(group)} symbols since {start.date()}")
+        frames, _ = fetcher.fetch(group, start=start.strftime('%Y-%m-%d'), delta=True)
+
+        for symbol in group:
+            frame = frames.get(symbol)
+            if frame is None:
+                # No new bars is normal on holidays; keep what we have
+                continue
+
+            if _adjusted(load_bars(symbol, store_dir), frame):
+                stage_log.debug_of(log)(f"  {symbol}: history re-adjusted, scheduling backfill",
+                                        symbol=symbol)
+                backfill.append(symbol)
+                continue
+
+            append_frame(symbol, frame, store_dir)
+            stats['delta'] += 1
+
+    if backfill:
+        log(f"Bar store: backfilling {len(backfill)} symbols ({backfill_period})")
+        frames, _ = fetcher.fetch(backfill, period=backfill_period)
+
+        for symbol in backfill:
+            frame = frames.get(symbol)
+            if frame is None:
+                stats['failed'].append(symbol)
+                continue
+
+            write_bars(symbol, frame_to_bars(frame), store_dir)
+            stats['backfilled'] += 1
+
+    return stats
+
+
+def repair(symbols, calendar, fetcher, store_dir=STORE_DIR, log=print):
+    """Re-fetch the date span covering each symbol's gaps and merge it in"""
+
+    spans = {}
+    for symbol in symbols:
+        gaps = find_gaps(symbol, calendar, store_dir)
+        if gaps:
+            spans[symbol] = (gaps[0], gaps[-1])
+
+    if not spans:
+        log("Bar store: no gaps found")
+        return 0
+
+    log(f"Bar store: repairing gaps in {len(spans)} symbols")
+
+    repaired = 0
+    for symbol, (first, last) in spans.items():
+        frames, _ = fetcher.fetch(
+            [symbol],
+            start=first.strftime('%Y-%m-%d'),
+            end=(last + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        )
+        if symbol in frames:
+            append_frame(symbol, frames[symbol], store_dir)
+            repaired += 1
+
+    return repaired
@@ -0,0 +1,172 @@
+"""
+MARKET BREADTH
+Purpose: Daily participation stats across the whole watchlist from the
+         dates x symbols panel, kept as a growing time series
+Output:  data/breadth_history.csv (one row per trading date)
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+import indicators
+
+HISTORY_FILE = 'data/breadth_history.csv'
+
+# Daily counts: additive across symbols, so they can be recomputed for any
+# date range and merged into the stored history
+COUNT_COLUMNS = [
+    'Stocks', 'Above_MA50', 'Has_MA50', 'Above_MA200', 'Has_MA200',
+    'Advances', 'Declines', 'Unchanged', 'New_Highs_20D', 'New_Lows_20D'
+]
+
+# Bars of history a date needs before its counts are final (MA200)
+WARMUP_BARS = 200
+
+MCCLELLAN_FAST = 19
+MCCLELLAN_SLOW = 39
+
+
+# ═══════════════════════════════════════════════════════
+# DAILY COUNTS
+# ═══════════════════════════════════════════════════════
+
+def counts(panel):
+    """
+    Per-date breadth counts over every symbol in the panel
+
+    Returns:
+        DataFrame indexed by Date with COUNT_COLUMNS
+    """
+
+    close, high, low = panel['close'], panel['high'], panel['low']
+    live = ~np.isnan(close)
+
+    # Windows run over each symbol's own bars, then map back to the panel
+    index = indicators.bar_index(live)
+    bars_close, bars_high, bars_low = (indicators.pack(x, index) for x in (close, high, low))
+
+    ma50, ma200, change, prior_high, prior_low = (indicators.unpack(x, index) for x in (
+        indicators.rolling_mean(bars_close, 50),
+        indicators.rolling_mean(bars_close, 200),
+        bars_close - indicators.shift(bars_close),
+        indicators.shift(indicators.rolling_max(bars_high, 20)),
+        indicators.shift(indicators.rolling_min(bars_low, 20))
+    ))
+
+    with np.errstate(invalid='ignore'):
+        table = {
+            'Stocks': live.sum(axis=1),
+            'Above_MA50': (close > ma50).sum(axis=1),
+            'Has_MA50': (live & ~np.isnan(ma50)).sum(axis=1),
+            'Above_MA200': (close > ma200).sum(axis=1),
+            'Has_MA200': (live & ~np.isnan(ma200)).sum(axis=1),
+            'Advances': (change > 0).sum(axis=1),
+            'Declines': (change < 0).sum(axis=1),
+            'Unchanged': (change == 0).sum(axis=1),
+            'New_Highs_20D': (high > prior_high).sum(axis=1),
+            'New_Lows_20D': (low < prior_low).sum(axis=1)
+        }
+
+    index = pd.DatetimeIndex(panel['dates'].astype('datetime64[ns]'), name='Date')
+    return pd.DataFrame(table, index=index)[COUNT_COLUMNS]
+
+
+# ═══════════════════════════════════════════════════════
+# DERIVED SERIES
+# ═══════════════════════════════════════════════════════
+
+def derive(table):
+    """
+    Percentages, A/D line and McClellan oscillator from the daily counts
+
+    Cumulative series run over the whole stored history, so they stay
+    continuous however the counts were merged.
+    """
+
+    df = table[COUNT_COLUMNS].copy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['Pct_Above_MA50'] = (100 * df['Above_MA50'] / df['Has_MA50']).round(2)
+        df['Pct_Above_MA200'] = (100 * df['Above_MA200'] / df['Has_MA200']).round(2)
+
+    net = df['Advances'] - df['Declines']
+    df['AD_Line'] = net.cumsum()
+
+    # Ratio-adjusted net advances keep the oscillator comparable as the
+    # watchlist grows or shrinks
+    traded = (df['Advances'] + df['Declines']).replace(0, np.nan)
+    ratio = (1000 * net / traded).fillna(0)
+    fast = ratio.ewm(span=MCCLELLAN_FAST, adjust=False).mean()
+    slow = ratio.ewm(span=MCCLELLAN_SLOW, adjust=False).mean()
+    df['McClellan'] = (fast - slow).round(2)
+    df['McClellan_Sum'] = df['McClellan'].cumsum().round(2)
+
+    df['Net_New_Highs'] = df['New_Highs_20D'] - df['New_Lows_20D']
+    return df
+
+
+# ═══════════════════════════════════════════════════════
+# HISTORY
+# ═══════════════════════════════════════════════════════
+
+def load_history(path=HISTORY_FILE):
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=COUNT_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+    return pd.read_csv(path, index_col='Date', parse_dates=['Date'])
+
+
+def save_history(df, path=HISTORY_FILE):
+    tmp = path + '.tmp'
+    df.to_csv(tmp, date_format='%Y-%m-%d')
+    os.replace(tmp, path)
+
+
+def since_for_update(history, bars=WARMUP_BARS):
+    """
+    First date to load bars from so recomputed counts are final
+
+    None (everything) on the first run; otherwise far enough before the
+    last stored date to warm up MA200 (~1.5 calendar days per bar).
+    """
+
+    if history.empty:
+        return None
+    return history.index[-1] - pd.Timedelta(days=int(bars * 1.5) + 10)
+
+
+def update(panel, path=HISTORY_FILE, log=print):
+    """
+    Fold a panel's counts into the stored history
+
+    Only dates whose MA200 window fits inside the panel (or that are new)
+    replace stored rows; earlier rows of a short panel are warm-up only.
+
+    Returns:
+        DataFrame: full derived breadth history
+    """
+
+    history = load_history(path)
+    fresh = counts(panel)
+
+    if not history.empty:
+        settled = fresh.index[min(WARMUP_BARS, len(fresh)):]
+        newer = fresh.index[fresh.index > history.index[-1]]
+        fresh = fresh.loc[settled.union(newer)]
+
+    merged = pd.concat([history[COUNT_COLUMNS].astype(int), fresh.astype(int)])
+    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+
+    df = derive(merged)
+    save_history(df, path)
+    log(f"Breadth: {len(fresh)} dates updated, {len(df)} in history")
+    return df
+
+
+def latest(path=HISTORY_FILE):
+    """Most recent breadth row as a dict, or None"""
+    history = load_history(path)
+    if history.empty:
+        return None
+    row = history.iloc[-1]
+    return {'Date': history.index[-1].strftime('%Y-%m-%d'), **row.to_dict()}
@@ -0,0 +1,100 @@
+"""
+CHECKPOINTS: PER-SYMBOL STATE BETWEEN RUNS
+Purpose: Save/load streaming indicator state as compact .npz files
+Layout: data/state/<name>.npz with 'symbols', 'last_date' and state arrays
+"""
+
+import os
+import numpy as np
+
+STATE_DIR = 'data/state/'
+
+
+def checkpoint_path(name, state_dir=STATE_DIR):
+    return os.path.join(state_dir, f"{name}.npz")
+
+
+def save(name, symbols, last_date, arrays, state_dir=STATE_DIR):
+    """
+    Atomically write a checkpoint
+
+    Args:
+        name: Checkpoint name ('indicators' -> data/state/indicators.npz)
+        symbols: N symbols, column order of every array
+        last_date: (N,) datetime64[D] of the last bar folded into the state
+        arrays: {key: array with leading dimension N (or trailing for rings)}
+    """
+
+    os.makedirs(state_dir, exist_ok=True)
+    path = checkpoint_path(name, state_dir)
+    tmp = path + '.tmp'
+
+    with open(tmp, 'wb') as f:
+        np.savez_compressed(
+            f,
+            symbols=np.asarray(symbols, dtype=str),
+            last_date=np.asarray(last_date, dtype='datetime64[D]'),
+            **arrays
+        )
+    os.replace(tmp, path)
+
+
+def update(name, symbols, last_date, arrays, state_dir=STATE_DIR):
+    """
+    save() that keeps checkpointed symbols outside `symbols`, so a run over
+    part of the universe does not forget the rest
+
+    Every array must carry the symbol axis last.
+    """
+
+    saved = load(name, state_dir)
+    if saved is not None:
+        old_symbols, old_dates, old_arrays = saved
+        fresh = set(symbols)
+        keep = [j for j, s in enumerate(old_symbols) if s not in fresh]
+        compatible = set(old_arrays) == set(arrays) and all(
+            old_arrays[k].shape[:-1] == np.shape(v)[:-1] for k, v in arrays.items()
+        )
+
+        if keep and compatible:
+            symbols = list(symbols) + [old_symbols[j] for j in keep]
+            last_date = np.concatenate([np.asarray(last_date, dtype='datetime64[D]'),
+                                        old_dates[keep]])
+            arrays = {k: np.concatenate([v, old_arrays[k][..., keep]], axis=-1)
+                      for k, v in arrays.items()}
+
+    save(name, symbols, last_date, arrays, state_dir)
+
+
+def load(name, state_dir=STATE_DIR):
+    """
+    Read a checkpoint
+
+    Returns:
+        tuple: (symbols list, last_date array, {key: array}) or None
+    """
+
+    path = checkpoint_path(name, state_dir)
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path) as data:
+        symbols = data['symbols'].tolist()
+        last_date = data['last_date']
+        arrays = {k: data[k] for k in data.files if k not in ('symbols', 'last_date')}
+
+    return symbols, last_date, arrays
+
+
+def align(saved_symbols, symbols):
+    """
+    Map checkpoint columns onto the current symbol order
+
+    Returns:
+        tuple: (positions in the current order, matching checkpoint columns)
+    """
+
+    where = {s: i for i, s in enumerate(saved_symbols)}
+    current = [j for j, s in enumerate(symbols) if s in where]
+    saved = [where[symbols[j]] for j in current]
+    return np.array(current, dtype=int), np.array(saved, dtype=int)
@@ -0,0 +1,224 @@
+"""
+COLUMNAR HAND-OFF FILES
+Purpose: Typed, memory-mapped stage outputs (raw_data, shortlist,
+         daily_signals) so the next stage reads arrays instead of
+         re-parsing and re-inferring CSV text
+Format:  <name>.cols, one file:
+           magic | header length | JSON header | column buffers (64B aligned)
+         The header is the schema: row count and each column's name, NumPy
+         dtype, offset and size; text columns are fixed-width unicode with
+         an optional null mask. CSV stays as a side output for humans.
+"""
+
+import os
+import json
+import numpy as np
+
+MAGIC = b'NPCOLS1\n'
+ALIGN = 64
+EXTENSION = '.cols'
+
+
+# ═══════════════════════════════════════════════════════
+# WRITE
+# ═══════════════════════════════════════════════════════
+
+def column_array(series):
+    """
+    A Series as (fixed-dtype array, null mask or None)
+
+    Numbers, bools and datetimes keep their dtype; everything else is
+    stored as text, with missing values recorded in the mask.
+    """
+
+    kind = series.dtype.kind
+    if kind == 'b':
+        return series.to_numpy(dtype=bool), None
+    if kind in 'iu':
+        return series.to_numpy(dtype=np.int64), None
+    if kind == 'f':
+        return series.to_numpy(dtype=np.float64), None
+    if kind == 'M':
+        return series.to_numpy(dtype='datetime64[ns]'), None
+
+    nulls = series.isna().to_numpy()
+    text = series.where(~nulls, '').astype(str).to_numpy(dtype=str)
+    if len(text) == 0:
+        text = text.astype('<U1')
+    return text, (nulls if nulls.any() else None)
+
+
+def _pad(offset):
+    return -offset % ALIGN
+
+
+def write(df, path):
+    """Write a DataFrame to a .cols file (atomically)"""
+
+    buffers, columns = [], []
+    offset = 0
+
+    for name in df.columns:
+        values, nulls = column_array(df[name])
+        spec = {'name': str(name), 'dtype': values.dtype.str}
+        for key, arr in (('data', values), ('nulls', nulls)):
+            if arr is None:
+                continue
+            raw = np.ascontiguousarray(arr).tobytes()
+            spec[key] = [offset, len(raw)]
+            buffers.append(raw + b'\0' * _pad(len(raw)))
+            offset += len(raw) + _pad(len(raw))
+        columns.append(spec)
+
+    header = json.dumps({'rows': len(df), 'columns': columns}).encode()
+    # Body starts aligned so every column view is aligned too
+    prefix = len(MAGIC) + 8 + len(header)
+    header += b' ' * _pad(prefix)
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for raw in buffers:
+            f.write(raw)
+    os.replace(tmp, path)
+
+
+# ═══════════════════════════════════════════════════════
+# READ
+# ═══════════════════════════════════════════════════════
+
+def read_header(path):
+    """(schema dict, byte offset where column data starts)"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a columnar file")
+        size = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(size))
+    return header, len(MAGIC) + 8 + size
+
+
+def schema(path):
+    """[(column, dtype string), ...] without touching the data"""
+    header, _ = read_header(path)
+    return [(c['name'], c['dtype']) for c in header['columns']]
+
+
+def read_arrays(path, columns=None):
+    """
+    {column: read-only array view over the mapped file}
+
+    Only the requested columns are paged in. Text columns come back as
+    (values, null mask or None) pairs.
+    """
+
+    header, body = read_header(path)
+    specs = {c['name']: c for c in header['columns']}
+
+    wanted = list(specs) if columns is None else list(columns)
+    missing = [c for c in wanted if c not in specs]
+    if missing:
+        raise ValueError(f"{path} has no column(s): {', '.join(missing)}")
+
+    rows = header['rows']
+    if rows == 0 or os.path.getsize(path) == body:
+        mapped = np.zeros(0, dtype=np.uint8)
+    else:
+        mapped = np.memmap(path, dtype=np.uint8, mode='r')
+
+    def view(span, dtype):
+        if span is None or rows == 0:
+            return np.zeros(0, dtype=dtype)
+        start, size = span
+        return mapped[body + start:body + start + size].view(dtype)
+
+    arrays = {}
+    for name in wanted:
+        spec = specs[name]
+        dtype = np.dtype(spec['dtype'])
+        values = view(spec.get('data'), dtype)
+        if dtype.kind == 'U':
+            nulls = view(spec['nulls'], bool) if 'nulls' in spec else None
+            arrays[name] = (values, nulls)
+        else:
+            arrays[name] = values
+    return arrays
+
+
+def read(path, columns=None):
+    """A .cols file as a DataFrame with the dtypes it was written with"""
+    import pandas as pd
+
+    data = {}
+    for name, arr in read_arrays(path, columns).items():
+        if isinstance(arr, tuple):
+            values, nulls = arr
+            arr = values.astype(object)
+            if nulls is not None:
+                arr[nulls] = np.nan
+        data[name] = arr
+    return pd.DataFrame(data)
+
+
+def records(path):
+    """Rows as dicts of plain Python values (no pandas needed)"""
+    arrays = read_arrays(path)
+    columns = {}
+    for name, arr in arrays.items():
+        if isinstance(arr, tuple):
+            values, nulls = arr
+            col = values.tolist()
+            if nulls is not None:
+                col = [None if n else v for v, n in zip(col, nulls.tolist())]
+            columns[name] = col
+        elif arr.dtype.kind == 'M':
+            columns[name] = arr.astype('datetime64[us]').tolist()
+        else:
+            columns[name] = arr.tolist()
+
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+# ═══════════════════════════════════════════════════════
+# STAGE HAND-OFF
+# ═══════════════════════════════════════════════════════
+
+def save(df, base, fmt='columnar', csv=True):
+    """
+    Write <base>.cols and/or <base>.csv
+
+    fmt='csv' is the old CSV-only hand-off; otherwise CSV is written only
+    as a side output when csv=True.
+
+    Returns:
+        list: paths written
+    """
+
+    paths = []
+    if fmt != 'csv':
+        write(df, base + EXTENSION)
+        paths.append(base + EXTENSION)
+    if fmt == 'csv' or csv:
+        df.to_csv(base + '.csv', index=False)
+        paths.append(base + '.csv')
+    return paths
+
+
+def load(base):
+    """
+    <base>.cols, else <base>.csv
+
+    Returns:
+        tuple: (DataFrame, path read)
+
+    Raises:
+        FileNotFoundError: neither exists
+    """
+
+    if os.path.exists(base + EXTENSION):
+        return read(base + EXTENSION), base + EXTENSION
+
+    import pandas as pd
+    return pd.read_csv(base + '.csv'), base + '.csv'
@@ -0,0 +1,246 @@
+"""
+DELIVERY DATA: NSE BHAV COPY INGESTION
+Purpose: Parse security-wise delivery files dropped on disk and keep a
+         compact multi-day delivery % history per symbol
+Input:   data/nse_bhav_copy_*.csv|zip or NSE's sec_bhavdata_full_*.csv|zip
+Output:  data/delivery_history.npz (dates x symbols float32 matrix)
+"""
+
+import os
+import io
+import csv
+import glob
+import zipfile
+import warnings
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+DROP_DIR = 'data/'
+HISTORY_FILE = 'data/delivery_history.npz'
+FILE_PATTERNS = ('nse_bhav_copy_*.csv', 'nse_bhav_copy_*.zip',
+                 'sec_bhavdata_full_*.csv', 'sec_bhavdata_full_*.zip')
+
+DATE_FORMATS = ('%d-%b-%Y', '%d-%m-%Y', '%Y-%m-%d', '%d%b%Y')
+
+
+# ═══════════════════════════════════════════════════════
+# PARSING
+# ═══════════════════════════════════════════════════════
+
+def _open_text(path):
+    """Text stream over a .csv, or the first .csv inside a .zip"""
+    if path.lower().endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            member = next(n for n in archive.namelist() if n.lower().endswith('.csv'))
+            text = archive.read(member).decode('utf-8')
+        return io.StringIO(text, newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def _number(text):
+    text = text.strip()
+    if not text or text == '-':
+        return np.nan
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def _date(text):
+    text = text.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_bhav(path, series=('EQ',)):
+    """
+    Stream one security-wise delivery file
+
+    Args:
+        path: .csv or zipped .csv in NSE sec_bhavdata_full layout
+        series: SERIES values to keep
+
+    Returns:
+        tuple: (trade date, {symbol: delivery %}); date is None if the
+        file has no parseable rows
+    """
+
+    keep = set(series)
+    pct = {}
+    trade_date = None
+
+    with _open_text(path) as f:
+        reader = csv.reader(f)
+        header = [h.strip().upper() for h in next(reader)]
+        col = {name: i for i, name in enumerate(header)}
+
+        i_symbol, i_series = col['SYMBOL'], col['SERIES']
+        i_date = col.get('DATE1')
+        i_qty, i_deliv = col.get('TTL_TRD_QNTY'), col.get('DELIV_QTY')
+        i_pct = col.get('DELIV_PER')
+
+        for row in reader:
+            if len(row) < len(header) or row[i_series].strip() not in keep:
+                continue
+
+            if trade_date is None and i_date is not None:
+                trade_date = _date(row[i_date])
+
+            value = _number(row[i_pct]) if i_pct is not None else np.nan
+            if np.isnan(value) and i_qty is not None and i_deliv is not None:
+                traded = _number(row[i_qty])
+                if traded:
+                    value = 100 * _number(row[i_deliv]) / traded
+
+            pct[row[i_symbol].strip()] = value
+
+    return trade_date, pct
+
+
+# ═══════════════════════════════════════════════════════
+# HISTORY
+# ═══════════════════════════════════════════════════════
+
+def load_history(path=HISTORY_FILE):
+    """
+    Returns:
+        dict: 'dates' (D,), 'symbols' (S,), 'pct' (D x S float32),
+        'sources' (ingested file names)
+    """
+
+    if not os.path.exists(path):
+        return {
+            'dates': np.array([], dtype='datetime64[D]'),
+            'symbols': np.array([], dtype=str),
+            'pct': np.empty((0, 0), dtype=np.float32),
+            'sources': np.array([], dtype=str)
+        }
+
+    with np.load(path) as data:
+        return {k: data[k] for k in ('dates', 'symbols', 'pct', 'sources')}
+
+
+def save_history(history, path=HISTORY_FILE):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez_compressed(f, **history)
+    os.replace(tmp, path)
+
+
+def add_day(history, trade_date, pct, source, max_days=60):
+    """Insert/replace one day's delivery % and trim to the last max_days"""
+
+    symbols = list(history['symbols'])
+    where = {s: i for i, s in enumerate(symbols)}
+    new = [s for s in pct if s not in where]
+    for s in new:
+        where[s] = len(symbols)
+        symbols.append(s)
+
+    matrix = history['pct']
+    if new:
+        matrix = np.hstack([matrix, np.full((len(matrix), len(new)), np.nan, dtype=np.float32)])
+
+    row = np.full(len(symbols), np.nan, dtype=np.float32)
+    row[[where[s] for s in pct]] = list(pct.values())
+
+    day = np.datetime64(trade_date, 'D')
+    dates = history['dates']
+    existing = np.flatnonzero(dates == day)
+    if len(existing):
+        matrix[existing[0]] = row
+    else:
+        dates = np.append(dates, day)
+        matrix = np.vstack([matrix, row[None, :]])
+        order = np.argsort(dates, kind='stable')
+        dates, matrix = dates[order], matrix[order]
+
+    return {
+        'dates': dates[-max_days:],
+        'symbols': np.array(symbols, dtype=str),
+        'pct': matrix[-max_days:],
+        'sources': np.append(history['sources'], source)
+    }
+
+
+def ingest(drop_dir=DROP_DIR, path=HISTORY_FILE, max_days=60, log=print):
+    """
+    Fold every not-yet-ingested bhav file in drop_dir into the history
+
+    Returns:
+        dict: the updated history
+    """
+
+    history = load_history(path)
+
+    files = sorted({f for pattern in FILE_PATTERNS
+                    for f in glob.glob(os.path.join(drop_dir, pattern))})
+    names = {os.path.basename(f) for f in files}
+
+    # Remember exactly the files still on disk: a file outside the
+    # max_days window is never re-ingested, and deleted ones are forgotten
+    sources = history['sources']
+    on_disk = np.isin(sources, list(names))
+    history['sources'] = sources[on_disk]
+    seen = set(history['sources'].tolist())
+    added = 0
+
+    for file in files:
+        name = os.path.basename(file)
+        if name in seen:
+            continue
+
+        try:
+            trade_date, pct = parse_bhav(file)
+        except Exception as e:
+            log(f"  ERROR parsing {name}: {e}")
+            continue
+
+        if trade_date is None or not pct:
+            log(f"  WARNING: No EQ rows in {name}")
+            continue
+
+        history = add_day(history, trade_date, pct, name, max_days)
+        added += 1
+        log(f"  Ingested {name}: {len(pct)} symbols for {trade_date}")
+
+    if added or not on_disk.all():
+        save_history(history, path)
+
+    return history
+
+
+def delivery_table(history, short=5, long=20):
+    """
+    Latest delivery % per symbol plus short/long averages for trend filters
+
+    Returns:
+        DataFrame: Symbol, Delivery_Date, Delivery_Pct, Delivery_Pct_5D,
+        Delivery_Pct_20D
+    """
+
+    columns = ['Symbol', 'Delivery_Date', 'Delivery_Pct',
+               f'Delivery_Pct_{short}D', f'Delivery_Pct_{long}D']
+    matrix = history['pct']
+    if matrix.size == 0:
+        return pd.DataFrame(columns=columns)
+
+    with warnings.catch_warnings():
+        # All-NaN columns (symbols missing lately) are expected
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        short_avg = np.nanmean(matrix[-short:], axis=0)
+        long_avg = np.nanmean(matrix[-long:], axis=0)
+
+    return pd.DataFrame({
+        'Symbol': history['symbols'],
+        'Delivery_Date': pd.Timestamp(history['dates'][-1]).strftime('%Y-%m-%d'),
+        'Delivery_Pct': np.round(matrix[-1].astype(float), 2),
+        columns[3]: np.round(short_avg.astype(float), 2),
+        columns[4]: np.round(long_avg.astype(float), 2)
+    })[columns]
@@ -0,0 +1,599 @@
+"""
+INDICATOR ENGINE
+Purpose: Compute indicators for the whole universe in one vectorized pass
+Layout: a panel is a dict of (dates x symbols) float arrays
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+PANEL_FIELDS = {
+    'open': 'Open',
+    'high': 'High',
+    'low': 'Low',
+    'close': 'Close',
+    'volume': 'Volume'
+}
+
+RAW_DATA_COLUMNS = [
+    'Symbol', 'Date', 'Close', 'Open', 'High', 'Low', 'Volume',
+    'MA20', 'MA50', 'MA200', 'RSI', 'ADX', 'Plus_DI', 'Minus_DI', 'ATR',
+    'Vol_20D_Avg', 'Vol_5D_Avg', 'High_20D', 'Support', 'Resistance'
+]
+
+INT_COLUMNS = {'Volume', 'Vol_20D_Avg', 'Vol_5D_Avg'}
+
+# Fewer bars than this and High_20D (the bar 20 sessions back) is undefined
+MIN_BARS = 21
+
+
+# ═══════════════════════════════════════════════════════
+# PANEL CONSTRUCTION
+# ═══════════════════════════════════════════════════════
+
+def build_panel(histories):
+    """
+    Align per-symbol OHLCV frames on the union of their dates
+
+    Args:
+        histories: {symbol: DataFrame with Open/High/Low/Close/Volume}
+
+    Returns:
+        dict: 'symbols' (list), 'dates' (datetime64[D], T) and one
+        (T x N) float array per OHLCV field, NaN where a symbol has no bar
+    """
+
+    symbols = list(histories)
+    index = {}
+
+    for symbol in symbols:
+        dates = pd.DatetimeIndex(histories[symbol].index)
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        index[symbol] = dates.values.astype('datetime64[D]')
+
+    if symbols:
+        all_dates = np.unique(np.concatenate([index[s] for s in symbols]))
+    else:
+        all_dates = np.array([], dtype='datetime64[D]')
+
+    panel = {'symbols': symbols, 'dates': all_dates}
+    for field in PANEL_FIELDS:
+        panel[field] = np.full((len(all_dates), len(symbols)), np.nan)
+
+    for j, symbol in enumerate(symbols):
+        rows = np.searchsorted(all_dates, index[symbol])
+        frame = histories[symbol]
+        for field, column in PANEL_FIELDS.items():
+            panel[field][rows, j] = frame[column].to_numpy(dtype='f8')
+
+    return panel
+
+
+# ═══════════════════════════════════════════════════════
+# ROLLING PRIMITIVES (axis 0 = time)
+# ═══════════════════════════════════════════════════════
+
+def _rolling(x, window, reduce):
+    """Trailing-window reduction; NaN until a full window of bars exists"""
+    out = np.full(x.shape, np.nan)
+    if len(x) >= window:
+        out[window - 1:] = reduce(sliding_window_view(x, window, axis=0), axis=-1)
+    return out
+
+
+def rolling_mean(x, window):
+    return _rolling(x, window, np.mean)
+
+
+def rolling_max(x, window):
+    return _rolling(x, window, np.max)
+
+
+def rolling_min(x, window):
+    return _rolling(x, window, np.min)
+
+
+def shift(x, periods=1):
+    """Shift down along time, padding with NaN"""
+    out = np.full(x.shape, np.nan)
+    if periods < len(x):
+        out[periods:] = x[:-periods]
+    return out
+
+
+# ═══════════════════════════════════════════════════════
+# BAR ALIGNMENT (SKIP MISSING DATES PER SYMBOL)
+# ═══════════════════════════════════════════════════════
+
+def bar_index(valid):
+    """
+    Map each symbol's own bars onto a packed, bottom-aligned panel
+
+    Row k of a symbol's packed column is its k-th bar counted so that its
+    last bar lands on the last row, with NaN above its first bar. Windows
+    over the packed panel therefore span a symbol's last `window` bars,
+    skipping dates it has no bar for, as a per-symbol rolling() does.
+
+    Args:
+        valid: (T x N) bool, True where a symbol has a bar
+
+    Returns:
+        tuple: (rows, cols, packed_rows) index arrays
+    """
+
+    rows, cols = np.nonzero(valid)
+    rank = np.cumsum(valid, axis=0)[rows, cols] - 1
+    packed_rows = len(valid) - valid.sum(axis=0)[cols] + rank
+    return rows, cols, packed_rows
+
+
+def pack(x, index):
+    """Panel -> packed panel (see bar_index)"""
+    rows, cols, packed_rows = index
+    out = np.full(x.shape, np.nan)
+    out[packed_rows, cols] = x[rows, cols]
+    return out
+
+
+def unpack(x, index):
+    """Packed panel -> panel, NaN on dates a symbol has no bar"""
+    rows, cols, packed_rows = index
+    out = np.full(x.shape, np.nan)
+    out[rows, cols] = x[packed_rows, cols]
+    return out
+
+
+def fill_bars(close, high, low, volume, prev_volume):
+    """
+    Stand-ins for non-finite high/low/volume on bars that have a close
+
+    High and low fall back to the close, volume to the previous bar's, so
+    one bad field does not poison every window (or running sum) it enters.
+    """
+    has_close = np.isfinite(close)
+    high = np.where(np.isfinite(high) | ~has_close, high, close)
+    low = np.where(np.isfinite(low) | ~has_close, low, close)
+    volume = np.where(np.isfinite(volume) | ~has_close, volume, prev_volume)
+    return high, low, volume
+
+
+def forward_fill(x):
+    """Carry the last non-NaN value down along time (NaN before the first)"""
+    valid = ~np.isnan(x)
+    idx = np.where(valid, np.arange(len(x))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    out = x[idx, np.arange(x.shape[1])]
+    out[np.cumsum(valid, axis=0) == 0] = np.nan
+    return out
+
+
+def column_max(x):
+    """nanmax along time; NaN (without a warning) where a column is all NaN"""
+    out = np.full(x.shape[1:], np.nan)
+    some = ~np.isnan(x).all(axis=0)
+    if len(x):
+        out[some] = np.nanmax(x[:, some], axis=0)
+    return out
+
+
+# ═══════════════════════════════════════════════════════
+# INDICATORS
+# ═══════════════════════════════════════════════════════
+
+def rsi(close, window=14):
+    """Simple-average RSI, matching the collector's original rolling() RSI"""
+    delta = np.diff(close, axis=0, prepend=np.nan)
+
+    # A symbol's first bar has no delta and counts as zero movement
+    delta = np.where(np.isnan(delta) & ~np.isnan(close), 0.0, delta)
+
+    gain = rolling_mean(np.clip(delta, 0, None), window)
+    loss = rolling_mean(np.clip(-delta, 0, None), window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + gain / loss))
+
+
+def true_range(high, low, close):
+    prev_close = shift(close)
+    ranges = np.fmax(np.abs(high - prev_close), np.abs(low - prev_close))
+    return np.where(np.isnan(high) | np.isnan(low), np.nan, np.fmax(high - low, ranges))
+
+
+def atr(high, low, close, window=14):
+    return rolling_mean(true_range(high, low, close), window)
+
+
+# ═══════════════════════════════════════════════════════
+# WILDER ADX (STREAMING)
+# ═══════════════════════════════════════════════════════
+
+class WilderADX:
+    """
+    Streaming Wilder ADX/+DI/-DI for N symbols at once
+
+    Each update() folds one bar per symbol into the smoothed state in O(1),
+    so a daily run only applies the new bar to yesterday's checkpoint.
+    batch() replays a whole panel through the same recurrence.
+    """
+
+    STATE_KEYS = ('bars', 'prev_high', 'prev_low', 'prev_close',
+                  'tr_s', 'pdm_s', 'mdm_s', 'dx_sum', 'adx')
+
+    def __init__(self, n, period=14):
+        self.period = period
+        self.bars = np.zeros(n, dtype=np.int64)
+        for key in self.STATE_KEYS[1:]:
+            setattr(self, key, np.full(n, np.nan))
+        self.reset(np.ones(n, dtype=bool))
+
+    def reset(self, mask):
+        """Forget everything for the masked symbols"""
+        self.bars[mask] = 0
+        for key in ('prev_high', 'prev_low', 'prev_close', 'adx'):
+            getattr(self, key)[mask] = np.nan
+        for key in ('tr_s', 'pdm_s', 'mdm_s', 'dx_sum'):
+            getattr(self, key)[mask] = 0.0
+
+    def update(self, high, low, close, mask=None):
+        """Fold one bar into every masked symbol with a valid close"""
+        p = self.period
+        live = ~np.isnan(close)
+        if mask is not None:
+            live &= mask
+
+        has_prev = live & (self.bars > 0)
+        # k = number of true ranges seen including this bar
+        k = np.where(has_prev, self.bars, 0)
+
+        with np.errstate(invalid='ignore'):
+            up = high - self.prev_high
+            down = self.prev_low - low
+            pdm = np.where((up > down) & (up > 0), up, 0.0)
+            mdm = np.where((down > up) & (down > 0), down, 0.0)
+            tr = np.fmax(high - low, np.fmax(np.abs(high - self.prev_close),
+                                             np.abs(low - self.prev_close)))
+
+        # Seed with a plain sum of the first `period` values, then smooth
+        seeding = has_prev & (k <= p)
+        smoothing = has_prev & (k > p)
+        for key, value in (('tr_s', tr), ('pdm_s', pdm), ('mdm_s', mdm)):
+            s = getattr(self, key)
+            s[seeding] += value[seeding]
+            s[smoothing] = s[smoothing] - s[smoothing] / p + value[smoothing]
+
+        # DX from the smoothed sums once the first full period is in
+        ready = has_prev & (k >= p)
+        plus_di, minus_di = self._raw_di()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+        dx = np.nan_to_num(dx)
+
+        # j = number of DX values including this bar
+        j = k - p + 1
+        dx_seeding = ready & (j <= p)
+        self.dx_sum[dx_seeding] += dx[dx_seeding]
+        first = ready & (j == p)
+        self.adx[first] = self.dx_sum[first] / p
+        later = ready & (j > p)
+        self.adx[later] = (self.adx[later] * (p - 1) + dx[later]) / p
+
+        self.prev_high[live] = high[live]
+        self.prev_low[live] = low[live]
+        self.prev_close[live] = close[live]
+        self.bars[live] += 1
+
+        return self.values()
+
+    def _raw_di(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            plus_di = np.where(self.tr_s > 0, 100 * self.pdm_s / self.tr_s, 0.0)
+            minus_di = np.where(self.tr_s > 0, 100 * self.mdm_s / self.tr_s, 0.0)
+        return plus_di, minus_di
+
+    def values(self):
+        """Current (ADX, +DI, -DI) per symbol, NaN while warming up"""
+        plus_di, minus_di = self._raw_di()
+        warm = self.bars > self.period
+        return (self.adx.copy(),
+                np.where(warm, plus_di, np.nan),
+                np.where(warm, minus_di, np.nan))
+
+    def state(self):
+        return {key: getattr(self, key) for key in self.STATE_KEYS}
+
+    @classmethod
+    def from_state(cls, state, period=14):
+        adx = cls(len(state['bars']), period)
+        for key in cls.STATE_KEYS:
+            setattr(adx, key, np.array(state[key]))
+        return adx
+
+    @classmethod
+    def batch(cls, high, low, close, period=14):
+        """
+        Replay (T x N) panels through the recurrence
+
+        Returns:
+            tuple: (adx, plus_di, minus_di, final WilderADX), each (T x N)
+        """
+
+        adx = cls(close.shape[1], period)
+        out = [np.full(close.shape, np.nan) for _ in range(3)]
+
+        for t in range(len(close)):
+            values = adx.update(high[t], low[t], close[t])
+            live = ~np.isnan(close[t])
+            for arr, value in zip(out, values):
+                arr[t, live] = value[live]
+
+        return out[0], out[1], out[2], adx
+
+
+def compute(panel, adx=True):
+    """
+    All collector indicators as (T x N) arrays
+
+    Windows count each symbol's own bars: a date a symbol has no bar for
+    is skipped rather than breaking every window that spans it.
+    """
+    index = bar_index(~np.isnan(panel['close']))
+    close, high, low, volume = (pack(panel[f], index) for f in ('close', 'high', 'low', 'volume'))
+    prev_volume = np.nan_to_num(shift(forward_fill(np.where(np.isfinite(volume), volume, np.nan))))
+    high, low, volume = fill_bars(close, high, low, volume, prev_volume)
+
+    values = {
+        'MA20': rolling_mean(close, 20),
+        'MA50': rolling_mean(close, 50),
+        'MA200': rolling_mean(close, 200),
+        'RSI': rsi(close, 14),
+        'ATR': atr(high, low, close, 14),
+        'Vol_20D_Avg': rolling_mean(volume, 20),
+        'Vol_5D_Avg': rolling_mean(volume, 5),
+        'High_20D': shift(rolling_max(high, 20), 20),  # 20 days ago
+        'Support': rolling_min(low, 10),
+    }
+    values = {name: unpack(arr, index) for name, arr in values.items()}
+
+    # WilderADX already skips rows without a close
+    if adx:
+        values['ADX'], values['Plus_DI'], values['Minus_DI'], _ = \
+            WilderADX.batch(unpack(high, index), unpack(low, index), panel['close'])
+
+    return values
+
+
+# ═══════════════════════════════════════════════════════
+# RAW DATA ROWS
+# ═══════════════════════════════════════════════════════
+
+def raw_frame(symbols, dates, columns):
+    """
+    Assemble raw_data rows from per-symbol (N,) arrays
+
+    Args:
+        symbols: Yahoo symbols
+        dates: datetime64[D] date of each row
+        columns: {raw_data column: (N,) float array}
+    """
+
+    df = pd.DataFrame({
+        'Symbol': [s.replace('.NS', '') for s in symbols],
+        'Date': pd.DatetimeIndex(np.asarray(dates).astype('datetime64[ns]')).strftime('%Y-%m-%d'),
+    })
+
+    for column in RAW_DATA_COLUMNS[2:]:
+        if column in INT_COLUMNS:
+            df[column] = np.nan_to_num(columns[column]).astype(np.int64)
+        else:
+            df[column] = np.round(columns[column], 2)
+
+    return df
+
+
+def latest_frame(panel, values, resistance_since=None):
+    """
+    One raw_data row per symbol, taken at each symbol's last bar
+
+    Symbols with fewer than MIN_BARS bars are dropped, as the per-symbol
+    loop used to do when High_20D was out of range.
+
+    Args:
+        panel: build_panel() dict
+        values: compute() dict of (T x N) arrays
+        resistance_since: Only bars on/after this date count towards
+            Resistance (None = the whole panel)
+
+    Returns:
+        DataFrame with RAW_DATA_COLUMNS
+    """
+
+    close = panel['close']
+    valid = ~np.isnan(close)
+    bars = valid.sum(axis=0)
+    keep = np.flatnonzero(bars >= MIN_BARS)
+
+    if len(keep) == 0:
+        return pd.DataFrame(columns=RAW_DATA_COLUMNS)
+
+    # Row index of each symbol's last bar
+    last = len(close) - 1 - np.argmax(valid[::-1], axis=0)
+    rows, cols = last[keep], keep
+
+    high = panel['high']
+    if resistance_since is not None:
+        cut = np.searchsorted(panel['dates'], np.datetime64(pd.Timestamp(resistance_since).date(), 'D'))
+        high = high[cut:]
+
+    columns = {field.capitalize(): panel[field][rows, cols] for field in PANEL_FIELDS}
+    for column, arr in values.items():
+        columns[column] = arr[rows, cols]
+    columns['Resistance'] = column_max(high[:, cols])
+
+    symbols = [panel['symbols'][j] for j in cols]
+    return raw_frame(symbols, panel['dates'][rows], columns)
+
+
+# ═══════════════════════════════════════════════════════
+# INCREMENTAL STATE (O(1) PER NEW BAR)
+# ═══════════════════════════════════════════════════════
+
+class IndicatorState:
+    """
+    Streaming counterpart of compute() + latest_frame()
+
+    Keeps, per symbol, short ring buffers of recent bars, running window
+    sums for every rolling mean and a WilderADX, so each new bar updates
+    every raw_data column without looking at older history.
+    """
+
+    # Ring length per series: the longest window that reads it
+    RINGS = {
+        'close': 200,
+        'high': 200,   # High_20D needs 40; Resistance ~6 months of bars
+        'low': 10,
+        'volume': 20,
+        'tr': 14,
+        'gain': 14,
+        'loss': 14,
+    }
+
+    # Running sums: name -> (series, window)
+    SUMS = {
+        'MA20': ('close', 20),
+        'MA50': ('close', 50),
+        'MA200': ('close', 200),
+        'Vol_20D_Avg': ('volume', 20),
+        'Vol_5D_Avg': ('volume', 5),
+        'ATR': ('tr', 14),
+        'gain14': ('gain', 14),
+        'loss14': ('loss', 14),
+    }
+
+    def __init__(self, n):
+        self.n = n
+        self.bars = np.zeros(n, dtype=np.int64)
+        self.last = {field: np.full(n, np.nan) for field in PANEL_FIELDS}
+        self.last_date = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+        self.rings = {name: np.full((size, n), np.nan) for name, size in self.RINGS.items()}
+        self.dates = np.full((self.RINGS['high'], n), np.datetime64('NaT'), dtype='datetime64[D]')
+        self.sums = {name: np.zeros(n) for name in self.SUMS}
+        self.adx = WilderADX(n)
+
+    def update(self, date, open_, high, low, close, volume, mask=None):
+        """Fold one bar (all args (N,) arrays, date scalar or (N,)) into the state"""
+        live = ~np.isnan(close)
+        if mask is not None:
+            live &= mask
+
+        prev_close = self.last['close']
+        first = live & (self.bars == 0)
+        # The volume ring holds filled volumes, so its last entry is the stand-in
+        volumes = self.rings['volume']
+        prev_volume = np.where(self.bars > 0, volumes[(self.bars - 1) % len(volumes), np.arange(self.n)], 0.0)
+        raw = {'high': high, 'low': low, 'volume': volume}
+        high, low, volume = fill_bars(close, high, low, volume, prev_volume)
+
+        delta = np.where(first, 0.0, close - prev_close)
+        with np.errstate(invalid='ignore'):
+            tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close),
+                                             np.abs(low - prev_close)))
+        new = {
+            'close': close, 'high': high, 'low': low, 'volume': volume,
+            'tr': tr, 'gain': np.clip(delta, 0, None), 'loss': np.clip(-delta, 0, None)
+        }
+
+        cols = np.flatnonzero(live)
+        bars = self.bars[cols]
+
+        for name, (series, window) in self.SUMS.items():
+            ring = self.rings[series]
+            leaving = ring[(bars - window) % len(ring), cols]
+            leaving = np.where(bars >= window, leaving, 0.0)
+            self.sums[name][cols] += new[series][cols] - leaving
+
+        for series, ring in self.rings.items():
+            ring[bars % len(ring), cols] = new[series][cols]
+        self.dates[bars % len(self.dates), cols] = np.broadcast_to(date, self.n)[cols]
+
+        for field, value in zip(PANEL_FIELDS, (open_, raw['high'], raw['low'], close, raw['volume'])):
+            self.last[field][cols] = value[cols]
+        self.last_date[cols] = np.broadcast_to(date, self.n)[cols]
+
+        self.adx.update(high, low, close, mask=live)
+        self.bars[cols] += 1
+
+    def update_panel(self, panel, after=None):
+        """Apply every panel row, optionally only bars dated after `after` (N,)"""
+        for t, date in enumerate(panel['dates']):
+            mask = None if after is None else date > after
+            self.update(date, *(panel[field][t] for field in PANEL_FIELDS), mask=mask)
+
+    def _window(self, series, window, offset=0):
+        """(window x N) of the most recent bars, `offset` bars back"""
+        ring = self.rings[series]
+        idx = (self.bars - 1 - offset - np.arange(window)[:, None]) % len(ring)
+        out = ring[idx, np.arange(self.n)]
+        out[:, self.bars < window + offset] = np.nan
+        return out
+
+    def values(self, resistance_since=None):
+        """Every raw_data column at each symbol's last bar, as (N,) arrays"""
+        columns = {field.capitalize(): self.last[field].copy() for field in PANEL_FIELDS}
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name, (_, window) in self.SUMS.items():
+                columns[name] = np.where(self.bars >= window, self.sums[name] / window, np.nan)
+            gain, loss = columns.pop('gain14'), columns.pop('loss14')
+            columns['RSI'] = 100 - (100 / (1 + gain / loss))
+
+            columns['ADX'], columns['Plus_DI'], columns['Minus_DI'] = self.adx.values()
+            columns['High_20D'] = self._window('high', 20, offset=20).max(axis=0)
+            columns['Support'] = self._window('low', 10).min(axis=0)
+
+            highs = self.rings['high']
+            if resistance_since is not None:
+                cut = np.datetime64(pd.Timestamp(resistance_since).date(), 'D')
+                highs = np.where(self.dates >= cut, highs, np.nan)
+            columns['Resistance'] = column_max(highs)
+
+        return columns
+
+    def frame(self, symbols, resistance_since=None):
+        """raw_data rows for symbols with at least MIN_BARS bars"""
+        columns = self.values(resistance_since)
+        keep = np.flatnonzero(self.bars >= MIN_BARS)
+        return raw_frame(
+            [symbols[j] for j in keep],
+            self.last_date[keep],
+            {name: arr[keep] for name, arr in columns.items()}
+        )
+
+    # ─────────────────────────────────────────
+    # Checkpointing
+    # ─────────────────────────────────────────
+
+    def state(self):
+        """Flat {key: array} for checkpoint.save()"""
+        arrays = {'bars': self.bars, 'ring_dates': self.dates}
+        arrays.update({f'last_{k}': v for k, v in self.last.items()})
+        arrays.update({f'ring_{k}': v for k, v in self.rings.items()})
+        arrays.update({f'sum_{k}': v for k, v in self.sums.items()})
+        arrays.update({f'adx_{k}': v for k, v in self.adx.state().items()})
+        return arrays
+
+    def restore(self, arrays, last_date, cur, saved):
+        """Copy checkpoint columns `saved` into this state's columns `cur`"""
+        self.bars[cur] = arrays['bars'][saved]
+        self.dates[:, cur] = arrays['ring_dates'][:, saved]
+        self.last_date[cur] = last_date[saved]
+        for k in self.last:
+            self.last[k][cur] = arrays[f'last_{k}'][saved]
+        for k in self.rings:
+            self.rings[k][:, cur] = arrays[f'ring_{k}'][:, saved]
+        for k in self.sums:
+            self.sums[k][cur] = arrays[f'sum_{k}'][saved]
+        for k in WilderADX.STATE_KEYS:
+            getattr(self.adx, k)[cur] = arrays[f'adx_{k}'][saved]
@@ -0,0 +1,352 @@
+"""
+SUPPORT / RESISTANCE LEVELS
+Purpose: Find swing pivots in each symbol's stored bars, cluster them into
+         price zones weighted by touches and volume, and answer "nearest
+         support / resistance" by bisection over the sorted zones
+Layout:  data/levels/<SYMBOL>.npy - the symbol's confirmed pivots (date,
+         price, kind +1 high / -1 low, bar volume), appended as bars arrive
+         data/state/levels.npz - per symbol, the last bar already scanned
+Columns: Support_Zone, Support_Zone_Low, Support_Touches,
+         Resistance_Zone, Resistance_Touches (as of the latest bar)
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+import bar_store
+import checkpoint
+import indicators
+
+LEVELS_DIR = 'data/levels/'
+
+# A swing high/low is the extreme of the PIVOT_BARS bars either side, so it
+# is confirmed PIVOT_BARS bars after it prints
+PIVOT_BARS = 5
+
+# Pivots this many bars old stop counting
+LOOKBACK_BARS = 250
+
+# Sorted pivots further apart than this % start a new zone
+ZONE_PCT = 1.5
+
+PIVOT_DTYPE = np.dtype([
+    ('date', 'datetime64[D]'),
+    ('price', 'f8'),
+    ('kind', 'i1'),
+    ('volume', 'f8')
+])
+
+ZONE_DTYPE = np.dtype([
+    ('price', 'f8'),
+    ('low', 'f8'),
+    ('high', 'f8'),
+    ('touches', 'i4'),
+    ('strength', 'f8')
+])
+
+COLUMNS = ['Support_Zone', 'Support_Zone_Low', 'Support_Touches',
+           'Resistance_Zone', 'Resistance_Touches']
+
+
+# ═══════════════════════════════════════════════════════
+# PIVOTS
+# ═══════════════════════════════════════════════════════
+
+def swing_points(high, low, bars=PIVOT_BARS):
+    """
+    (is swing high, is swing low) along axis 0 of 1-D or (T x N) arrays
+
+    The last `bars` rows are never pivots yet - they lack a right side.
+    """
+
+    span = 2 * bars + 1
+    centred_max = np.full(np.shape(high), np.nan)
+    centred_min = np.full(np.shape(low), np.nan)
+    if len(high) > 2 * bars:
+        centred_max[:-bars] = indicators.rolling_max(high, span)[bars:]
+        centred_min[:-bars] = indicators.rolling_min(low, span)[bars:]
+
+    with np.errstate(invalid='ignore'):
+        return high >= centred_max, low <= centred_min
+
+
+def scan(bars, after=None):
+    """Pivots in daily `bars` whose date is after `after` (all if None)"""
+    is_high, is_low = swing_points(np.asarray(bars['high']), np.asarray(bars['low']))
+    keep = np.ones(len(bars), dtype=bool) if after is None else bars['date'] > after
+
+    rows = []
+    for mask, field, kind in ((is_high & keep, 'high', 1), (is_low & keep, 'low', -1)):
+        found = np.empty(int(mask.sum()), dtype=PIVOT_DTYPE)
+        found['date'] = bars['date'][mask]
+        found['price'] = bars[field][mask]
+        found['kind'] = kind
+        found['volume'] = bars['volume'][mask]
+        rows.append(found)
+
+    pivots = np.concatenate(rows)
+    return pivots[np.argsort(pivots['date'], kind='stable')]
+
+
+def confirmed_through(bars):
+    """Date of the last bar whose pivot status is final, or None"""
+    return bars['date'][-1 - PIVOT_BARS] if len(bars) > PIVOT_BARS else None
+
+
+def pivot_path(symbol, levels_dir=LEVELS_DIR):
+    return bar_store.symbol_path(symbol, levels_dir)
+
+
+def load_pivots(symbol, levels_dir=LEVELS_DIR):
+    path = pivot_path(symbol, levels_dir)
+    return np.load(path) if os.path.exists(path) else None
+
+
+def write_pivots(symbol, pivots, levels_dir=LEVELS_DIR):
+    os.makedirs(levels_dir, exist_ok=True)
+    path = pivot_path(symbol, levels_dir)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, np.ascontiguousarray(pivots, dtype=PIVOT_DTYPE))
+    os.replace(tmp, path)
+
+
+def _still_valid(pivots, bars):
+    """Stored pivots still sit on the stored bars (no re-adjustment since)"""
+    if len(pivots) == 0:
+        return True
+    last = pivots[-1]
+    row = int(np.searchsorted(bars['date'], last['date']))
+    if row >= len(bars) or bars['date'][row] != last['date']:
+        return False
+    field = 'high' if last['kind'] > 0 else 'low'
+    return abs(bars[field][row] / last['price'] - 1) <= bar_store.ADJUSTMENT_TOLERANCE
+
+
+def update_symbol(symbol, through, store_dir=bar_store.STORE_DIR, levels_dir=LEVELS_DIR,
+                  bars=None):
+    """
+    Append the pivots confirmed since `through` (the last scanned bar)
+
+    Only the bars from PIVOT_BARS before `through` onward are scanned. A
+    symbol with no scan state, or whose stored pivots no longer match its
+    bars, is rescanned in full.
+
+    Args:
+        bars: The symbol's stored bars if already loaded (else read here)
+
+    Returns:
+        tuple: (pivots, new through date or None, 'extended' | 'rebuilt' |
+        'current' | 'missing')
+    """
+
+    if bars is None:
+        bars = bar_store.load_bars(symbol, store_dir)
+    if bars is None or len(bars) == 0:
+        return None, None, 'missing'
+
+    pivots = load_pivots(symbol, levels_dir) if through is not None else None
+    new_through = confirmed_through(bars)
+
+    if pivots is not None and _still_valid(pivots, bars):
+        row = int(np.searchsorted(bars['date'], through))
+        if row < len(bars) and bars['date'][row] == through:
+            if new_through is None or new_through <= through:
+                return pivots, through, 'current'
+            window = bars[max(row + 1 - 2 * PIVOT_BARS, 0):]
+            fresh = scan(window, after=through)
+            fresh = fresh[fresh['date'] <= new_through]
+            pivots = np.concatenate([pivots, fresh])
+            write_pivots(symbol, pivots, levels_dir)
+            return pivots, new_through, 'extended'
+
+    pivots = scan(bars)
+    write_pivots(symbol, pivots, levels_dir)
+    return pivots, new_through, 'rebuilt'
+
+
+# ═══════════════════════════════════════════════════════
+# ZONES
+# ═══════════════════════════════════════════════════════
+
+def cluster(prices, volumes):
+    """
+    Pivot prices -> zones sorted by price
+
+    Each zone's price is the volume-weighted mean of its pivots; strength
+    is its touches weighted by pivot volume relative to the average pivot.
+    """
+
+    if len(prices) == 0:
+        return np.empty(0, dtype=ZONE_DTYPE)
+
+    order = np.argsort(prices)
+    price = np.asarray(prices, dtype=float)[order]
+    weight = np.maximum(np.nan_to_num(np.asarray(volumes, dtype=float)[order]), 1.0)
+
+    starts = np.flatnonzero(np.r_[True, price[1:] > price[:-1] * (1 + ZONE_PCT / 100)])
+    ends = np.r_[starts[1:], len(price)] - 1
+
+    zones = np.empty(len(starts), dtype=ZONE_DTYPE)
+    zones['price'] = np.add.reduceat(price * weight, starts) / np.add.reduceat(weight, starts)
+    zones['low'] = price[starts]
+    zones['high'] = price[ends]
+    zones['touches'] = ends - starts + 1
+    zones['strength'] = np.add.reduceat(weight, starts) / weight.mean()
+    return zones
+
+
+def active(pivot_rows, last_row):
+    """Pivots (by bar row) that count on bar `last_row`"""
+    return (pivot_rows + PIVOT_BARS <= last_row) & (pivot_rows > last_row - LOOKBACK_BARS)
+
+
+class LevelIndex:
+    """One symbol's zones sorted by price; nearest-level queries bisect"""
+
+    def __init__(self, zones):
+        self.zones = zones
+        self.prices = zones['price']
+
+    def support(self, price):
+        """Nearest zone at or below `price`, or None"""
+        i = int(np.searchsorted(self.prices, price, side='right')) - 1
+        return self.zones[i] if i >= 0 else None
+
+    def resistance(self, price):
+        """Nearest zone above `price`, or None"""
+        i = int(np.searchsorted(self.prices, price, side='right'))
+        return self.zones[i] if i < len(self.zones) else None
+
+    def columns(self, price):
+        """COLUMNS values for a close of `price` (NaN where no zone)"""
+        below, above = self.support(price), self.resistance(price)
+        return {
+            'Support_Zone': below['price'] if below is not None else np.nan,
+            'Support_Zone_Low': below['low'] if below is not None else np.nan,
+            'Support_Touches': below['touches'] if below is not None else 0,
+            'Resistance_Zone': above['price'] if above is not None else np.nan,
+            'Resistance_Touches': above['touches'] if above is not None else 0
+        }
+
+
+def build_index(pivots, bars):
+    """LevelIndex for the latest of `bars` from the symbol's pivots"""
+    if pivots is None or len(pivots) == 0:
+        return LevelIndex(np.empty(0, dtype=ZONE_DTYPE))
+    rows = np.searchsorted(bars['date'], pivots['date'])
+    live = active(rows, len(bars) - 1)
+    return LevelIndex(cluster(pivots['price'][live], pivots['volume'][live]))
+
+
+def load_index(symbol, store_dir=bar_store.STORE_DIR, levels_dir=LEVELS_DIR):
+    """LevelIndex from the stored pivots (as of the last update), or None"""
+    bars = bar_store.load_bars(symbol, store_dir)
+    pivots = load_pivots(symbol, levels_dir)
+    if bars is None or len(bars) == 0 or pivots is None:
+        return None
+    return build_index(pivots, bars)
+
+
+# ═══════════════════════════════════════════════════════
+# UNIVERSE
+# ═══════════════════════════════════════════════════════
+
+def update(symbols, store_dir=bar_store.STORE_DIR, levels_dir=LEVELS_DIR,
+           state_dir=checkpoint.STATE_DIR, log=print):
+    """
+    Bring every symbol's pivots up to date and query its latest close
+
+    Returns:
+        DataFrame: Symbol (no .NS) plus COLUMNS
+    """
+
+    saved = checkpoint.load('levels', state_dir)
+    known = dict(zip(saved[0], saved[1])) if saved is not None else {}
+
+    stats = {'current': 0, 'extended': 0, 'rebuilt': 0, 'missing': 0}
+    rows, done, through_dates = [], [], []
+    for symbol in symbols:
+        # One read per symbol, shared by the pivot scan and the zone query
+        bars = bar_store.load_bars(symbol, store_dir)
+        if bars is None or len(bars) == 0:
+            stats['missing'] += 1
+            continue
+
+        pivots, through, status = update_symbol(symbol, known.get(symbol), store_dir, levels_dir, bars)
+        stats[status] += 1
+
+        index = build_index(pivots, bars)
+        rows.append({'Symbol': symbol.replace('.NS', ''), **index.columns(bars['close'][-1])})
+        if through is not None:
+            done.append(symbol)
+            through_dates.append(through)
+
+    if done:
+        checkpoint.update('levels', done, np.array(through_dates, dtype='datetime64[D]'), {}, state_dir)
+
+    log(f"Levels: {stats['extended']} extended, {stats['rebuilt']} rebuilt, "
+        f"{stats['current']} current, {stats['missing']} not in store")
+    return pd.DataFrame(rows, columns=['Symbol'] + COLUMNS)
+
+
+def as_of(close, high, low, volume):
+    """
+    COLUMNS for every bar of one symbol (1-D arrays, no gaps), each bar
+    seeing only the pivots confirmed by then - the replay counterpart of
+    update()
+
+    Zones change only when a pivot is confirmed or ages out, so they are
+    rebuilt once per such event and every bar in between is queried with
+    one vectorised bisection.
+    """
+
+    n = len(close)
+    out = {name: np.full(n, np.nan) for name in COLUMNS}
+    out['Support_Touches'][:] = 0
+    out['Resistance_Touches'][:] = 0
+
+    is_high, is_low = swing_points(high, low)
+    rows = np.r_[np.flatnonzero(is_high), np.flatnonzero(is_low)]
+    prices = np.r_[high[is_high], low[is_low]]
+    volumes = np.r_[volume[is_high], volume[is_low]]
+    if len(rows) == 0:
+        return out
+
+    events = np.unique(np.r_[0, rows + PIVOT_BARS, rows + LOOKBACK_BARS])
+    events = events[events < n]
+    bounds = np.r_[events, n]
+
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        live = active(rows, start)
+        zones = cluster(prices[live], volumes[live])
+        if len(zones) == 0:
+            continue
+
+        seg = close[start:stop]
+        i = np.searchsorted(zones['price'], seg, side='right')
+        below, above = i - 1, i
+        has_below, has_above = below >= 0, above < len(zones)
+
+        b, a = zones[np.maximum(below, 0)], zones[np.minimum(above, len(zones) - 1)]
+        out['Support_Zone'][start:stop] = np.where(has_below, b['price'], np.nan)
+        out['Support_Zone_Low'][start:stop] = np.where(has_below, b['low'], np.nan)
+        out['Support_Touches'][start:stop] = np.where(has_below, b['touches'], 0)
+        out['Resistance_Zone'][start:stop] = np.where(has_above, a['price'], np.nan)
+        out['Resistance_Touches'][start:stop] = np.where(has_above, a['touches'], 0)
+
+    return out
+
+
+def as_of_panel(panel):
+    """as_of() for every symbol of a build_panel() dict, as (T x N) arrays"""
+    close = panel['close']
+    out = {name: np.full(close.shape, np.nan) for name in COLUMNS}
+    for j in range(close.shape[1]):
+        live = ~np.isnan(close[:, j])
+        values = as_of(close[live, j], panel['high'][live, j], panel['low'][live, j],
+                       panel['volume'][live, j])
+        for name, arr in values.items():
+            out[name][live, j] = arr
+    return out
@@ -0,0 +1,430 @@
+"""
+MARKET DATA: SHARED FETCH LAYER
+Purpose: Rate-limited, retrying, concurrent OHLCV fetches from Yahoo Finance
+Used by: data collector, bar store, market regime, tracker
+"""
+
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+
+import metrics
+import stage_log
+from response_cache import ResponseCache
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+RETRYABLE_MESSAGES = ('Too Many Requests', 'Rate limited', '429',
+                      'Internal Server Error', 'Bad Gateway',
+                      'Service Unavailable', 'Gateway Timeout',
+                      'timed out', 'Timeout', 'Connection')
+
+# yf.download keeps its results in module globals, so only one may run at a time
+_DOWNLOAD_LOCK = threading.Lock()
+_SESSION_LOCK = threading.Lock()
+_SESSIONS = {}
+
+
+# ═══════════════════════════════════════════════════════
+# HELPERS
+# ═══════════════════════════════════════════════════════
+
+def chunked(items, size):
+    """Yield successive slices of at most `size` items"""
+    size = max(1, int(size))
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def split_download(raw, symbols):
+    """Split a grouped yf.download() frame into per-symbol OHLCV frames"""
+    frames = {}
+
+    if raw is None or raw.empty:
+        return frames
+
+    if not isinstance(raw.columns, pd.MultiIndex):
+        # Single ticker without a ticker level
+        if len(symbols) == 1:
+            raw = pd.concat({symbols[0]: raw}, axis=1)
+        else:
+            return frames
+
+    tickers = set(raw.columns.get_level_values(0))
+
+    for symbol in symbols:
+        if symbol not in tickers:
+            continue
+
+        hist = raw[symbol].reindex(columns=OHLCV_COLUMNS)
+        hist = hist.dropna(subset=['Close'])
+
+        if hist.empty:
+            continue
+
+        frames[symbol] = hist
+
+    return frames
+
+
+def is_retryable(error):
+    """True for rate limiting (429), server errors (5xx) and network hiccups"""
+    import yfinance as yf  # deferred to first use: it outweighs the rest of startup
+
+    if isinstance(error, yf.exceptions.YFRateLimitError):
+        return True
+
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status == 429 or (status is not None and 500 <= status < 600):
+        return True
+
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+
+    text = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+    return any(m in text for m in RETRYABLE_MESSAGES)
+
+
+def yahoo_session():
+    """
+    One pooled HTTP session for the Yahoo host
+
+    curl_cffi keeps a connection per worker thread inside the session, so
+    every request to Yahoo reuses an open connection instead of a new
+    handshake. Returns None (yfinance's own session) if curl_cffi is absent.
+    """
+
+    with _SESSION_LOCK:
+        if 'yahoo' not in _SESSIONS:
+            try:
+                from curl_cffi import requests as curl_requests
+                _SESSIONS['yahoo'] = curl_requests.Session(impersonate='chrome')
+            except ImportError:
+                _SESSIONS['yahoo'] = None
+        return _SESSIONS['yahoo']
+
+
+# ═══════════════════════════════════════════════════════
+# RATE LIMITING
+# ═══════════════════════════════════════════════════════
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/sec, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        Block until `tokens` can be taken
+
+        Requests larger than the bucket wait for a full bucket and leave it
+        in debt, so a 50-symbol chunk still pays for 50 requests.
+        """
+
+        if self.rate <= 0:
+            return
+
+        need = min(tokens, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= need:
+                    self.tokens -= tokens
+                    return
+
+                wait = (need - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+# ═══════════════════════════════════════════════════════
+# FETCHER
+# ═══════════════════════════════════════════════════════
+
+class Fetcher:
+    """
+    Shared access to Yahoo Finance for every stage
+
+    All requests draw from one token bucket, run on at most `workers`
+    threads and retry 429/5xx/network errors with exponential backoff and
+    full jitter. With a ResponseCache, responses already fetched for the
+    current trading day are served from disk.
+    """
+
+    def __init__(self, rate=5.0, burst=20, workers=4, retries=4,
+                 backoff=1.0, backoff_max=30.0, mode='batch',
+                 chunk_size=50, cache=None, log=print):
+        self.limiter = TokenBucket(rate, burst)
+        self.workers = max(1, int(workers))
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.log = log
+        self.debug = stage_log.debug_of(log)
+
+    @classmethod
+    def from_config(cls, config, log=print):
+        """Build from settings.json keys (fetch_*, download_*, response_cache_*)"""
+        return cls(
+            rate=config.get('fetch_rate_per_sec', 5.0),
+            burst=config.get('fetch_burst', 20),
+            workers=config.get('fetch_workers', 4),
+            retries=config.get('fetch_retries', 4),
+            backoff=config.get('fetch_backoff_sec', 1.0),
+            backoff_max=config.get('fetch_backoff_max_sec', 30.0),
+            mode=config.get('download_mode', 'batch'),
+            chunk_size=config.get('download_chunk_size', 50),
+            cache=ResponseCache.from_config(config),
+            log=log
+        )
+
+    def _delay(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff * (2 ** attempt)))
+
+    def call(self, fn, *args, cost=1, label='', **kwargs):
+        """Run fn under the rate limit, retrying retryable errors"""
+        for attempt in range(self.retries + 1):
+            with metrics.timer('fetch.rate_wait'):
+                self.limiter.acquire(cost)
+            try:
+                with metrics.timer('fetch.request'):
+                    return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.retries or not is_retryable(e):
+                    raise
+                metrics.count('fetch.retries')
+                delay = self._delay(attempt)
+                self.log(f"  {label or fn.__name__}: {e} - retry "
+                         f"{attempt + 1}/{self.retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def map(self, fn, items):
+        """
+        fn(item) for every item on the worker pool (fn does its own call())
+
+        Returns:
+            tuple: ({item: result}, {item: error string})
+        """
+
+        results, errors = {}, {}
+        if not items:
+            return results, errors
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(fn, item): item for item in items}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    results[item] = future.result()
+                except Exception as e:
+                    errors[item] = str(e)
+
+        return results, errors
+
+    # ─────────────────────────────────────────
+    # CACHE
+    # ─────────────────────────────────────────
+
+    def _cache_key(self, symbol, period, interval, start, end, delta=False):
+        if delta:
+            # The trading date (added by make_key) is the target; start moves
+            # with the store, so it must not split the key
+            return self.cache.make_key('ohlcv-delta', symbol, interval)
+        if start:
+            return self.cache.make_key('ohlcv', symbol, interval, str(start), str(end))
+        return self.cache.make_key('ohlcv', symbol, interval, period)
+
+    def cached(self, symbols, period='6mo', interval='1d', start=None, end=None, delta=False):
+        """{symbol: frame} for the symbols whose response is cached"""
+        if self.cache is None:
+            return {}
+
+        frames = {}
+        for symbol in symbols:
+            frame = self.cache.get(self._cache_key(symbol, period, interval, start, end, delta))
+            if frame is not None:
+                frames[symbol] = frame
+        return frames
+
+    def remember(self, frames, period='6mo', interval='1d', start=None, end=None, delta=False):
+        """Cache non-empty responses"""
+        if self.cache is None:
+            return
+        for symbol, frame in frames.items():
+            if frame is not None and not frame.empty:
+                self.cache.put(self._cache_key(symbol, period, interval, start, end, delta), frame)
+
+    def cache_summary(self):
+        if self.cache is None:
+            return None
+        self.cache.flush()
+        return self.cache.summary()
+
+    # ─────────────────────────────────────────
+    # OHLCV
+    # ─────────────────────────────────────────
+
+    def history(self, symbol, period='6mo', interval='1d', start=None, end=None):
+        """One symbol's OHLCV (empty frame if Yahoo has none)"""
+        hit = self.cached([symbol], period, interval, start, end)
+        if symbol in hit:
+            return hit[symbol]
+
+        hist = self._history(symbol, period, interval, start, end)
+        self.remember({symbol: hist}, period, interval, start, end)
+        return hist
+
+    def _history(self, symbol, period='6mo', interval='1d', start=None, end=None):
+        """history() without the cache"""
+        import yfinance as yf
+
+        def fetch():
+            ticker = yf.Ticker(symbol, session=yahoo_session())
+            if start:
+                hist = ticker.history(start=start, end=end, interval=interval, raise_errors=True)
+            else:
+                hist = ticker.history(period=period, interval=interval, raise_errors=True)
+            return hist.reindex(columns=OHLCV_COLUMNS).dropna(subset=['Close'])
+
+        return self.call(fetch, label=symbol)
+
+    def _download_chunk(self, symbols, period, interval, start, end):
+        """
+        One multi-ticker request; retries symbols that look rate-limited
+
+        Failures are read off the returned frame (symbol missing or all-NaN
+        Close), not yfinance internals. If nothing at all came back the
+        whole request is treated as throttled and retried; symbols missing
+        from an otherwise good response have no data and are not retried.
+        """
+        import yfinance as yf
+
+        frames = {}
+        pending = list(symbols)
+
+        for attempt in range(self.retries + 1):
+            with metrics.timer('fetch.rate_wait'):
+                self.limiter.acquire(len(pending))
+
+            with _DOWNLOAD_LOCK, metrics.timer('fetch.download'):
+                try:
+                    raw = yf.download(
+                        pending,
+                        period=None if start else period,
+                        start=start,
+                        end=end,
+                        interval=interval,
+                        group_by='ticker',
+                        auto_adjust=True,
+                        threads=min(self.workers, len(pending)),
+                        progress=False,
+                        session=yahoo_session()
+                    )
+                    retryable = True
+                except Exception as e:
+                    raw, retryable = None, is_retryable(e)
+
+            got = split_download(raw, pending)
+            frames.update(got)
+            pending = [s for s in pending if s not in frames] if retryable and not got else []
+
+            if not pending or attempt == self.retries:
+                break
+
+            metrics.count('fetch.retries')
+            delay = self._delay(attempt)
+            self.log(f"  No data for {len(pending)} symbols - retry "
+                     f"{attempt + 1}/{self.retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+        return frames
+
+    def fetch(self, symbols, period='6mo', interval='1d', start=None, end=None, delta=False):
+        """
+        OHLCV for many symbols
+
+        mode='batch' sends chunked multi-ticker yf.download requests;
+        mode='per_symbol' fans yf.Ticker.history calls out over the pool.
+
+        Args:
+            symbols: Yahoo symbols (e.g. 'RELIANCE.NS')
+            period: yfinance period string (ignored when start is given)
+            interval: yfinance interval string
+            start: Optional first date (inclusive) instead of a period
+            end: Optional last date (exclusive)
+            delta: start is the caller's last stored bar (bar store delta
+                sync); responses are cached per symbol and trading date, so
+                a same-day rerun is served from disk after the store moved
+
+        Returns:
+            tuple: ({symbol: DataFrame}, [per-chunk stats dicts])
+        """
+
+        frames = self.cached(symbols, period, interval, start, end, delta)
+        metrics.count('fetch.cache_hits', len(frames))
+        if frames:
+            self.log(f"Response cache: {len(frames)}/{len(symbols)} symbols served from disk")
+
+        symbols = [s for s in symbols if s not in frames]
+        if not symbols:
+            return frames, []
+
+        if self.mode == 'per_symbol':
+            chunks = [symbols]
+        else:
+            chunks = list(chunked(symbols, self.chunk_size))
+
+        stats = []
+
+        for n, chunk in enumerate(chunks, start=1):
+            t0 = time.perf_counter()
+            error = None
+
+            try:
+                if self.mode == 'per_symbol':
+                    got, _ = self.map(
+                        lambda s: self._history(s, period, interval, start, end), chunk
+                    )
+                    got = {s: f for s, f in got.items() if not f.empty}
+                else:
+                    got = self._download_chunk(chunk, period, interval, start, end)
+            except Exception as e:
+                got = {}
+                error = str(e)
+
+            elapsed = time.perf_counter() - t0
+            failed = [s for s in chunk if s not in got]
+            frames.update(got)
+            self.remember(got, period, interval, start, end, delta)
+
+            stats.append({
+                'chunk': n,
+                'symbols': len(chunk),
+                'fetched': len(got),
+                'failed': failed,
+                'seconds': round(elapsed, 2),
+                'error': error
+            })
+
+            msg = f"Chunk {n}/{len(chunks)}: {len(got)}/{len(chunk)} symbols in {elapsed:.2f}s"
+            if error:
+                msg += f" (ERROR: {error})"
+            elif failed:
+                msg += f" (failed: {', '.join(failed)})"
+            self.debug(msg, chunk=n, symbols=len(chunk), fetched=len(got),
+                       seconds=round(elapsed, 2))
+
+        return frames, stats
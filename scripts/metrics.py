@@ -0,0 +1,202 @@
+"""
+RUN METRICS: TIMERS, COUNTERS & PROFILING
+Purpose: Show where a run's time goes (network, indicator math, CSV I/O,
+         chart rendering) and keep it run over run so regressions stand out
+Output:  logs/metrics_YYYYMMDD.json (one entry per run, appended)
+         logs/profile_<run>_YYYYMMDD_HHMMSS.prof|.html (profiling only)
+Usage:   with metrics.timer('collector.fetch'): ...
+         @metrics.timer('screener.apply_rules')
+         metrics.count('collector.symbols', len(batch))
+         settings.json "profile": "cprofile" | "pyinstrument" (or PROFILE=...)
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_FILE = f'logs/metrics_{datetime.now().strftime("%Y%m%d")}.json'
+SETTINGS_FILE = 'config/settings.json'
+PROFILERS = ('cprofile', 'pyinstrument')
+
+_LOCK = threading.Lock()
+_TIMERS = {}
+_COUNTERS = {}
+
+
+# ═══════════════════════════════════════════════════════
+# TIMERS & COUNTERS
+# ═══════════════════════════════════════════════════════
+
+def record(name, seconds):
+    """Add one timed call to `name` (thread-safe: fetch workers time too)"""
+    with _LOCK:
+        t = _TIMERS.get(name)
+        if t is None:
+            _TIMERS[name] = [1, seconds, seconds]
+        else:
+            t[0] += 1
+            t[1] += seconds
+            t[2] = max(t[2], seconds)
+
+
+@contextmanager
+def timer(name):
+    """
+    Time a block, or a function when used as a decorator
+
+    Calls under one name accumulate: count, total and worst call.
+    """
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def count(name, n=1):
+    with _LOCK:
+        _COUNTERS[name] = _COUNTERS.get(name, 0) + n
+
+
+def reset():
+    with _LOCK:
+        _TIMERS.clear()
+        _COUNTERS.clear()
+
+
+def snapshot():
+    """Timers (slowest total first) and counters as plain dicts"""
+    with _LOCK:
+        timers = {
+            name: {
+                'calls': calls,
+                'total_sec': round(total, 4),
+                'mean_ms': round(1000 * total / calls, 2),
+                'max_ms': round(1000 * worst, 2)
+            }
+            for name, (calls, total, worst) in sorted(_TIMERS.items(), key=lambda t: -t[1][1])
+        }
+        counters = dict(sorted(_COUNTERS.items()))
+    return {'timers': timers, 'counters': counters}
+
+
+# ═══════════════════════════════════════════════════════
+# PROFILING
+# ═══════════════════════════════════════════════════════
+
+def configured_profiler(path=SETTINGS_FILE):
+    """PROFILE env var, else settings.json profile; None when off"""
+    choice = os.environ.get('PROFILE')
+    if choice is None:
+        try:
+            with open(path, 'r') as f:
+                choice = json.load(f).get('profile')
+        except (OSError, ValueError):
+            choice = None
+
+    if choice in (None, False, '', '0', 'false', 'off'):
+        return None
+    choice = str(choice).lower()
+    return choice if choice in PROFILERS else 'cprofile'
+
+
+@contextmanager
+def profiled(name, profiler=None, log=print):
+    """
+    Profile a block with cProfile or pyinstrument and dump the result
+
+    pyinstrument is optional; without it the run falls back to cProfile.
+    """
+
+    if profiler is None:
+        yield None
+        return
+
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    os.makedirs('logs', exist_ok=True)
+
+    if profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            log("WARNING: pyinstrument not installed - using cProfile")
+            profiler = 'cprofile'
+
+    if profiler == 'pyinstrument':
+        path = f'logs/profile_{name}_{stamp}.html'
+        p = Profiler()
+        p.start()
+        try:
+            yield path
+        finally:
+            p.stop()
+            with open(path, 'w') as f:
+                f.write(p.output_html())
+            log(f"Profile saved: {path}")
+        return
+
+    import cProfile
+    path = f'logs/profile_{name}_{stamp}.prof'
+    p = cProfile.Profile()
+    p.enable()
+    try:
+        yield path
+    finally:
+        p.disable()
+        p.dump_stats(path)
+        log(f"Profile saved: {path} (python -m pstats {path})")
+
+
+# ═══════════════════════════════════════════════════════
+# RUNS
+# ═══════════════════════════════════════════════════════
+
+def save(name, started, seconds, path=METRICS_FILE):
+    """Append this run's metrics to today's metrics file"""
+    runs = []
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                runs = json.load(f)
+        except ValueError:
+            runs = []
+
+    runs.append({
+        'run': name,
+        'started': started.strftime('%Y-%m-%d %H:%M:%S'),
+        'seconds': round(seconds, 3),
+        **snapshot()
+    })
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(runs, f, indent=2)
+
+
+@contextmanager
+def session(name, log=print, top=8, path=METRICS_FILE):
+    """
+    One instrumented run: fresh metrics, optional profile, saved on exit
+
+    Logs the `top` slowest timers so the stage log shows the hot spots.
+    """
+
+    reset()
+    started = datetime.now()
+    start = time.perf_counter()
+    try:
+        with profiled(name, configured_profiler(), log=log):
+            yield
+    finally:
+        seconds = time.perf_counter() - start
+        save(name, started, seconds, path)
+
+        timers = snapshot()['timers']
+        if timers:
+            log(f"Hot spots ({seconds:.2f}s total, details in {path}):")
+            for timer_name, t in list(timers.items())[:top]:
+                log(f"  {timer_name:<36} {t['total_sec']:>8.2f}s  x{t['calls']}")
@@ -0,0 +1,123 @@
+"""
+PARALLEL INDICATORS: PROCESS-POOL SHARDING
+Purpose: Split a large universe across worker processes; bar arrays are
+         handed over through shared memory instead of pickled DataFrames
+"""
+
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import pandas as pd
+
+import indicators
+
+
+# ═══════════════════════════════════════════════════════
+# SHARED MEMORY
+# ═══════════════════════════════════════════════════════
+
+def _attach(name):
+    """Open a block created by the parent; only the parent unlinks it"""
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: pool workers share the parent's resource tracker,
+        # so the duplicate registration is harmless
+        return SharedMemory(name=name)
+
+
+def _shard_worker(spec):
+    """Compute raw_data rows for columns [lo, hi) of the shared panel"""
+    t0 = time.perf_counter()
+    lo, hi = spec['lo'], spec['hi']
+
+    sub = {'symbols': spec['symbols'], 'dates': spec['dates']}
+    for field, name in spec['blocks'].items():
+        shm = _attach(name)
+        try:
+            full = np.ndarray(spec['shape'], dtype='f8', buffer=shm.buf)
+            sub[field] = np.ascontiguousarray(full[:, lo:hi])
+            del full
+        finally:
+            shm.close()
+
+    values = indicators.compute(sub)
+    frame = indicators.latest_frame(sub, values, spec['resistance_since'])
+
+    return {
+        'pid': os.getpid(),
+        'symbols': hi - lo,
+        'seconds': time.perf_counter() - t0,
+        'frame': frame
+    }
+
+
+# ═══════════════════════════════════════════════════════
+# SHARDED COMPUTE
+# ═══════════════════════════════════════════════════════
+
+def compute_sharded(panel, workers, resistance_since=None, shards_per_worker=2, log=print):
+    """
+    indicators.compute() + latest_frame() across a process pool
+
+    Args:
+        panel: build_panel() dict
+        workers: Number of worker processes
+        resistance_since: Passed through to latest_frame()
+        shards_per_worker: Extra shards so fast workers pick up slack
+
+    Returns:
+        DataFrame with indicators.RAW_DATA_COLUMNS, in panel symbol order
+    """
+
+    symbols = panel['symbols']
+    shape = panel['close'].shape
+    bounds = np.array_split(np.arange(len(symbols)), max(1, workers * shards_per_worker))
+    bounds = [(int(b[0]), int(b[-1]) + 1) for b in bounds if len(b)]
+
+    blocks = {}
+    try:
+        for field in indicators.PANEL_FIELDS:
+            arr = np.ascontiguousarray(panel[field], dtype='f8')
+            shm = SharedMemory(create=True, size=max(1, arr.nbytes))
+            np.ndarray(shape, dtype='f8', buffer=shm.buf)[:] = arr
+            blocks[field] = shm
+
+        specs = [{
+            'blocks': {field: shm.name for field, shm in blocks.items()},
+            'shape': shape,
+            'dates': panel['dates'],
+            'symbols': symbols[lo:hi],
+            'lo': lo,
+            'hi': hi,
+            'resistance_since': resistance_since
+        } for lo, hi in bounds]
+
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_shard_worker, specs))
+        elapsed = time.perf_counter() - t0
+
+    finally:
+        for shm in blocks.values():
+            shm.close()
+            shm.unlink()
+
+    per_worker = defaultdict(lambda: [0, 0.0])
+    for r in results:
+        per_worker[r['pid']][0] += r['symbols']
+        per_worker[r['pid']][1] += r['seconds']
+
+    log(f"Parallel indicators: {len(symbols)} symbols, {len(bounds)} shards, "
+        f"{workers} workers, {elapsed:.2f}s wall")
+    for n, (pid, (count, seconds)) in enumerate(sorted(per_worker.items()), start=1):
+        rate = count / seconds if seconds else 0
+        log(f"  Worker {n} (pid {pid}): {count} symbols in {seconds:.2f}s ({rate:,.0f} symbols/s)")
+
+    frames = [r['frame'] for r in results if not r['frame'].empty]
+    if not frames:
+        return pd.DataFrame(columns=indicators.RAW_DATA_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
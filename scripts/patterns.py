@@ -0,0 +1,150 @@
+"""
+CHART PATTERNS
+Purpose: Flag consolidation bases, volatility contraction (VCP), flags
+         and pocket pivots on every (date, symbol) of a panel at once,
+         with the pivot level each setup breaks out from
+Columns: Base, VCP, Flag, Pocket_Pivot - 1.0 when the pattern is present
+         Base_Depth_Pct - range of the base window as % of its high
+         Pivot          - breakout level of the strongest pattern found
+                          (VCP, then Flag, Base, Pocket_Pivot)
+         Pivot_Dist_Pct - close vs Pivot in %
+         Pattern        - the tags, e.g. "VCP|Base" (frames only)
+
+Every pattern is judged on the window before the current bar, so the
+current bar can be the breakout. All windows are sliding-window views
+along time (indicators.rolling_*); there are no per-symbol loops.
+"""
+
+import numpy as np
+
+import indicators
+
+# Consolidation base: the last BASE_BARS bars within BASE_MAX_DEPTH %
+BASE_BARS = 25
+BASE_MAX_DEPTH = 15
+
+# VCP: VCP_SEGMENTS back-to-back windows whose depth shrinks each time,
+# the last under VCP_MAX_DEPTH %, on drying-up volume
+VCP_SEGMENT = 15
+VCP_SEGMENTS = 3
+VCP_MAX_DEPTH = 10
+
+# Flag: a POLE_MIN_GAIN % run over POLE_BARS, then FLAG_BARS bars within
+# FLAG_MAX_DEPTH % that give back no more than half the pole
+POLE_BARS = 10
+POLE_MIN_GAIN = 15
+FLAG_BARS = 5
+FLAG_MAX_DEPTH = 8
+
+# Pocket pivot: an up day on more volume than any down day of the last
+# POCKET_LOOKBACK bars
+POCKET_LOOKBACK = 10
+
+# Trend filter shared by every pattern
+TREND_MA = 50
+
+PATTERNS = ['VCP', 'Flag', 'Base', 'Pocket_Pivot']     # pivot priority
+
+# Bars a symbol needs before every pattern can be judged
+MIN_BARS = max(VCP_SEGMENT * VCP_SEGMENTS, POLE_BARS + FLAG_BARS, BASE_BARS, TREND_MA) + 1
+
+
+def _depth(high, low):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 * (high - low) / high
+
+
+def detect(panel):
+    """
+    Pattern flags and pivot levels over a build_panel() dict
+
+    Returns:
+        dict: {column: (T x N) float array}
+    """
+
+    # Windows and shifts run over each symbol's own bars (see
+    # indicators.bar_index), so a missing date does not blank them
+    index = indicators.bar_index(~np.isnan(panel['close']))
+    close, high, low, volume = (indicators.pack(panel[f], index)
+                                for f in ('close', 'high', 'low', 'volume'))
+    shift = indicators.shift
+
+    with np.errstate(invalid='ignore'):
+        uptrend = close > indicators.rolling_mean(close, TREND_MA)
+
+        # Base over the prior BASE_BARS bars
+        base_high = shift(indicators.rolling_max(high, BASE_BARS))
+        base_low = shift(indicators.rolling_min(low, BASE_BARS))
+        base_depth = _depth(base_high, base_low)
+        base = uptrend & (base_depth <= BASE_MAX_DEPTH)
+
+        # VCP: the same window statistics, shifted back one segment at a time
+        seg_high = shift(indicators.rolling_max(high, VCP_SEGMENT))
+        seg_low = shift(indicators.rolling_min(low, VCP_SEGMENT))
+        seg_depth = _depth(seg_high, seg_low)
+        seg_volume = shift(indicators.rolling_mean(volume, VCP_SEGMENT))
+
+        vcp = uptrend & (seg_depth <= VCP_MAX_DEPTH)
+        later_depth = seg_depth
+        for k in range(1, VCP_SEGMENTS):
+            earlier_depth = shift(seg_depth, k * VCP_SEGMENT)
+            vcp &= earlier_depth > later_depth
+            later_depth = earlier_depth
+        vcp &= seg_volume < shift(seg_volume, (VCP_SEGMENTS - 1) * VCP_SEGMENT)
+
+        # Flag: pole ending where the flag window starts
+        flag_high = shift(indicators.rolling_max(high, FLAG_BARS))
+        flag_low = shift(indicators.rolling_min(low, FLAG_BARS))
+        pole_top = shift(close, FLAG_BARS + 1)
+        pole_start = shift(close, FLAG_BARS + 1 + POLE_BARS)
+        flag = (
+            (100 * (pole_top / pole_start - 1) >= POLE_MIN_GAIN)
+            & (_depth(flag_high, flag_low) <= FLAG_MAX_DEPTH)
+            & (flag_low >= (pole_start + pole_top) / 2)
+        )
+
+        # Pocket pivot
+        prev_close = shift(close)
+        down_volume = np.where(close < prev_close, volume, 0.0)
+        pocket = (
+            uptrend
+            & (close > prev_close)
+            & (volume > shift(indicators.rolling_max(down_volume, POCKET_LOOKBACK)))
+        )
+
+    # Nothing is judged until the symbol has MIN_BARS bars of its own
+    seasoned = np.cumsum(~np.isnan(close), axis=0) >= MIN_BARS
+    flags = {'VCP': vcp & seasoned, 'Flag': flag & seasoned,
+             'Base': base & seasoned, 'Pocket_Pivot': pocket & seasoned}
+    levels = {'VCP': seg_high, 'Flag': flag_high, 'Base': base_high, 'Pocket_Pivot': high}
+
+    pivot = np.full(close.shape, np.nan)
+    for name in reversed(PATTERNS):
+        pivot = np.where(flags[name], levels[name], pivot)
+
+    out = {name: flags[name].astype(float) for name in PATTERNS}
+    out['Base_Depth_Pct'] = base_depth
+    out['Pivot'] = pivot
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['Pivot_Dist_Pct'] = 100 * (close / pivot - 1)
+
+    out = {name: indicators.unpack(x, index) for name, x in out.items()}
+    for name in PATTERNS:
+        out[name] = np.nan_to_num(out[name])   # flags stay 0 on dates without a bar
+    return out
+
+
+# Tag text for every combination of flags, indexed by bitmask
+_TAGS = np.array(
+    ['|'.join(name for bit, name in enumerate(PATTERNS) if code >> bit & 1)
+     for code in range(1 << len(PATTERNS))],
+    dtype=object
+)
+
+
+def tags(columns):
+    """'VCP|Base'-style tag text for flag columns of any shape ('' = none)"""
+    code = np.zeros(np.shape(columns[PATTERNS[0]]), dtype=np.int64)
+    for bit, name in enumerate(PATTERNS):
+        code |= (np.asarray(columns[name]) > 0).astype(np.int64) << bit
+    return _TAGS[code]
@@ -0,0 +1,224 @@
+"""
+PIPELINE: SINGLE-PROCESS DAILY RUN
+Purpose: Run every stage in one interpreter, handing DataFrames from stage
+         to stage in memory instead of through CSV files
+Usage:   python scripts/pipeline.py [--mode testing] [--from-stage screen]
+                                    [--only analyze,notify] [--no-save]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+from datetime import datetime
+
+import metrics
+import stage_log
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOG_FILE = f'logs/pipeline_{datetime.now().strftime("%Y%m%d")}.txt'
+TIMINGS_FILE = f'logs/pipeline_timings_{datetime.now().strftime("%Y%m%d")}.json'
+
+
+# ═══════════════════════════════════════════════════════
+# LOGGING
+# ═══════════════════════════════════════════════════════
+
+log = stage_log.get_logger('pipeline', LOG_FILE)
+
+
+# ═══════════════════════════════════════════════════════
+# STAGES
+# ═══════════════════════════════════════════════════════
+
+def stage_module(name):
+    """Import a stage script on first use (module-level setup runs then)"""
+    return importlib.import_module(STAGES[name]['module'])
+
+
+def run_collect(args, inputs):
+    return stage_module('collect').run(
+        backfill=args.backfill, verify=args.verify, resume=args.resume,
+        repair=args.repair, persist=not args.no_save
+    )
+
+
+def run_screen(args, inputs):
+    return stage_module('screen').run(inputs.get('collect'), mode=args.mode, persist=not args.no_save)
+
+
+def run_analyze(args, inputs):
+    return stage_module('analyze').run(inputs.get('screen'), persist=not args.no_save)
+
+
+def run_notify(args, inputs):
+    return stage_module('notify').run(inputs.get('analyze'))
+
+
+def run_track(args, inputs):
+    return stage_module('track').run(inputs.get('analyze'))
+
+
+def run_report(args, inputs):
+    return stage_module('report').run()
+
+
+# Insertion order is a valid topological order. 'after' orders a stage
+# behind one whose result it uses when available without depending on it:
+# the tracker still updates open positions when the analyzer fails, and
+# picks up today's signals only if they exist
+STAGES = {
+    'collect': {'module': '1_data_collector', 'deps': (), 'run': run_collect},
+    'screen': {'module': '2_screener', 'deps': ('collect',), 'run': run_screen},
+    'analyze': {'module': '3_analyzer', 'deps': ('screen',), 'run': run_analyze},
+    'notify': {'module': '4_notifier', 'deps': ('analyze',), 'run': run_notify},
+    'track': {'module': '5_tracker', 'deps': (), 'after': ('analyze',), 'run': run_track},
+    'report': {'module': '6_reporter', 'deps': ('track',), 'run': run_report},
+}
+
+# Only on Sundays unless asked for by name
+WEEKLY_STAGES = {'report'}
+
+
+def downstream(stage):
+    """stage and every stage that depends on or runs after it, directly or not"""
+    selected = {stage}
+    for name, spec in STAGES.items():
+        if any(dep in selected for dep in spec['deps'] + spec.get('after', ())):
+            selected.add(name)
+    return selected
+
+
+def select_stages(args):
+    """Stages to run, in DAG order"""
+    if args.only:
+        selected = set(args.only)
+        explicit = selected
+    elif args.from_stage:
+        selected = downstream(args.from_stage)
+        explicit = {args.from_stage}
+    else:
+        selected = set(STAGES)
+        explicit = set()
+
+    sunday = datetime.now().isoweekday() == 7
+    return [name for name in STAGES
+            if name in selected and (sunday or name not in WEEKLY_STAGES or name in explicit)]
+
+
+# ═══════════════════════════════════════════════════════
+# RUN
+# ═══════════════════════════════════════════════════════
+
+def run(args):
+    """
+    Run the selected stages
+
+    A stage gets the in-memory result of each dependency that ran in this
+    process; otherwise it reads that dependency's artifact from disk as
+    when run on its own. A failed stage skips everything that depends on
+    it; stages that only run after it go ahead without its result.
+    """
+
+    stages = select_stages(args)
+    inputs = {}
+    failed = set()
+    timings = []
+
+    log("=" * 60)
+    log(f"PIPELINE: {' -> '.join(stages) or 'nothing to run'}")
+    log("=" * 60)
+
+    for name in stages:
+        spec = STAGES[name]
+        blocked = [dep for dep in spec['deps'] if dep in failed]
+        if blocked:
+            log(f"SKIP {name}: upstream {', '.join(blocked)} failed")
+            failed.add(name)
+            timings.append({'stage': name, 'status': 'skipped', 'seconds': 0.0})
+            continue
+        for dep in spec.get('after', ()):
+            if dep in failed:
+                log(f"{name}: running without {dep} (failed)")
+
+        log(f"▶️ {name}")
+        start = time.perf_counter()
+        try:
+            with metrics.timer(f'stage.{name}'):
+                inputs[name] = spec['run'](args, inputs)
+            status = 'ok'
+        except Exception as e:
+            log(f"ERROR in {name}: {type(e).__name__}: {e}")
+            failed.add(name)
+            status = 'failed'
+        elapsed = time.perf_counter() - start
+
+        timings.append({'stage': name, 'status': status, 'seconds': round(elapsed, 3)})
+        log(f"{name}: {status} in {elapsed:.2f}s")
+
+    save_timings(timings)
+
+    log("=" * 60)
+    for t in timings:
+        log(f"  {t['stage']:<8} {t['status']:<8} {t['seconds']:>8.2f}s")
+    log(f"  {'total':<8} {'':<8} {sum(t['seconds'] for t in timings):>8.2f}s")
+    log("=" * 60)
+
+    return not failed
+
+
+def save_timings(timings):
+    """Append this run's per-stage wall times to today's timings file"""
+    runs = []
+    if os.path.exists(TIMINGS_FILE):
+        try:
+            with open(TIMINGS_FILE, 'r') as f:
+                runs = json.load(f)
+        except ValueError:
+            runs = []
+
+    runs.append({'started': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'stages': timings})
+    with open(TIMINGS_FILE, 'w') as f:
+        json.dump(runs, f, indent=2)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the daily pipeline in one process")
+    parser.add_argument("--mode", default="standard",
+                        help="Screening mode (a key of \"modes\" in config/filters.json)")
+    parser.add_argument("--from-stage", choices=list(STAGES),
+                        help="Start at this stage and run everything downstream of it")
+    parser.add_argument("--only", type=lambda s: [x.strip() for x in s.split(',') if x.strip()],
+                        help="Comma-separated stages to run (inputs read from disk)")
+    parser.add_argument("--no-save", action="store_true",
+                        help="Keep raw data, shortlist and signals in memory only")
+    parser.add_argument("--backfill", action="store_true", help="Collector: full re-download")
+    parser.add_argument("--verify", action="store_true", help="Collector: verify incremental indicators")
+    parser.add_argument("--resume", action="store_true", help="Collector: resume an interrupted run")
+    parser.add_argument("--repair", action="store_true", help="Collector: fill bar store gaps")
+    args = parser.parse_args(argv)
+
+    unknown = [s for s in args.only or [] if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+
+    return args
+
+
+def main():
+    # Stage scripts use paths relative to the project root
+    os.chdir(PROJECT_ROOT)
+    os.makedirs('logs', exist_ok=True)
+    sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+
+    args = parse_args()
+    with metrics.session('pipeline', log=log):
+        ok = run(args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
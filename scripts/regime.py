@@ -0,0 +1,249 @@
+"""
+MARKET REGIME: INDEX HISTORIES & REGIME FEATURES
+Purpose: Keep Nifty, VIX and sector index bars current in the bar store and
+         answer "what is the market doing" for every stage in-process
+Output:  data/market_regime.json (latest snapshot, for anything outside Python)
+"""
+
+import json
+import numpy as np
+import pandas as pd
+
+import bar_store
+import breadth
+
+NIFTY = '^NSEI'
+VIX = '^INDIAVIX'
+
+SECTOR_INDICES = {
+    '^NSEBANK': 'Bank',
+    '^CNXIT': 'IT',
+    '^CNXAUTO': 'Auto',
+    '^CNXPHARMA': 'Pharma',
+    '^CNXFMCG': 'FMCG',
+    '^CNXMETAL': 'Metal',
+    '^CNXREALTY': 'Realty',
+    '^CNXENERGY': 'Energy'
+}
+
+SNAPSHOT_FILE = 'data/market_regime.json'
+SETTINGS_FILE = 'config/settings.json'
+
+# Bars read back per index: enough for MA200 + its slope and a 1y VIX rank
+LOOKBACK_BARS = 260
+SLOPE_BARS = 10
+VIX_MAX = 20
+
+_SNAPSHOT = {}
+
+
+# ═══════════════════════════════════════════════════════
+# INDEX HISTORIES
+# ═══════════════════════════════════════════════════════
+
+def index_symbols(config=None):
+    """Nifty, VIX and the configured sector indices"""
+    sectors = (config or {}).get('regime_sector_indices', SECTOR_INDICES)
+    return [NIFTY, VIX, *sectors]
+
+
+def update(fetcher, config=None, backfill=False, store_dir=bar_store.STORE_DIR, log=print):
+    """Delta-sync every index into the bar store"""
+    symbols = index_symbols(config)
+    stats = bar_store.sync(
+        symbols,
+        fetcher,
+        backfill_period=(config or {}).get('bar_store_backfill_period', '2y'),
+        full=backfill,
+        store_dir=store_dir,
+        log=log
+    )
+    if stats['failed']:
+        log(f"  WARNING: No index data for {', '.join(stats['failed'])}")
+    return stats
+
+
+def closes(symbol, store_dir=bar_store.STORE_DIR, fetcher=None, bars=LOOKBACK_BARS):
+    """
+    Last `bars` closes of an index as a Series
+
+    Read from the store; with no stored bars and a fetcher, fetched directly.
+    """
+
+    stored = bar_store.load_bars(symbol, store_dir)
+    if stored is not None and len(stored):
+        stored = stored[-bars:]
+        return pd.Series(np.asarray(stored['close']),
+                         index=pd.DatetimeIndex(np.asarray(stored['date'])))
+
+    if fetcher is None:
+        return pd.Series(dtype=float)
+
+    hist = fetcher.history(symbol, period='2y')
+    series = hist['Close'].iloc[-bars:]
+    if series.index.tz is not None:
+        series.index = series.index.tz_localize(None)
+    return series
+
+
+# ═══════════════════════════════════════════════════════
+# FEATURES
+# ═══════════════════════════════════════════════════════
+
+def trend(series, slope_bars=SLOPE_BARS):
+    """Close, MA50/MA200 and their % slope over slope_bars"""
+    ma50 = series.rolling(50).mean()
+    ma200 = series.rolling(200).mean()
+
+    def slope(ma):
+        if len(ma) <= slope_bars or pd.isna(ma.iloc[-1 - slope_bars]):
+            return np.nan
+        return (ma.iloc[-1] / ma.iloc[-1 - slope_bars] - 1) * 100
+
+    return {
+        'close': series.iloc[-1],
+        'ma50': ma50.iloc[-1],
+        'ma200': ma200.iloc[-1],
+        'ma50_slope': slope(ma50),
+        'ma200_slope': slope(ma200)
+    }
+
+
+def percentile_rank(series):
+    """% of the window at or below the latest value"""
+    values = series.dropna().to_numpy()
+    if len(values) == 0:
+        return np.nan
+    return 100 * np.mean(values <= values[-1])
+
+
+def _num(value, digits=2):
+    return None if pd.isna(value) else float(round(value, digits))
+
+
+def compute(config=None, store_dir=bar_store.STORE_DIR, fetcher=None):
+    """
+    Regime snapshot from stored index bars
+
+    Returns:
+        dict: Nifty trend, VIX level/percentile, sector index breadth,
+        per-sector trend, watchlist breadth (when collected) and the
+        GREEN/YELLOW decision
+    """
+
+    nifty = closes(NIFTY, store_dir, fetcher)
+    if nifty.empty:
+        raise ValueError(f"No {NIFTY} bars in {store_dir}")
+    t = trend(nifty)
+
+    regime = {
+        'Date': nifty.index[-1].strftime('%Y-%m-%d'),
+        'Nifty_Close': _num(t['close']),
+        'MA50': _num(t['ma50']),
+        'MA200': _num(t['ma200']),
+        'MA50_Slope': _num(t['ma50_slope'], 3),
+        'MA200_Slope': _num(t['ma200_slope'], 3),
+        'Above_MA50': bool(t['close'] > t['ma50']),
+        'Above_MA200': bool(t['close'] > t['ma200'])
+    }
+
+    # A failed VIX fetch leaves VIX unknown, which the decision treats as neutral
+    vix = closes(VIX, store_dir, fetcher).dropna()
+    regime['VIX'] = _num(vix.iloc[-1]) if len(vix) else None
+    regime['VIX_Percentile'] = _num(percentile_rank(vix), 1) if len(vix) else None
+
+    sectors = {}
+    names = (config or {}).get('regime_sector_indices', SECTOR_INDICES)
+    for symbol, name in names.items():
+        series = closes(symbol, store_dir)
+        if len(series) < 50:
+            continue
+        s = trend(series)
+        sectors[name] = {
+            'Close': _num(s['close']),
+            'Above_MA50': bool(s['close'] > s['ma50']),
+            'MA50_Slope': _num(s['ma50_slope'], 3)
+        }
+
+    regime['Sectors'] = sectors
+    regime['Sector_Breadth'] = (
+        _num(100 * np.mean([s['Above_MA50'] for s in sectors.values()]), 1)
+        if sectors else None
+    )
+
+    stocks = breadth.latest()
+    if stocks is not None:
+        regime['Breadth_Date'] = stocks['Date']
+        regime['Pct_Above_MA50'] = _num(stocks['Pct_Above_MA50'])
+        regime['Pct_Above_MA200'] = _num(stocks['Pct_Above_MA200'])
+        regime['AD_Line'] = int(stocks['AD_Line'])
+        regime['McClellan'] = _num(stocks['McClellan'])
+        regime['Net_New_Highs'] = int(stocks['Net_New_Highs'])
+
+    # Optional breadth gate; 0 (the default) leaves the decision index-only
+    min_breadth = (config or {}).get('regime_min_breadth_pct', 0)
+    broad = regime.get('Pct_Above_MA50') is None or regime['Pct_Above_MA50'] >= min_breadth
+    calm = regime['VIX'] is None or regime['VIX'] < VIX_MAX
+
+    if regime['Above_MA50'] and regime['Above_MA200'] and calm and broad:
+        regime['Status'] = 'GREEN'
+        regime['Trade'] = True
+    else:
+        regime['Status'] = 'YELLOW'
+        regime['Trade'] = False
+
+    return regime
+
+
+# ═══════════════════════════════════════════════════════
+# IN-PROCESS API
+# ═══════════════════════════════════════════════════════
+
+def settings(path=SETTINGS_FILE):
+    """settings.json, for stages that do not load it themselves"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def current(config=None, store_dir=bar_store.STORE_DIR, fetcher=None, refresh=False):
+    """
+    Regime snapshot, computed once per process from the local store
+
+    Stages call this instead of re-reading market_regime.json or
+    re-fetching index data; refresh=True recomputes after update().
+    """
+
+    if refresh or store_dir not in _SNAPSHOT:
+        _SNAPSHOT[store_dir] = compute(config or settings(), store_dir, fetcher)
+    return _SNAPSHOT[store_dir]
+
+
+def latest(config=None, store_dir=bar_store.STORE_DIR, log=print):
+    """current(), or None with a warning if the index bars are missing"""
+    try:
+        return current(config, store_dir)
+    except Exception as e:
+        log(f"WARNING: Market regime unavailable: {e}")
+        return None
+
+
+def save(regime, path=SNAPSHOT_FILE):
+    with open(path, 'w') as f:
+        json.dump(regime, f, indent=2)
+
+
+def describe(regime):
+    """One-line summary for stage logs"""
+    vix = regime['VIX'] if regime.get('VIX') is not None else 'n/a'
+    line = f"{regime['Status']} (Nifty: {regime['Nifty_Close']}, VIX: {vix}"
+    if regime.get('VIX_Percentile') is not None:
+        line += f" / {regime['VIX_Percentile']:.0f}th pct"
+    if regime.get('Sector_Breadth') is not None:
+        line += f", sectors above MA50: {regime['Sector_Breadth']:.0f}%"
+    if regime.get('Pct_Above_MA50') is not None:
+        line += (f", stocks above MA50/MA200: {regime['Pct_Above_MA50']:.0f}%/"
+                 f"{regime['Pct_Above_MA200']:.0f}%, McClellan: {regime['McClellan']}")
+    return line + ")"
@@ -0,0 +1,322 @@
+"""
+SCREENER REPLAY: THE FILTERS OVER HISTORY AS ONE PANEL
+Purpose: Evaluate the screening rules on every past day at once, either
+         from the bar store (indicators recomputed as dates x symbols
+         arrays) or from the archived raw_data files, giving per-day
+         shortlists and funnel statistics
+Output:  output/replay/shortlists_<mode>_<start>_<end>.cols (+ .csv)
+         output/replay/funnel_<mode>_<start>_<end>.csv
+"""
+
+import os
+import glob
+import numpy as np
+import pandas as pd
+
+import bar_store
+import columnar
+import delivery
+import indicators
+import levels
+import patterns
+import rules
+import strength
+import timeframes
+
+REPLAY_DIR = 'output/replay/'
+ARCHIVE_DIR = 'data/'
+WATCHLIST_FILE = 'data/master_watchlist.csv'
+
+
+# ═══════════════════════════════════════════════════════
+# PANELS
+# ═══════════════════════════════════════════════════════
+
+def as_raw(columns):
+    """
+    Round like raw_data rows do (ints truncated, the rest to 2 dp) so a
+    replayed day sees the numbers the live screener would have seen
+    """
+
+    out = {}
+    for name, arr in columns.items():
+        if name in indicators.INT_COLUMNS:
+            out[name] = np.trunc(np.nan_to_num(arr))
+        else:
+            out[name] = np.round(arr, 2)
+    return out
+
+
+def window(dates, start=None, end=None):
+    """Row slice of `dates` (datetime64[D], sorted) within [start, end]"""
+    lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start, 'D'))
+    hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, 'D'), side='right')
+    return slice(lo, hi)
+
+
+def delivery_panel(dates, symbols, history):
+    """Delivery % on the same date as each bar; NaN where not ingested"""
+    out = np.full((len(dates), len(symbols)), np.nan)
+    if history['pct'].size == 0:
+        return out
+
+    col_of = {s: j for j, s in enumerate(history['symbols'].tolist())}
+    cols = np.array([col_of.get(s.replace('.NS', ''), -1) for s in symbols])
+    rows = np.searchsorted(history['dates'], dates)
+    rows_ok = (rows < len(history['dates'])) & (history['dates'][np.minimum(rows, len(history['dates']) - 1)] == dates)
+
+    r = np.flatnonzero(rows_ok)
+    c = np.flatnonzero(cols >= 0)
+    out[np.ix_(r, c)] = history['pct'][np.ix_(rows[r], cols[c])]
+    return out
+
+
+def store_panel(symbols, start=None, end=None, store_dir=bar_store.STORE_DIR):
+    """
+    Raw_data columns for every stored day as (dates x symbols) arrays
+
+    Indicators run over each symbol's whole stored history (the same
+    warm-up the collector's checkpoint has) before the window is cut.
+
+    Returns:
+        tuple: (dates, symbols, {column: (T x N) array}, eligible mask)
+    """
+
+    panel = bar_store.load_panel(symbols, store_dir)
+    values = indicators.compute(panel)
+
+    columns = {field.capitalize(): panel[field] for field in indicators.PANEL_FIELDS}
+    columns.update(values)
+    columns.update(strength.excess_returns(panel['close'], strength.index_closes(panel['dates'], store_dir)))
+    for timeframe in timeframes.TIMEFRAMES:
+        columns.update(timeframes.as_of(panel['dates'], panel['close'], timeframe))
+    columns.update(patterns.detect(panel))
+    columns.update(levels.as_of_panel(panel))
+
+    # A day counts only once the symbol has MIN_BARS bars, as in the collector
+    live = ~np.isnan(panel['close'])
+    eligible = live & (np.cumsum(live, axis=0) >= indicators.MIN_BARS)
+
+    rows = window(panel['dates'], start, end)
+    dates = panel['dates'][rows]
+    columns = as_raw({name: arr[rows] for name, arr in columns.items()})
+    columns['Delivery_Pct'] = delivery_panel(dates, panel['symbols'], delivery.load_history())
+
+    # Ranked per day over the eligible symbols, as the screener ranks a
+    # day's raw_data
+    eligible = eligible[rows]
+    columns.update(strength.rank(columns, eligible.shape, eligible))
+    columns['Pattern'] = patterns.tags(columns)
+
+    return dates, [s.replace('.NS', '') for s in panel['symbols']], columns, eligible
+
+
+def archive_files(archive_dir=ARCHIVE_DIR, start=None, end=None):
+    """{datetime64[D]: path} for raw_data_YYYYMMDD files (.cols preferred)"""
+    files = {}
+    for path in sorted(glob.glob(os.path.join(archive_dir, 'raw_data_*.csv')) +
+                       glob.glob(os.path.join(archive_dir, 'raw_data_*' + columnar.EXTENSION))):
+        stamp = os.path.basename(path).split('_')[2].split('.')[0]
+        if len(stamp) != 8 or not stamp.isdigit():
+            continue
+        day = np.datetime64(f"{stamp[:4]}-{stamp[4:6]}-{stamp[6:]}", 'D')
+        if path.endswith(columnar.EXTENSION) or day not in files:
+            files[day] = path
+
+    dates = np.array(sorted(files), dtype='datetime64[D]')
+    return {d: files[d] for d in dates[window(dates, start, end)]}
+
+
+def archive_panel(names, start=None, end=None, archive_dir=ARCHIVE_DIR):
+    """
+    The same arrays from archived raw_data files, one row per run date
+
+    Only `names` columns are read; a symbol absent from a day's file is
+    not eligible that day.
+    """
+
+    files = archive_files(archive_dir, start, end)
+    frames = []
+    for day, path in files.items():
+        if path.endswith(columnar.EXTENSION):
+            available = {c for c, _ in columnar.schema(path)}
+            df = columnar.read(path, ['Symbol'] + [c for c in names if c in available])
+        else:
+            df = pd.read_csv(path)
+        frames.append(df.assign(_day=day))
+
+    dates = np.array(list(files), dtype='datetime64[D]')
+    if not frames:
+        return dates, [], {}, np.zeros((0, 0), dtype=bool)
+
+    rows = pd.concat(frames, ignore_index=True)
+    sym_codes, symbols = pd.factorize(rows['Symbol'].astype(str))
+    day_codes = np.searchsorted(dates, rows['_day'].to_numpy(dtype='datetime64[D]'))
+
+    shape = (len(dates), len(symbols))
+    eligible = np.zeros(shape, dtype=bool)
+    eligible[day_codes, sym_codes] = True
+
+    columns = {}
+    for name in names:
+        if name not in rows:
+            continue
+        if rows[name].dtype == object:
+            arr = np.full(shape, '', dtype=object)
+            arr[day_codes, sym_codes] = rows[name].fillna('').to_numpy()
+        else:
+            arr = np.full(shape, np.nan)
+            arr[day_codes, sym_codes] = rows[name].to_numpy(dtype=float)
+        columns[name] = arr
+
+    return dates, list(symbols), columns, eligible
+
+
+def archive_timeframes(dates, symbols, wanted, store_dir=bar_store.STORE_DIR):
+    """
+    W_* / M_* columns for archived days, which raw_data files do not carry
+
+    The live screener adds them on the run day from the stored daily bars
+    up to that day; each archived day here sees the same bars - its last
+    stored bar on or before the run date.
+    """
+
+    if not wanted:
+        return {}
+
+    shape = (len(dates), len(symbols))
+    panel = bar_store.load_panel([s + '.NS' for s in symbols], store_dir)
+    columns = {name: np.full(shape, np.nan) for tf in wanted for name in timeframes.column_names(tf)}
+    if not len(panel['dates']):
+        return columns
+
+    rows = np.searchsorted(panel['dates'], dates, side='right') - 1
+    days = np.flatnonzero(rows >= 0)
+    col_of = {s: j for j, s in enumerate(symbols)}
+    cols = np.array([col_of[s.replace('.NS', '')] for s in panel['symbols']], dtype=int)
+
+    for timeframe in wanted:
+        for name, arr in timeframes.as_of(panel['dates'], panel['close'], timeframe).items():
+            columns[name][np.ix_(days, cols)] = arr[rows[days]]
+
+    return columns
+
+
+# ═══════════════════════════════════════════════════════
+# REPLAY
+# ═══════════════════════════════════════════════════════
+
+def evaluate(ruleset, dates, symbols, columns, eligible):
+    """
+    All days and symbols through the rules in one pass
+
+    Returns:
+        tuple: (shortlists DataFrame, funnel DataFrame with one row per day)
+    """
+
+    shape = eligible.shape
+    cols = ruleset.columns(columns, shape)
+    if ruleset.select == 'score':
+        mask, survivors, total, breakdown = ruleset.select_top(cols, base=eligible)
+        cols = dict(cols, Score=total, **breakdown)
+    else:
+        mask, survivors = ruleset.evaluate(cols, base=eligible)
+
+    # Per-day shortlists: one row per (date, symbol) that passed
+    t, n = np.nonzero(mask)
+    table = {'Date': pd.DatetimeIndex(dates[t].astype('datetime64[ns]')).strftime('%Y-%m-%d'),
+             'Symbol': np.asarray(symbols, dtype=object)[n]}
+    for name in rules.shortlist_columns(ruleset)[1:]:
+        source = cols if name in cols else columns
+        if name not in source:
+            table[name] = np.nan
+            continue
+        values = source[name][t, n]
+        table[name] = np.round(values, 2) if values.dtype.kind == 'f' else values
+    shortlists = pd.DataFrame(table)
+    shortlists['Mode'] = ruleset.mode
+
+    funnel = pd.DataFrame({'Date': pd.DatetimeIndex(dates.astype('datetime64[ns]'))})
+    funnel['Universe'] = eligible.sum(axis=1)
+    for rule, counts in zip(ruleset.gates, survivors):
+        funnel[rule.name] = counts
+    funnel['Shortlisted'] = mask.sum(axis=1)
+
+    return shortlists, funnel
+
+
+def summarize(ruleset, funnel):
+    """
+    Aggregate funnel: per rule, survivors per day and how many it removed
+
+    Returns:
+        DataFrame: one row per rule
+    """
+
+    rows = []
+    before = funnel['Universe']
+    for rule in ruleset.gates:
+        after = funnel[rule.name]
+        removed = (before - after).sum()
+        rows.append({
+            'Layer': rule.layer,
+            'Rule': rule.name,
+            'Mean_Remain': round(after.mean(), 1),
+            'Min_Remain': int(after.min()),
+            'Max_Remain': int(after.max()),
+            'Removed': int(removed),
+            'Removed_Pct': round(100 * removed / max(before.sum(), 1), 1)
+        })
+        before = after
+    return pd.DataFrame(rows)
+
+
+def run(ruleset, source='store', start=None, end=None, symbols=None,
+        store_dir=bar_store.STORE_DIR, archive_dir=ARCHIVE_DIR,
+        out_dir=REPLAY_DIR, persist=True, log=print):
+    """
+    Replay one mode over history
+
+    Args:
+        source: 'store' (recompute from stored bars) or 'archive'
+            (the raw_data files the collector wrote)
+        symbols: Yahoo symbols for the store source (default: watchlist)
+
+    Returns:
+        tuple: (shortlists, funnel, summary) DataFrames
+    """
+
+    if source == 'store':
+        if symbols is None:
+            symbols = [s + '.NS' for s in pd.read_csv(WATCHLIST_FILE)['Symbol'].dropna()]
+        dates, names, columns, eligible = store_panel(symbols, start, end, store_dir)
+    elif source == 'archive':
+        wanted = sorted(set(ruleset.inputs) | set(rules.SHORTLIST_COLUMNS[1:]) | set(strength.HORIZONS))
+        dates, names, columns, eligible = archive_panel(wanted, start, end, archive_dir)
+        columns.update(strength.rank(columns, eligible.shape, eligible))
+        columns.update(archive_timeframes(dates, names, timeframes.needed(ruleset.inputs), store_dir))
+        if start is not None and len(dates) and dates[0] > np.datetime64(start, 'D'):
+            log(f"  WARNING: archived raw_data starts {dates[0]}, after the requested {start}")
+    else:
+        raise ValueError(f"Unknown replay source {source!r}")
+
+    if len(dates) == 0 or len(names) == 0:
+        log(f"Replay: no {source} data in range")
+        empty = pd.DataFrame()
+        return empty, empty, empty
+
+    log(f"Replay ({source}): {len(dates)} days x {len(names)} symbols, "
+        f"{dates[0]} to {dates[-1]}")
+
+    shortlists, funnel = evaluate(ruleset, dates, names, columns, eligible)
+    summary = summarize(ruleset, funnel)
+
+    if persist:
+        os.makedirs(out_dir, exist_ok=True)
+        tag = f"{ruleset.mode}_{str(dates[0]).replace('-', '')}_{str(dates[-1]).replace('-', '')}"
+        paths = columnar.save(shortlists, os.path.join(out_dir, f"shortlists_{tag}"))
+        funnel_path = os.path.join(out_dir, f"funnel_{tag}.csv")
+        funnel.to_csv(funnel_path, index=False, date_format='%Y-%m-%d')
+        log(f"Saved to: {', '.join(paths + [funnel_path])}")
+
+    return shortlists, funnel, summary
@@ -0,0 +1,285 @@
+"""
+RESPONSE CACHE: ON-DISK YAHOO RESPONSES
+Purpose: Let same-day reruns reuse earlier Yahoo responses instead of the network
+Layout: data/cache/index.json (request key -> blob, expiry, last use)
+        data/cache/blobs/<sha256>.pkl (pickled response, addressed by content)
+"""
+
+import os
+import json
+import time
+import atexit
+import pickle
+import hashlib
+import threading
+from datetime import datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
+
+CACHE_DIR = 'data/cache/'
+
+MARKET_TZ = ZoneInfo('Asia/Kolkata')
+MARKET_OPEN = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+
+
+# ═══════════════════════════════════════════════════════
+# MARKET CLOCK
+# ═══════════════════════════════════════════════════════
+
+def market_now(now=None):
+    """Current time in IST (naive or aware `now` is taken as-is if given)"""
+    if now is None:
+        return datetime.now(MARKET_TZ)
+    if now.tzinfo is None:
+        return now.replace(tzinfo=MARKET_TZ)
+    return now.astimezone(MARKET_TZ)
+
+
+def trading_date(now=None):
+    """Latest session that has opened: today after 09:15 on weekdays, else the prior weekday"""
+    now = market_now(now)
+    day = now.date()
+    if now.weekday() < 5 and now.time() >= MARKET_OPEN:
+        return day
+    day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def next_open(now=None):
+    """Next 09:15 IST on a weekday strictly after `now`"""
+    now = market_now(now)
+    candidate = datetime.combine(now.date(), MARKET_OPEN, tzinfo=MARKET_TZ)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def is_market_open(now=None):
+    now = market_now(now)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def expiry(now=None, intraday_ttl=300):
+    """
+    Unix time a response fetched at `now` stays valid
+
+    While NSE is trading the last bar is still moving, so responses live
+    for intraday_ttl seconds. Outside market hours nothing changes until
+    the next open.
+    """
+
+    now = market_now(now)
+    if is_market_open(now):
+        return now.timestamp() + intraday_ttl
+    return next_open(now).timestamp()
+
+
+# ═══════════════════════════════════════════════════════
+# CACHE
+# ═══════════════════════════════════════════════════════
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of Yahoo responses keyed by request + trading date
+
+    Identical payloads (e.g. the same bars requested by two stages) are
+    stored once; a blob is deleted when no index entry points at it.
+    Index changes stay in memory and are written, after one LRU eviction
+    pass, by flush() (also run at exit).
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=256 * 2**20,
+                 intraday_ttl=300, clock=None):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.max_bytes = max_bytes
+        self.intraday_ttl = intraday_ttl
+        self.clock = clock
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'expired': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.index = self._load_index()
+
+        # Entries per blob and total bytes of distinct blobs
+        self._refs = {}
+        self._bytes = 0
+        for entry in self.index.values():
+            self._ref(entry)
+        self._sweep()
+
+        atexit.register(self.flush)
+
+    @classmethod
+    def from_config(cls, config):
+        """Build from settings.json keys (response_cache_*), None if disabled"""
+        if not config.get('response_cache', True):
+            return None
+        return cls(
+            cache_dir=config.get('response_cache_dir', CACHE_DIR),
+            max_bytes=int(config.get('response_cache_max_mb', 256) * 2**20),
+            intraday_ttl=config.get('response_cache_intraday_ttl_sec', 300)
+        )
+
+    def _now(self):
+        return self.clock() if self.clock else None
+
+    # ─────────────────────────────────────────
+    # INDEX
+    # ─────────────────────────────────────────
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, f"{digest}.pkl")
+
+    def _ref(self, entry):
+        count = self._refs.get(entry['blob'], 0)
+        if count == 0:
+            self._bytes += entry['size']
+        self._refs[entry['blob']] = count + 1
+
+    def _drop(self, key):
+        """Remove an entry, and its blob if nothing else references it"""
+        entry = self.index.pop(key)
+        self._dirty = True
+        count = self._refs.pop(entry['blob']) - 1
+        if count:
+            self._refs[entry['blob']] = count
+            return
+
+        self._bytes -= entry['size']
+        try:
+            os.remove(self._blob_path(entry['blob']))
+        except OSError:
+            pass
+
+    def _sweep(self):
+        """
+        Drop expired entries and blobs no entry points at
+
+        A run that crashed before flush() leaves both behind (its blobs
+        were written but its index never was), so this runs on load.
+        """
+        now = market_now(self._now()).timestamp()
+        for key in [k for k, e in self.index.items() if e['expires'] <= now]:
+            self._drop(key)
+            self.stats['expired'] += 1
+
+        try:
+            names = os.listdir(self.blob_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.split('.')[0] not in self._refs:
+                try:
+                    os.remove(os.path.join(self.blob_dir, name))
+                except OSError:
+                    pass
+
+    def _evict(self):
+        """Drop least recently used entries until blobs fit in max_bytes"""
+        if self._bytes <= self.max_bytes:
+            return
+        for key in sorted(self.index, key=lambda k: self.index[k]['used']):
+            if self._bytes <= self.max_bytes:
+                break
+            self._drop(key)
+            self.stats['evicted'] += 1
+
+    # ─────────────────────────────────────────
+    # GET / PUT
+    # ─────────────────────────────────────────
+
+    def make_key(self, *parts):
+        """Request parts + current trading date -> stable key"""
+        parts = [*parts, trading_date(self._now()).isoformat()]
+        return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()[:32]
+
+    def get(self, key):
+        """Cached response or None"""
+        with self._lock:
+            entry = self.index.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            if entry['expires'] <= market_now(self._now()).timestamp():
+                self._drop(key)
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            try:
+                with open(self._blob_path(entry['blob']), 'rb') as f:
+                    value = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                self._drop(key)
+                self.stats['misses'] += 1
+                return None
+
+            entry['used'] = time.time()
+            self._dirty = True
+            self.stats['hits'] += 1
+            return value
+
+    def put(self, key, value):
+        """Store a response under key"""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        digest = hashlib.sha256(payload).hexdigest()
+
+        with self._lock:
+            path = self._blob_path(digest)
+            if not os.path.exists(path):
+                os.makedirs(self.blob_dir, exist_ok=True)
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp, path)
+
+            entry = {
+                'blob': digest,
+                'size': len(payload),
+                'expires': expiry(self._now(), self.intraday_ttl),
+                'used': time.time()
+            }
+            # Reference the new blob first: it may be the one being replaced
+            self._ref(entry)
+            if key in self.index:
+                self._drop(key)
+            self.index[key] = entry
+            self._dirty = True
+            self.stats['stored'] += 1
+
+    def flush(self):
+        """Evict down to max_bytes and write the index, if anything changed"""
+        with self._lock:
+            self._evict()
+            if self._dirty:
+                self._save_index()
+                self._dirty = False
+
+    def summary(self):
+        s = self.stats
+        lookups = s['hits'] + s['misses']
+        rate = 100 * s['hits'] / lookups if lookups else 0
+        size = self._bytes
+        return (f"Response cache: {s['hits']} hits, {s['misses']} misses ({rate:.0f}% hit rate), "
+                f"{s['stored']} stored, {s['expired']} expired, {s['evicted']} evicted, "
+                f"{len(self.index)} entries / {size / 2**20:.1f} MB")
@@ -0,0 +1,408 @@
+"""
+SCREENING RULES: DECLARATIVE FILTERS -> ONE FUSED MASK
+Purpose: Compile config/filters.json (derived fields, rules, mode
+         overrides) once and evaluate every rule over plain column arrays
+         in a single pass, with per-rule survivor counts for the funnel
+Config:  "modes":   {name: {"label", "tradeable",
+                            "select": "filter" | "score", "top_k",
+                            "min_score", "gate_layers": [layers],
+                            <knob>: value | null}}
+         "derived": {name: "arithmetic over fields", ...} (in order)
+         "rules":   [{"name", "layer", "field", "op", "value" | "knob",
+                      "missing": "pass", "only": [modes],
+                      "weight", "scale",
+                      "modes": {mode: value | {overrides} | null}}]
+         op is one of >= > <= < == != between; value is a number, a
+         [low, high] pair for between, or another field/expression. A
+         rule with "knob" takes its value from that key of the mode and
+         is off in modes where the key is null or absent
+
+In a "score" mode only the gate layers filter; every other rule adds a
+weighted 0-1 score for how well a stock clears it, and the top_k by
+total score (0-100) are selected.
+"""
+
+import ast
+import json
+import re
+import numpy as np
+
+FILTERS_FILE = 'config/filters.json'
+
+# What the screener writes for each shortlisted stock
+SHORTLIST_COLUMNS = [
+    'Symbol', 'Entry', 'SL', 'Target', 'RR',
+    'Risk_Pct', 'MA20', 'MA50', 'MA200',
+    'RSI', 'ADX', 'ATR', 'RS_Percentile', 'Pattern', 'Pivot'
+]
+
+OPS = {
+    '>=': np.greater_equal,
+    '>': np.greater,
+    '<=': np.less_equal,
+    '<': np.less,
+    '==': np.equal,
+    '!=': np.not_equal
+}
+
+# Without a rule "scale", a margin of this fraction of the threshold
+# (or of the compared field) takes the rule's score from 0.5 to 1
+SCORE_SCALE = 0.2
+
+_FUNCTIONS = {
+    'min': np.fmin,
+    'max': np.fmax,
+    'coalesce': lambda value, fallback: np.where(np.isnan(value), fallback, value)
+}
+
+_BINOPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide
+}
+
+
+# ═══════════════════════════════════════════════════════
+# EXPRESSIONS
+# ═══════════════════════════════════════════════════════
+
+def compile_expression(text):
+    """
+    'Vol_5D_Avg / Vol_20D_Avg' -> (fn(columns) -> array, {field names})
+
+    Only field names, numbers, + - * /, parentheses and the two-argument
+    functions min, max (NaN-ignoring) and coalesce(value, fallback) are
+    allowed.
+    """
+
+    fields = set()
+
+    def build(node):
+        if isinstance(node, ast.Expression):
+            return build(node.body)
+        if isinstance(node, ast.Name):
+            fields.add(node.id)
+            return lambda cols, name=node.id: cols[name]
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return lambda cols, value=float(node.value): value
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            inner = build(node.operand)
+            return lambda cols: -inner(cols)
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                and node.func.id in _FUNCTIONS and len(node.args) == 2 and not node.keywords):
+            fn, left, right = _FUNCTIONS[node.func.id], build(node.args[0]), build(node.args[1])
+            return lambda cols: fn(left(cols), right(cols))
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+            op, left, right = _BINOPS[type(node.op)], build(node.left), build(node.right)
+            return lambda cols: op(left(cols), right(cols))
+        raise ValueError(f"Unsupported expression in filters: {text!r}")
+
+    return build(ast.parse(str(text), mode='eval')), fields
+
+
+# ═══════════════════════════════════════════════════════
+# RULES
+# ═══════════════════════════════════════════════════════
+
+class Rule:
+    """One compiled comparison; `value` stays a plain threshold so it can be swept"""
+
+    def __init__(self, spec):
+        self.name = spec.get('name') or f"{spec['field']} {spec['op']} {spec['value']}"
+        self.layer = spec.get('layer', 1)
+        self.op = spec['op']
+        self.missing = spec.get('missing', 'fail')
+        self.weight = float(spec.get('weight', 1))
+        self.scale = spec.get('scale')
+        self.key = re.sub(r'\W+', '_', self.name).strip('_')
+        self.field, self.fields = compile_expression(spec['field'])
+
+        if self.op != 'between' and self.op not in OPS:
+            raise ValueError(f"Rule {self.name!r}: unknown op {self.op!r}")
+
+        value = spec['value']
+        self.ref = None
+        if isinstance(value, str):
+            self.ref, ref_fields = compile_expression(value)
+            self.fields |= ref_fields
+        elif self.op == 'between':
+            low, high = value
+            self.value = (float(low), float(high))
+        else:
+            self.value = float(value)
+
+    def mask(self, columns, value=None):
+        """
+        Bool mask over the rows; `value` overrides the threshold
+
+        Thresholds may be arrays shaped to broadcast against the columns,
+        e.g. (K, 1) to evaluate K thresholds at once.
+        """
+
+        data = self.field(columns)
+        if self.ref is not None:
+            threshold = self.ref(columns)
+        else:
+            threshold = self.value if value is None else value
+
+        with np.errstate(invalid='ignore'):
+            if self.op == 'between':
+                low, high = threshold
+                passed = (data >= low) & (data <= high)
+            else:
+                passed = OPS[self.op](data, threshold)
+
+        if self.missing == 'pass':
+            passed = passed | np.isnan(data)
+        return passed
+
+    def score(self, columns):
+        """
+        0-1 per row: 0.5 exactly at the threshold, rising to 1 one scale
+        clear of it and falling to 0 one scale short. Between rules peak
+        mid-band; == / != score pass or fail. A missing value scores 0.5
+        if the rule lets it pass, else 0.
+        """
+
+        data = self.field(columns)
+        threshold = self.ref(columns) if self.ref is not None else self.value
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if self.op == 'between':
+                low, high = threshold
+                margin = np.minimum(data - low, high - data)
+                scale = self.scale or (high - low) / 2
+            elif self.op in ('>=', '>'):
+                margin = data - threshold
+                scale = self.scale or np.abs(threshold) * SCORE_SCALE
+            elif self.op in ('<=', '<'):
+                margin = threshold - data
+                scale = self.scale or np.abs(threshold) * SCORE_SCALE
+            else:
+                margin = np.where(self.mask(columns), 1.0, -1.0)
+                scale = 1.0
+
+            score = np.clip(0.5 + 0.5 * margin / scale, 0, 1)
+
+        missing = np.isnan(data) | np.isnan(score)
+        return np.where(missing, 0.5 if self.missing == 'pass' else 0.0, score)
+
+
+def top_k(score, eligible, k):
+    """
+    Bool mask of the k best-scoring eligible rows along the last axis
+
+    argpartition finds them in linear time; only the k picks ever need
+    sorting (for display). Works per date on (T x N) panels.
+    """
+
+    score = np.where(eligible & ~np.isnan(score), score, -np.inf)
+    chosen = np.zeros(score.shape, dtype=bool)
+    n = score.shape[-1]
+    if k <= 0 or n == 0:
+        return chosen
+
+    if k < n:
+        picks = np.argpartition(-score, k - 1, axis=-1)[..., :k]
+    else:
+        picks = np.broadcast_to(np.arange(n), score.shape)
+    np.put_along_axis(chosen, picks, True, axis=-1)
+    return chosen & (score > -np.inf)
+
+
+def resolve(spec, mode, knobs=None):
+    """
+    A rule spec with its mode knob and override applied; None if off in
+    this mode (knobs: the mode's entry in "modes")
+    """
+    only = spec.get('only')
+    if only is not None and mode not in only:
+        return None
+
+    knob = spec.get('knob')
+    if knob is not None:
+        value = (knobs or {}).get(knob)
+        if value is None:
+            return None
+        spec = {**spec, 'value': value}
+
+    overrides = spec.get('modes', {})
+    if mode not in overrides:
+        return spec
+    override = overrides[mode]
+    if override is None:
+        return None
+    if not isinstance(override, dict):
+        override = {'value': override}
+    return {**spec, **override}
+
+
+# ═══════════════════════════════════════════════════════
+# RULE SETS
+# ═══════════════════════════════════════════════════════
+
+class RuleSet:
+    """Derived fields plus the rules active in one mode"""
+
+    def __init__(self, mode, config):
+        modes = config.get('modes', {})
+        if mode not in modes:
+            raise ValueError(f"Unknown screening mode {mode!r} (choose from {', '.join(modes)})")
+
+        self.mode = mode
+        self.label = modes[mode].get('label', mode.upper())
+        self.tradeable = modes[mode].get('tradeable', True)
+        self.select = modes[mode].get('select', 'filter')
+        self.top_k = int(modes[mode].get('top_k', 10))
+        self.min_score = float(modes[mode].get('min_score', 0))
+        gate_layers = modes[mode].get('gate_layers', [])
+
+        self.derived = {}
+        derived_names = set()
+        inputs = set()
+        for name, text in config.get('derived', {}).items():
+            fn, fields = compile_expression(text)
+            self.derived[name] = fn
+            inputs |= fields - derived_names
+            derived_names.add(name)
+
+        self.rules = []
+        for spec in config.get('rules', []):
+            resolved = resolve(spec, mode, modes[mode])
+            if resolved is not None:
+                rule = Rule(resolved)
+                self.rules.append(rule)
+                inputs |= rule.fields - derived_names
+
+        self.inputs = sorted(inputs)
+
+        # Rules that filter, and (score mode) rules that only add score
+        if self.select == 'score':
+            self.gates = [r for r in self.rules if r.layer in gate_layers]
+            self.scored = [r for r in self.rules if r.layer not in gate_layers]
+        else:
+            self.gates, self.scored = list(self.rules), []
+
+    def columns(self, source, shape=None):
+        """
+        Input columns as float arrays, then derived fields appended
+
+        source is a DataFrame (one row per symbol) or a dict of same-shape
+        arrays, e.g. (dates x symbols) panels for a replay. A field the
+        source lacks is all-NaN, which only rules marked missing: pass let
+        through.
+        """
+
+        if shape is None:
+            shape = (len(source),)
+        columns = {
+            name: (np.asarray(source[name], dtype=float) if name in source
+                   else np.full(shape, np.nan))
+            for name in self.inputs
+        }
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name, fn in self.derived.items():
+                columns[name] = np.broadcast_to(fn(columns), shape).astype(float)
+        return columns
+
+    def evaluate(self, columns, values=None, base=None):
+        """
+        Every gate rule in one pass (all rules in a filter mode)
+
+        Args:
+            columns: from columns()
+            values: optional {rule name: threshold} overrides
+            base: optional mask of rows in the universe before any rule
+
+        Returns:
+            tuple: (final bool mask, survivors after each rule in order,
+            summed over the last axis - one count per rule, or per rule
+            and date for panel columns)
+        """
+
+        values = values or {}
+        masks = [rule.mask(columns, values.get(rule.name)) for rule in self.gates]
+        if base is not None:
+            masks.insert(0, base)
+        if not masks:
+            shape = next(iter(columns.values())).shape if columns else (0,)
+            return np.ones(shape, dtype=bool), np.zeros((0,) + shape[:-1], dtype=int)
+
+        passed = np.logical_and.accumulate(np.stack(masks), axis=0)
+        survivors = passed.sum(axis=-1)
+        if base is not None:
+            survivors = survivors[1:]
+        return passed[-1], survivors
+
+    def funnel(self, start, survivors):
+        """
+        Survivor counts as funnel rows
+
+        Returns:
+            list: (layer, rule name, remain, removed by this rule) in order
+        """
+
+        rows = []
+        before = start
+        for rule, remain in zip(self.gates, survivors):
+            remain = int(remain)
+            rows.append((rule.layer, rule.name, remain, before - remain))
+            before = remain
+        return rows
+
+    def score(self, columns):
+        """
+        Weighted score of the non-gate rules, 0-100
+
+        Returns:
+            tuple: (total, {"Score_<rule>": points}) - each rule's points
+            are its share of the total, so the breakdown sums to it
+        """
+
+        shape = next(iter(columns.values())).shape if columns else (0,)
+        total = np.zeros(shape)
+        weights = sum(rule.weight for rule in self.scored) or 1.0
+
+        breakdown = {}
+        for rule in self.scored:
+            points = 100 * rule.weight * rule.score(columns) / weights
+            breakdown[f"Score_{rule.key}"] = points
+            total += points
+        return total, breakdown
+
+    def select_top(self, columns, base=None):
+        """
+        Score mode selection: gates, then the top_k scores at or above
+        min_score (per date for panel columns)
+
+        Returns:
+            tuple: (chosen mask, gate survivors as in evaluate(), total
+            score, breakdown)
+        """
+
+        passed, survivors = self.evaluate(columns, base=base)
+        total, breakdown = self.score(columns)
+        chosen = top_k(total, passed & (total >= self.min_score), self.top_k)
+        return chosen, survivors, total, breakdown
+
+
+def shortlist_columns(ruleset):
+    """SHORTLIST_COLUMNS, plus Score and its breakdown in a score mode"""
+    if ruleset.select != 'score':
+        return list(SHORTLIST_COLUMNS)
+    return SHORTLIST_COLUMNS + ['Score'] + [f"Score_{rule.key}" for rule in ruleset.scored]
+
+
+def load_config(path=FILTERS_FILE):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def modes(path=FILTERS_FILE):
+    return list(load_config(path).get('modes', {}))
+
+
+def load(mode, path=FILTERS_FILE):
+    """Compiled RuleSet for a mode from filters.json"""
+    return RuleSet(mode, load_config(path))
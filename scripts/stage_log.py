@@ -0,0 +1,164 @@
+"""
+STAGE LOGGING: BUFFERED TEXT + JSON-LINES
+Purpose: One shared log() for every stage. Lines are echoed to stdout at
+         once but written to disk in batches by a background thread, so a
+         run costs a handful of file writes instead of one open/append/close
+         per message.
+Output:  logs/<stage>_YYYYMMDD.txt   ([timestamp] message, as before)
+         logs/<stage>_YYYYMMDD.jsonl (ts, stage, level, msg + any fields)
+Level:   settings.json "log_level" (debug/info/warning/error), or the
+         LOG_LEVEL environment variable; per-symbol chatter is debug
+"""
+
+import os
+import sys
+import json
+import atexit
+import threading
+from datetime import datetime
+
+LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+
+SETTINGS_FILE = 'config/settings.json'
+FLUSH_SEC = 1.0
+MAX_BUFFERED = 500
+
+_LOGGERS = {}
+
+
+def configured_level(path=SETTINGS_FILE):
+    """LOG_LEVEL env var, else settings.json log_level, else info"""
+    level = os.environ.get('LOG_LEVEL')
+    if not level:
+        try:
+            with open(path, 'r') as f:
+                level = json.load(f).get('log_level')
+        except (OSError, ValueError):
+            level = None
+    level = (level or 'info').lower()
+    return level if level in LEVELS else 'info'
+
+
+class StageLogger:
+    """
+    Callable drop-in for the per-script log(message)
+
+    log(message, level='info', **fields): fields (symbol, seconds, count,
+    ...) only go to the JSON-lines file; the text line is unchanged.
+    """
+
+    def __init__(self, stage, path, level=None, flush_sec=FLUSH_SEC, echo=True):
+        self.stage = stage
+        self.path = path
+        self.json_path = os.path.splitext(path)[0] + '.jsonl'
+        self.level = LEVELS[level or configured_level()]
+        self.flush_sec = flush_sec
+        self.echo = echo
+
+        self._lines = []
+        self._records = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._files = None
+        self._wake = threading.Event()
+        self._thread = None
+
+        atexit.register(self.close)
+
+    def enabled(self, level):
+        return LEVELS[level] >= self.level
+
+    def __call__(self, message, level='info', **fields):
+        if LEVELS[level] < self.level:
+            return
+
+        now = datetime.now()
+        line = f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] {message}"
+        if self.echo:
+            print(line)
+
+        record = {'ts': now.isoformat(timespec='milliseconds'), 'stage': self.stage,
+                  'level': level, 'msg': message}
+        record.update(fields)
+
+        with self._lock:
+            self._lines.append(line)
+            self._records.append(record)
+            pending = len(self._lines)
+
+        if self._thread is None:
+            self._start()
+
+        # After close() (atexit) there is no flusher left: write through
+        if level == 'error' or pending >= MAX_BUFFERED or self._wake.is_set():
+            self.flush()
+
+    def debug(self, message, **fields):
+        self(message, 'debug', **fields)
+
+    def info(self, message, **fields):
+        self(message, 'info', **fields)
+
+    def warning(self, message, **fields):
+        self(message, 'warning', **fields)
+
+    def error(self, message, **fields):
+        self(message, 'error', **fields)
+
+    # ─────────────────────────────────────────
+    # Flushing
+    # ─────────────────────────────────────────
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f'log-{self.stage}', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._wake.wait(self.flush_sec):
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far: one write per file"""
+        with self._write_lock:
+            with self._lock:
+                lines, self._lines = self._lines, []
+                records, self._records = self._records, []
+            if not lines:
+                return
+
+            if self._files is None:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._files = (open(self.path, 'a'), open(self.json_path, 'a'))
+
+            text, structured = self._files
+            text.write('\n'.join(lines) + '\n')
+            structured.write(''.join(json.dumps(r, default=str) + '\n' for r in records))
+            text.flush()
+            structured.flush()
+
+    def close(self):
+        self._wake.set()
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"log flush failed: {e}", file=sys.stderr)
+        if self._files is not None:
+            for f in self._files:
+                f.close()
+            self._files = None
+
+
+def get_logger(stage, path, level=None):
+    """One StageLogger per stage per process (the pipeline imports them all)"""
+    if stage not in _LOGGERS:
+        _LOGGERS[stage] = StageLogger(stage, path, level)
+    return _LOGGERS[stage]
+
+
+def debug_of(log):
+    """log.debug when log is a StageLogger, else log itself (e.g. print)"""
+    return getattr(log, 'debug', log)
@@ -0,0 +1,181 @@
+"""
+STARTUP BENCHMARK: IMPORT-TIME BUDGETS
+Purpose: Measure what each pipeline script costs before its first line of
+         real work (python -X importtime) and fail if any script is over
+         its budget in config/import_budgets.json or fails to import
+Usage:   python scripts/startup_bench.py [--runs 5] [--update]
+Output:  logs/import_times_YYYYMMDD.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = 'config/import_budgets.json'
+RESULTS_FILE = f'logs/import_times_{datetime.now().strftime("%Y%m%d")}.json'
+
+SCRIPTS = [
+    '1_data_collector', '2_screener', '3_analyzer', '4_notifier',
+    '5_tracker', '6_reporter', '7_cleanup', 'pipeline'
+]
+
+# Headroom added to a measurement by --update, wide enough that budgets set
+# on one machine hold on a slower one; the floor keeps scripts that import
+# almost nothing from failing on timer noise
+BUDGET_HEADROOM = 2.0
+BUDGET_MIN_SLACK_MS = 50
+
+
+# ═══════════════════════════════════════════════════════
+# MEASUREMENT
+# ═══════════════════════════════════════════════════════
+
+def parse_importtime(stderr):
+    """
+    -X importtime output -> {module: (self us, cumulative us)}
+
+    Lines look like 'import time:       412 |       1250 |   pandas'; nested
+    imports are indented under their parent.
+    """
+
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative, name = line[len('import time:'):].split('|')
+            times[name.strip()] = (int(self_us), int(cumulative))
+        except ValueError:
+            continue
+    return times
+
+
+def measure(script):
+    """
+    One cold import of a script in a fresh interpreter
+
+    Returns:
+        tuple: (total ms, [(top-level module, ms), ...] heaviest first)
+    """
+
+    # __import__, not importlib.import_module: only the builtin import
+    # statement path is timed by -X importtime
+    code = f"import sys; sys.path.insert(0, 'scripts'); __import__({script!r})"
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ['unknown error']
+        raise RuntimeError(tail[0])
+
+    times = parse_importtime(proc.stderr)
+    if script not in times:
+        raise RuntimeError(f"{script} missing from -X importtime output")
+
+    # Direct children of the script: the lines just before it, one level in
+    lines = [l for l in proc.stderr.splitlines() if l.startswith('import time:')]
+    at = next(i for i, l in enumerate(lines) if l.rstrip().endswith(f'| {script}'))
+    children = []
+    for line in reversed(lines[:at]):
+        name = line.split('|')[-1]
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((name.strip(), times[name.strip()][1] / 1000))
+
+    children.sort(key=lambda c: -c[1])
+    return times[script][1] / 1000, children
+
+
+def benchmark(scripts, runs=3):
+    """Best-of-`runs` import time per script (the least noisy estimate)"""
+    results = {}
+    for script in scripts:
+        try:
+            samples = [measure(script) for _ in range(runs)]
+        except RuntimeError as e:
+            results[script] = {'error': str(e)}
+            continue
+        best = min(samples, key=lambda s: s[0])
+        results[script] = {
+            'ms': round(best[0], 1),
+            'heaviest': [[name, round(ms, 1)] for name, ms in best[1][:5]]
+        }
+    return results
+
+
+# ═══════════════════════════════════════════════════════
+# BUDGETS
+# ═══════════════════════════════════════════════════════
+
+def load_budgets(path=BUDGET_FILE):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def check(results, budgets):
+    """Print a table; return the scripts over budget"""
+    over = []
+    print(f"{'script':<18} {'import ms':>10} {'budget':>8}  heaviest imports")
+    for script, r in results.items():
+        if 'error' in r:
+            print(f"{script:<18} {'ERROR':>10} {'':>8}  {r['error']}")
+            continue
+
+        budget = budgets.get(script)
+        flag = ''
+        if budget is not None and r['ms'] > budget:
+            over.append(script)
+            flag = '  << OVER BUDGET'
+
+        heaviest = ', '.join(f"{n} {ms:.0f}" for n, ms in r['heaviest'][:3])
+        budget_text = f"{budget:.0f}" if budget is not None else '-'
+        print(f"{script:<18} {r['ms']:>10.1f} {budget_text:>8}  {heaviest}{flag}")
+
+    return over
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-script import-time budgets")
+    parser.add_argument("--runs", type=int, default=3, help="Samples per script (best is kept)")
+    parser.add_argument("--update", action="store_true",
+                        help=f"Rewrite budgets as measurement x {BUDGET_HEADROOM}")
+    parser.add_argument("scripts", nargs="*", default=SCRIPTS)
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+    os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+
+    results = benchmark(args.scripts, args.runs)
+    with open(RESULTS_FILE, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    budgets = load_budgets()
+    if args.update:
+        budgets.update({s: round(max(r['ms'] * BUDGET_HEADROOM, r['ms'] + BUDGET_MIN_SLACK_MS))
+                        for s, r in results.items() if 'error' not in r})
+        with open(BUDGET_FILE, 'w') as f:
+            json.dump(budgets, f, indent=2)
+        print(f"Budgets written to {BUDGET_FILE}")
+
+    over = check(results, budgets)
+    broken = [s for s, r in results.items() if 'error' in r]
+    if over:
+        print(f"\nFAIL: over budget: {', '.join(over)}")
+    if broken:
+        print(f"\nFAIL: import failed: {', '.join(broken)}")
+    if over or broken:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+RELATIVE STRENGTH
+Purpose: Multi-horizon returns against Nifty for every symbol, and their
+         percentile rank across the universe
+Columns: RS_1M, RS_3M, RS_6M - % return over 21/63/126 bars in excess of
+         Nifty's over the same bars (collector, raw_data)
+         RS_Score      - weighted blend of the horizons (screener)
+         RS_Percentile - 0-100 rank of RS_Score in the day's universe
+"""
+
+import numpy as np
+
+import bar_store
+import regime
+
+# Horizon: (bars, weight in RS_Score)
+HORIZONS = {
+    'RS_1M': (21, 0.2),
+    'RS_3M': (63, 0.4),
+    'RS_6M': (126, 0.4)
+}
+
+# Bars of history the longest horizon needs
+LOOKBACK_BARS = max(bars for bars, _ in HORIZONS.values()) + 1
+
+
+# ═══════════════════════════════════════════════════════
+# RETURNS VS THE INDEX
+# ═══════════════════════════════════════════════════════
+
+def forward_fill(x):
+    """NaN gaps in (T x N) x filled down from the last value (leading NaNs stay)"""
+    rows = np.where(np.isnan(x), 0, np.arange(len(x))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.take_along_axis(x, rows, axis=0)
+
+
+def index_closes(dates, store_dir=bar_store.STORE_DIR, symbol=regime.NIFTY):
+    """Index close on or before each of `dates`; NaN before it or if not stored"""
+    out = np.full(len(dates), np.nan)
+    bars = bar_store.load_bars(symbol, store_dir)
+    if bars is None or len(bars) == 0:
+        return out
+
+    rows = np.searchsorted(bars['date'], dates, side='right') - 1
+    ok = rows >= 0
+    out[ok] = bars['close'][rows[ok]]
+    return out
+
+
+def excess_returns(close, index_close):
+    """
+    {RS_1M, RS_3M, RS_6M: (T x N)} % returns in excess of the index
+
+    A symbol's gap days carry its last close, so a missing bar does not
+    blank the horizons that span it.
+    """
+
+    close = forward_fill(close)
+    index_close = index_close[:, None]
+
+    out = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name, (bars, _) in HORIZONS.items():
+            rs = np.full(close.shape, np.nan)
+            if len(close) > bars:
+                stock = close[bars:] / close[:-bars]
+                index = index_close[bars:] / index_close[:-bars]
+                rs[bars:] = 100 * (stock / index - 1)
+            out[name] = rs
+    return out
+
+
+# ═══════════════════════════════════════════════════════
+# CROSS-SECTIONAL RANK
+# ═══════════════════════════════════════════════════════
+
+def score(columns):
+    """
+    Weighted blend of the horizons; a horizon a symbol lacks (short
+    history) drops out and the remaining weights are rescaled
+    """
+
+    total = weight = None
+    for name, (_, w) in HORIZONS.items():
+        if name not in columns:
+            continue
+        values = np.asarray(columns[name], dtype=float)
+        have = ~np.isnan(values)
+        if total is None:
+            total, weight = np.zeros(values.shape), np.zeros(values.shape)
+        total += np.where(have, values, 0) * w
+        weight += have * w
+
+    if total is None:
+        return None
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(weight > 0, total / weight, np.nan)
+
+
+def percentile(values, eligible=None):
+    """
+    0-100 rank of each value along the last axis (one sort per row)
+
+    NaNs and cells outside `eligible` are not ranked and come back NaN;
+    the weakest ranked value is 0 and the strongest 100.
+    """
+
+    values = np.asarray(values, dtype=float)
+    if eligible is not None:
+        values = np.where(eligible, values, np.nan)
+
+    ranked = ~np.isnan(values)
+    order = np.argsort(values, axis=-1)            # NaNs sort last
+    ranks = np.empty(values.shape, dtype=np.float64)
+    positions = np.broadcast_to(np.arange(values.shape[-1], dtype=np.float64), values.shape)
+    np.put_along_axis(ranks, order, positions, axis=-1)
+
+    n = ranked.sum(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(n > 1, 100 * ranks / (n - 1), 100.0)
+    pct[~ranked] = np.nan
+    return pct
+
+
+def rank(columns, shape, eligible=None):
+    """
+    {RS_Score, RS_Percentile} for a universe: (N,) columns from one
+    raw_data file or (T x N) panels ranked date by date. All-NaN when the
+    RS horizons are missing (no index bars stored).
+    """
+
+    blended = score(columns)
+    if blended is None:
+        blended = np.full(shape, np.nan)
+    return {'RS_Score': blended, 'RS_Percentile': percentile(blended, eligible)}
@@ -0,0 +1,351 @@
+"""
+FILTER SWEEP: THRESHOLD SEARCH OVER HISTORY
+Purpose: Score many filters.json threshold sets against the stored
+         history by what their picks did next, without re-running the
+         screener per set
+Usage:   python scripts/sweep.py [--mode standard] [--search grid|random]
+                                 [--samples 500] [--workers 4] [--top 20]
+Config:  config/sweep.json - "params": {rule name: [values]} or, for a
+         between rule, {"low": [...], "high": [...]}; "horizon_days"
+Output:  output/sweep/sweep_<mode>_YYYYMMDD_HHMMSS.csv (ranked)
+
+Indicators, derived fields and every rule's mask are computed once. The
+rules not being swept collapse into one base mask, every swept threshold
+becomes a precomputed mask over the surviving (date, symbol) cells, and a
+parameter set is the AND of one mask per axis - evaluated in blocks of
+sets as 2-D boolean arrays, split across a process pool.
+"""
+
+import os
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+import indicators
+import metrics
+import replay
+import rules
+import stage_log
+
+SWEEP_FILE = 'config/sweep.json'
+OUT_DIR = 'output/sweep/'
+LOG_FILE = f"logs/sweep_{datetime.now().strftime('%Y%m%d')}.txt"
+BLOCK = 256
+
+RANK_COLUMNS = ['Mean_R', 'Total_R', 'Mean_Return_Pct', 'Win_Rate_Pct', 'Picks']
+
+_STATE = {}
+
+
+# ═══════════════════════════════════════════════════════
+# OUTCOMES
+# ═══════════════════════════════════════════════════════
+
+def outcomes(columns, horizon):
+    """
+    What buying each (date, symbol) at the close would have done
+
+    Returns:
+        tuple: (forward close-to-close return over `horizon` bars, trade
+        result in R: +reward/risk if the target is touched first, -1 if
+        the stop is, else the horizon-end move in R; NaN without enough
+        future bars). A bar touching both counts as a stop. Bars are
+        counted per symbol, so a date a symbol did not trade is skipped.
+    """
+
+    index = indicators.bar_index(~np.isnan(columns['Close']))
+    fwd, result = _outcomes(*(indicators.pack(columns[name], index) for name in
+                              ('Close', 'High', 'Low', 'Entry', 'SL', 'Target')), horizon)
+    return indicators.unpack(fwd, index), indicators.unpack(result, index)
+
+
+def _outcomes(close, high, low, entry, sl, target, horizon):
+    """outcomes() over a packed panel (indicators.bar_index)"""
+    T = len(close)
+
+    fwd = np.full(close.shape, np.nan)
+    result = np.full(close.shape, np.nan)
+    if T <= horizon:
+        return fwd, result
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fwd[:-horizon] = close[horizon:] / close[:-horizon] - 1
+        risk = entry - sl
+
+        # First bar (1..horizon) at which the stop / target is touched
+        first_sl = np.full(close.shape, horizon + 1)
+        first_tg = np.full(close.shape, horizon + 1)
+        for k in range(horizon, 0, -1):
+            hit_sl = np.zeros(close.shape, dtype=bool)
+            hit_tg = np.zeros(close.shape, dtype=bool)
+            hit_sl[:-k] = low[k:] <= sl[:-k]
+            hit_tg[:-k] = high[k:] >= target[:-k]
+            first_sl[hit_sl] = k
+            first_tg[hit_tg] = k
+
+        end_r = np.full(close.shape, np.nan)
+        end_r[:-horizon] = (close[horizon:] - entry[:-horizon]) / risk[:-horizon]
+        result = np.where(first_sl <= first_tg, -1.0, (target - entry) / risk)
+        result = np.where((first_sl > horizon) & (first_tg > horizon), end_r, result)
+
+    result[np.isnan(fwd) | ~(risk > 0)] = np.nan
+    return fwd, result
+
+
+# ═══════════════════════════════════════════════════════
+# SEARCH SPACE
+# ═══════════════════════════════════════════════════════
+
+def axes_of(ruleset, params):
+    """
+    Sweep axes: [(rule, part, values)], part None / 'low' / 'high'
+
+    Raises:
+        ValueError: unknown rule, or a rule compared to another field
+    """
+
+    if ruleset.select != 'filter':
+        raise ValueError(f"Mode {ruleset.mode!r} selects by score; sweep a filter mode")
+
+    by_name = {rule.name: rule for rule in ruleset.rules}
+    axes = []
+    for name, spec in params.items():
+        rule = by_name.get(name)
+        if rule is None:
+            raise ValueError(f"Sweep rule {name!r} is not active in mode {ruleset.mode!r}")
+        if rule.ref is not None:
+            raise ValueError(f"Sweep rule {name!r} compares two fields; nothing to tune")
+
+        if rule.op == 'between':
+            for part in ('low', 'high'):
+                axes.append((rule, part, [float(v) for v in spec.get(part, [rule.value[part == 'high']])]))
+        else:
+            axes.append((rule, None, [float(v) for v in spec]))
+    return axes
+
+
+def axis_masks(rule, part, values, columns, cells):
+    """(V, C) masks of one axis over the candidate cells"""
+    data = rule.field(columns)[cells]
+    thresholds = np.asarray(values)[:, None]
+    with np.errstate(invalid='ignore'):
+        if part == 'low':
+            masks = data >= thresholds
+        elif part == 'high':
+            masks = data <= thresholds
+        else:
+            masks = rules.OPS[rule.op](data, thresholds)
+    if rule.missing == 'pass':
+        masks |= np.isnan(data)
+    return masks
+
+
+def combinations(axes, search='grid', samples=None, seed=0):
+    """(K, axes) value indices: the full grid or a random sample of it"""
+    sizes = [len(values) for _, _, values in axes]
+    total = int(np.prod(sizes))
+
+    if search == 'grid' or samples is None or samples >= total:
+        return np.array(list(itertools.product(*[range(s) for s in sizes])), dtype=np.int64)
+
+    rng = np.random.default_rng(seed)
+    flat = rng.choice(total, size=samples, replace=False)
+    return np.stack(np.unravel_index(flat, sizes), axis=1)
+
+
+# ═══════════════════════════════════════════════════════
+# EVALUATION
+# ═══════════════════════════════════════════════════════
+
+def _init(state):
+    _STATE.update(state)
+
+
+def _evaluate_block(combos):
+    """Picks and outcome sums for a block of parameter sets"""
+    masks, fwd, result, day_starts = (_STATE[k] for k in ('masks', 'fwd', 'result', 'day_starts'))
+
+    picked = masks[0][combos[:, 0]]
+    for axis in range(1, len(masks)):
+        picked &= masks[axis][combos[:, axis]]
+
+    picks = picked.sum(axis=1)
+    as_float = picked.astype(float)
+    days = (np.logical_or.reduceat(picked, day_starts, axis=1).sum(axis=1)
+            if picked.shape[1] else np.zeros(len(combos), dtype=int))
+
+    return {
+        'picks': picks,
+        'days': days,
+        'sum_fwd': as_float @ fwd,
+        'wins': as_float @ (result > 0).astype(float),   # the trade, not the close, decides
+        'sum_r': as_float @ result
+    }
+
+
+def evaluate(state, combos, workers=1):
+    """Every parameter set; blocks go to a process pool when workers > 1"""
+    blocks = [combos[i:i + BLOCK] for i in range(0, len(combos), BLOCK)]
+
+    if workers > 1 and len(blocks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(state,)) as pool:
+            parts = list(pool.map(_evaluate_block, blocks))
+    else:
+        _init(state)
+        parts = [_evaluate_block(b) for b in blocks]
+
+    return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]} if parts else {}
+
+
+def prepare(ruleset, axes, horizon, start=None, end=None, symbols=None, log=print):
+    """
+    Everything the sweep reuses across parameter sets
+
+    Returns:
+        dict: per-axis (V, C) masks and, per candidate cell, the forward
+        return, R result and day boundaries; plus the days evaluated
+    """
+
+    if symbols is None:
+        symbols = [s + '.NS' for s in pd.read_csv(replay.WATCHLIST_FILE)['Symbol'].dropna()]
+
+    # No end cut here: outcomes need the bars after the window
+    dates, names, raw, eligible = replay.store_panel(symbols, start)
+    columns = ruleset.columns(raw, eligible.shape)
+    for name in ('High', 'Low'):
+        columns.setdefault(name, raw[name])
+
+    fwd, result = outcomes(columns, horizon)
+    in_window = np.ones(len(dates), dtype=bool)
+    if end is not None:
+        in_window = dates <= np.datetime64(end, 'D')
+
+    swept = {rule.name for rule, _, _ in axes}
+    base = eligible & in_window[:, None] & ~np.isnan(result)
+    for rule in ruleset.rules:
+        if rule.name not in swept:
+            base &= rule.mask(columns)
+
+    cells = np.nonzero(base)
+    rows = cells[0]
+    day_starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.zeros(0, dtype=int)
+    days = int((in_window & (eligible.sum(axis=1) > 0) & ~np.all(np.isnan(result), axis=1)).sum())
+
+    log(f"Sweep panel: {int(in_window.sum())} days x {len(names)} symbols, "
+        f"{len(rows)} candidate cells after fixed rules")
+
+    return {
+        'masks': [axis_masks(rule, part, values, columns, cells) for rule, part, values in axes],
+        'fwd': fwd[cells].astype(float),
+        'result': result[cells].astype(float),
+        'day_starts': day_starts,
+        'days': days
+    }
+
+
+def ranked(axes, combos, totals, days, rank_by='Mean_R', min_picks=20):
+    """One row per parameter set, best first"""
+    table = {}
+    for i, (rule, part, values) in enumerate(axes):
+        label = rule.name if part is None else f"{rule.name} {part}"
+        table[label] = np.asarray(values)[combos[:, i]]
+
+    picks = totals['picks']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table['Picks'] = picks
+        table['Picks_Per_Day'] = np.round(picks / max(days, 1), 2)
+        table['Days_Active'] = totals['days']
+        table['Mean_Return_Pct'] = np.round(100 * totals['sum_fwd'] / picks, 3)
+        table['Win_Rate_Pct'] = np.round(100 * totals['wins'] / picks, 1)
+        table['Mean_R'] = np.round(totals['sum_r'] / picks, 3)
+        table['Total_R'] = np.round(totals['sum_r'], 1)
+
+    df = pd.DataFrame(table)
+    df['Qualified'] = df['Picks'] >= min_picks
+    return df.sort_values(['Qualified', rank_by], ascending=[False, False],
+                          na_position='last').reset_index(drop=True)
+
+
+# ═══════════════════════════════════════════════════════
+# MAIN
+# ═══════════════════════════════════════════════════════
+
+def run(mode=None, search=None, samples=None, workers=None, rank_by=None,
+        start=None, end=None, config_path=SWEEP_FILE, persist=True, log=print):
+    """
+    Returns:
+        DataFrame: ranked parameter sets
+    """
+
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+
+    mode = mode or config.get('mode', 'standard')
+    search = search or config.get('search', 'grid')
+    samples = samples or config.get('samples', 500)
+    workers = workers or config.get('workers', os.cpu_count() or 1)
+    rank_by = rank_by or config.get('rank_by', 'Mean_R')
+    horizon = config.get('horizon_days', 10)
+
+    ruleset = rules.load(mode)
+    axes = axes_of(ruleset, config['params'])
+    combos = combinations(axes, search, samples, config.get('seed', 0))
+    log(f"Sweep: {len(combos)} parameter sets ({search}) over {len(axes)} axes, "
+        f"mode {mode}, {horizon}-day outcomes")
+
+    t0 = time.perf_counter()
+    with metrics.timer('sweep.prepare'):
+        state = prepare(ruleset, axes, horizon, start or config.get('start'), end or config.get('end'), log=log)
+    t1 = time.perf_counter()
+    with metrics.timer('sweep.evaluate'):
+        totals = evaluate(state, combos, workers)
+    t2 = time.perf_counter()
+
+    table = ranked(axes, combos, totals, state['days'], rank_by, config.get('min_picks', 20))
+    log(f"Prepared in {t1 - t0:.2f}s, evaluated {len(combos)} sets in {t2 - t1:.2f}s "
+        f"({workers} workers)")
+
+    if persist:
+        os.makedirs(OUT_DIR, exist_ok=True)
+        path = f"{OUT_DIR}sweep_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        table.to_csv(path, index=False)
+        log(f"Saved to: {path}")
+
+    best = table.iloc[0] if len(table) else None
+    if best is not None and best['Qualified']:
+        log(f"Best by {rank_by}: " + ", ".join(f"{k}={best[k]:g}" for k in table.columns[:len(axes)]),
+            picks=int(best['Picks']), mean_r=float(best['Mean_R']))
+    elif best is not None:
+        log(f"No parameter set reached {config.get('min_picks', 20)} picks")
+
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank filter threshold sets by what their picks did next")
+    parser.add_argument("--mode", choices=rules.modes(), help="filters.json mode to tune (default: sweep.json mode)")
+    parser.add_argument("--search", choices=["grid", "random"], help="Full grid or a random sample")
+    parser.add_argument("--samples", type=int, help="Parameter sets for --search random")
+    parser.add_argument("--workers", type=int, help="Worker processes")
+    parser.add_argument("--rank-by", choices=RANK_COLUMNS, help="Ranking column")
+    parser.add_argument("--start", help="First signal date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last signal date (YYYY-MM-DD)")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print")
+    args = parser.parse_args()
+
+    log = stage_log.get_logger('sweep', LOG_FILE)
+    with metrics.session('sweep', log=log):
+        table = run(args.mode, args.search, args.samples, args.workers, args.rank_by,
+                    args.start, args.end, log=log)
+
+    with pd.option_context('display.width', 200, 'display.max_columns', 30):
+        print(table.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
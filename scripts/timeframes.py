@@ -0,0 +1,223 @@
+"""
+WEEKLY & MONTHLY BARS
+Purpose: Resample stored daily bars to weekly / monthly bars, cache them
+         per symbol and keep them current by re-resampling only the last
+         (partial) period, for multi-timeframe screening rules
+Layout:  data/bars_weekly/<SYMBOL>.npy, data/bars_monthly/<SYMBOL>.npy
+         (bar_store layout; 'date' is the period start - the week's
+         Monday or the 1st of the month)
+Columns: W_Close, W_MA10, W_MA20, W_RSI and M_Close, M_MA10, M_MA20, M_RSI
+         - as of the latest daily bar, so the current period counts with
+         its close so far
+"""
+
+import numpy as np
+import pandas as pd
+
+import bar_store
+import indicators
+import strength
+
+# Timeframe: (column prefix, cache directory)
+TIMEFRAMES = {
+    'weekly': ('W', 'data/bars_weekly/'),
+    'monthly': ('M', 'data/bars_monthly/')
+}
+
+MA_WINDOWS = (10, 20)
+RSI_WINDOW = 14
+
+
+def column_names(timeframe):
+    prefix = TIMEFRAMES[timeframe][0]
+    return [f"{prefix}_Close"] + [f"{prefix}_MA{n}" for n in MA_WINDOWS] + [f"{prefix}_RSI"]
+
+
+def needed(fields):
+    """Timeframes whose columns appear among `fields` (e.g. RuleSet.inputs)"""
+    fields = set(fields)
+    return [tf for tf in TIMEFRAMES if fields & set(column_names(tf))]
+
+
+# ═══════════════════════════════════════════════════════
+# RESAMPLING
+# ═══════════════════════════════════════════════════════
+
+def period_start(dates, timeframe):
+    """Monday of the week / 1st of the month for each datetime64[D] date"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    if timeframe == 'monthly':
+        return dates.astype('datetime64[M]').astype('datetime64[D]')
+    days = dates.astype(np.int64)
+    return (days - (days + 3) % 7).astype('datetime64[D]')   # 1970-01-01 was a Thursday
+
+
+def resample(bars, timeframe):
+    """Daily BAR_DTYPE bars (sorted) -> one bar per period, same dtype"""
+    if bars is None or len(bars) == 0:
+        return np.empty(0, dtype=bar_store.BAR_DTYPE)
+
+    keys = period_start(bars['date'], timeframe)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(bars)] - 1
+
+    out = np.empty(len(starts), dtype=bar_store.BAR_DTYPE)
+    out['date'] = keys[starts]
+    out['open'] = bars['open'][starts]
+    out['close'] = bars['close'][ends]
+    out['high'] = np.maximum.reduceat(np.asarray(bars['high']), starts)
+    out['low'] = np.minimum.reduceat(np.asarray(bars['low']), starts)
+    out['volume'] = np.add.reduceat(np.asarray(bars['volume']), starts)
+    return out
+
+
+def update_symbol(symbol, timeframe, store_dir=bar_store.STORE_DIR, cache_dir=None):
+    """
+    Bring one symbol's cached bars up to date with its daily bars
+
+    Only the daily bars from the start of the last cached period are
+    re-resampled. The cache is rebuilt when the last completed period no
+    longer closes where the daily bars do (history re-adjusted or
+    backfilled).
+
+    Returns:
+        str: 'current', 'extended', 'rebuilt' or 'missing'
+    """
+
+    cache_dir = cache_dir or TIMEFRAMES[timeframe][1]
+    daily = bar_store.load_bars(symbol, store_dir)
+    if daily is None or len(daily) == 0:
+        return 'missing'
+
+    cached = bar_store.load_bars(symbol, cache_dir, mmap=False)
+    if cached is not None and len(cached) >= 2:
+        start = cached['date'][-1]
+        cut = int(np.searchsorted(daily['date'], start))
+        completed = cached[-2]
+        consistent = (
+            0 < cut < len(daily)
+            and period_start(daily['date'][cut - 1:cut], timeframe)[0] == completed['date']
+            and abs(daily['close'][cut - 1] / completed['close'] - 1) <= bar_store.ADJUSTMENT_TOLERANCE
+        )
+        if consistent:
+            fresh = resample(daily[cut:], timeframe)
+            if len(fresh) == 1 and fresh[0] == cached[-1]:
+                return 'current'
+            bar_store.write_bars(symbol, bar_store.merge_bars(cached[:-1], fresh), cache_dir)
+            return 'extended'
+
+    bar_store.write_bars(symbol, resample(daily, timeframe), cache_dir)
+    return 'rebuilt'
+
+
+def update(symbols, timeframe, store_dir=bar_store.STORE_DIR, cache_dir=None):
+    """update_symbol() for many symbols; {status: count}"""
+    stats = {'current': 0, 'extended': 0, 'rebuilt': 0, 'missing': 0}
+    for symbol in symbols:
+        stats[update_symbol(symbol, timeframe, store_dir, cache_dir)] += 1
+    return stats
+
+
+# ═══════════════════════════════════════════════════════
+# INDICATORS
+# ═══════════════════════════════════════════════════════
+
+def compute(close, timeframe):
+    """
+    Indicators over (periods x symbols) closes, last period partial
+
+    A period a symbol did not trade carries its previous close.
+    """
+
+    close = strength.forward_fill(close)
+    names = column_names(timeframe)
+    values = [close] + [indicators.rolling_mean(close, n) for n in MA_WINDOWS]
+    values.append(indicators.rsi(close, RSI_WINDOW))
+    return dict(zip(names, values))
+
+
+def as_of(dates, close, timeframe):
+    """
+    The same indicators for every day of a daily (dates x symbols) panel,
+    each day seeing its period only up to that day's close
+
+    Completed periods feed trailing sums; the day's close stands in for
+    its period's, exactly as the live cache's partial last bar does.
+    """
+
+    daily = strength.forward_fill(close)
+    keys = period_start(dates, timeframe)
+    new_period = np.r_[True, keys[1:] != keys[:-1]] if len(keys) else np.zeros(0, dtype=bool)
+    period = np.cumsum(new_period) - 1
+    last_rows = np.flatnonzero(np.r_[new_period[1:], True]) if len(keys) else np.zeros(0, dtype=int)
+
+    closes = daily[last_rows]                              # period closes
+    prev = np.r_[-1, np.arange(len(closes) - 1)][period]   # previous period per day
+    has_prev = prev >= 0
+
+    def completed(series):
+        """series (periods x symbols) at each day's previous period; NaN on the first"""
+        out = np.full(daily.shape, np.nan)
+        out[has_prev] = series[prev[has_prev]]
+        return out
+
+    names = column_names(timeframe)
+    values = {names[0]: daily}
+
+    for name, n in zip(names[1:], MA_WINDOWS):
+        window_sum = indicators.rolling_mean(closes, n - 1) * (n - 1)
+        values[name] = (completed(window_sum) + daily) / n
+
+    # Simple-average RSI: the previous RSI_WINDOW - 1 period moves plus
+    # today's move against the last completed close
+    delta = np.diff(closes, axis=0, prepend=np.nan)
+    delta = np.where(np.isnan(delta) & ~np.isnan(closes), 0.0, delta)
+    k = RSI_WINDOW - 1
+    gains = completed(indicators.rolling_mean(np.clip(delta, 0, None), k) * k)
+    losses = completed(indicators.rolling_mean(np.clip(-delta, 0, None), k) * k)
+
+    move = daily - completed(closes)
+    move = np.where(np.isnan(move) & ~np.isnan(daily), 0.0, move)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gain = gains + np.clip(move, 0, None)
+        loss = losses + np.clip(-move, 0, None)
+        values[names[-1]] = 100 - (100 / (1 + gain / loss))
+
+    return values
+
+
+# ═══════════════════════════════════════════════════════
+# LATEST VALUES
+# ═══════════════════════════════════════════════════════
+
+def load_closes(symbols, timeframe, cache_dir=None):
+    """Cached period closes as (periods x symbols), NaN where missing"""
+    cache_dir = cache_dir or TIMEFRAMES[timeframe][1]
+    panel = bar_store.load_panel(symbols, cache_dir)
+    close = np.full((len(panel['dates']), len(symbols)), np.nan)
+    cols = {s: j for j, s in enumerate(symbols)}
+    for j, symbol in enumerate(panel['symbols']):
+        close[:, cols[symbol]] = panel['close'][:, j]
+    return close
+
+
+def latest(symbols, timeframes, store_dir=bar_store.STORE_DIR, log=print):
+    """
+    Weekly / monthly columns for raw_data rows, caches updated first
+
+    Returns:
+        DataFrame: Symbol (no .NS) plus column_names() of each timeframe
+    """
+
+    table = {'Symbol': [s.replace('.NS', '') for s in symbols]}
+    for timeframe in timeframes:
+        stats = update(symbols, timeframe, store_dir)
+        log(f"{timeframe.capitalize()} bars: {stats['extended']} extended, "
+            f"{stats['rebuilt']} rebuilt, {stats['current']} current, "
+            f"{stats['missing']} not in store")
+
+        close = load_closes(symbols, timeframe)
+        for name, arr in compute(close, timeframe).items():
+            table[name] = arr[-1] if len(arr) else np.full(len(symbols), np.nan)
+
+    return pd.DataFrame(table)
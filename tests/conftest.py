@@ -0,0 +1,64 @@
+"""
+Shared fixtures: the pipeline scripts import each other by module name,
+so scripts/ goes on sys.path the way running them directly does
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+sys.path.insert(0, SCRIPTS)
+
+
+def make_history(dates, seed):
+    """Random-walk OHLCV frame on the given dates"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    spread = close * rng.uniform(0.005, 0.03, len(dates))
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 0.5, len(dates)),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(100_000, 1_000_000, len(dates)).astype(float),
+    }, index=pd.DatetimeIndex(dates))
+
+
+@pytest.fixture
+def gapped_histories():
+    """
+    Three symbols over 260 sessions: one complete, one missing two bars
+    inside every long window, one a short recent listing
+    """
+    dates = pd.bdate_range('2025-01-01', periods=260)
+    gapped = dates.delete([200, 250])
+    return {
+        'FULL.NS': make_history(dates, 1),
+        'GAP.NS': make_history(gapped, 2),
+        'NEW.NS': make_history(dates[-40:], 3),
+    }
+
+
+def load_script(name):
+    """Import a numbered pipeline script (e.g. '1_data_collector') as a module"""
+    import importlib.util
+
+    root = os.path.dirname(SCRIPTS)
+    cwd = os.getcwd()
+    os.chdir(root)  # scripts read config/ relative to the repo root on import
+    try:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPTS, f'{name}.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
+
+
+@pytest.fixture(scope='session')
+def collector():
+    return load_script('1_data_collector')
@@ -0,0 +1,17 @@
+import breadth
+import indicators
+
+
+def test_counts_skip_dates_a_symbol_has_no_bar(gapped_histories):
+    table = breadth.counts(indicators.build_panel(gapped_histories))
+
+    # Counts are additive, and a one-symbol panel has no gaps to skip
+    expected = sum(
+        breadth.counts(indicators.build_panel({symbol: history}))
+        .reindex(table.index, fill_value=0)
+        for symbol, history in gapped_histories.items()
+    )
+
+    assert (table == expected).all().all()
+    # GAP.NS still has an MA200 after its missing bars
+    assert table['Has_MA200'].iloc[-1] == 2
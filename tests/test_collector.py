@@ -0,0 +1,33 @@
+import pandas as pd
+
+import bar_store
+
+
+def store(histories):
+    for symbol, hist in histories.items():
+        bar_store.write_bars(symbol, bar_store.frame_to_bars(hist))
+
+
+def test_verify_passes_on_gapped_history(collector, gapped_histories, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lines = []
+    monkeypatch.setattr(collector, 'log', lambda message, **_: lines.append(message))
+    symbols = list(gapped_histories)
+
+    # Day 1 builds the checkpoint, day 2 resumes from it with one more bar
+    day1 = {s: h.iloc[:-1] for s, h in gapped_histories.items()}
+    store(day1)
+    collector.incremental_frame(symbols, verify=True)
+    store(gapped_histories)
+    df = collector.incremental_frame(symbols, verify=True)
+
+    assert not any('drifted' in line for line in lines), lines
+    assert sum('match a full recompute' in line for line in lines) == 2
+    assert df.set_index('Symbol').loc['GAP', ['MA50', 'MA200', 'High_20D']].notna().all()
+
+
+def test_diff_frames_reports_one_sided_nan(collector):
+    actual = pd.DataFrame({'Symbol': ['A', 'B', 'C'], 'MA50': [1.0, float('nan'), 5.0]})
+    expected = pd.DataFrame({'Symbol': ['A', 'B', 'C'], 'MA50': [1.0, 2.0, 5.5]})
+
+    assert collector.diff_frames(actual, expected) == {'MA50': (2, 0.5, 1)}
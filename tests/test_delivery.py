@@ -0,0 +1,51 @@
+import os
+import zipfile
+
+import pytest
+
+import delivery
+
+HEADER = 'SYMBOL, SERIES, DATE1, TTL_TRD_QNTY, DELIV_QTY, DELIV_PER\n'
+
+
+def write_bhav(path, day, pct):
+    text = HEADER + f'ABC, EQ, {day}, 1000, 500, {pct}\n'
+    if path.endswith('.zip'):
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('sec_bhavdata_full.csv', text)
+    else:
+        with open(path, 'w') as f:
+            f.write(text)
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='needs /proc')
+def test_zipped_bhav_is_parsed_and_closed(tmp_path):
+    path = str(tmp_path / 'sec_bhavdata_full_01012025.zip')
+    write_bhav(path, '01-Jan-2025', 42.5)
+    before = len(os.listdir('/proc/self/fd'))
+
+    for _ in range(20):
+        trade_date, pct = delivery.parse_bhav(path)
+
+    assert str(trade_date) == '2025-01-01' and pct == {'ABC': 42.5}
+    assert len(os.listdir('/proc/self/fd')) <= before
+
+
+def test_files_outside_the_window_are_not_reingested(tmp_path):
+    for n in range(1, 6):
+        write_bhav(str(tmp_path / f'nse_bhav_copy_0{n}.csv'), f'0{n}-Jan-2025', 10 * n)
+    history_file = str(tmp_path / 'history.npz')
+    lines = []
+
+    history = delivery.ingest(str(tmp_path), history_file, max_days=2, log=lines.append)
+    assert len(history['dates']) == 2 and len(history['sources']) == 5
+
+    lines.clear()
+    history = delivery.ingest(str(tmp_path), history_file, max_days=2, log=lines.append)
+    assert lines == []
+    assert history['pct'][-1, 0] == 50
+
+    # Deleted files drop out of the source list
+    os.remove(tmp_path / 'nse_bhav_copy_01.csv')
+    history = delivery.ingest(str(tmp_path), history_file, max_days=2, log=lines.append)
+    assert len(history['sources']) == 4 and lines == []
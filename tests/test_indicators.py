@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+import indicators
+
+COMPARED = ['Close', 'MA20', 'MA50', 'MA200', 'RSI', 'ATR',
+            'Vol_20D_Avg', 'Vol_5D_Avg', 'High_20D', 'Support']
+
+
+def baseline_row(hist):
+    """The collector's original per-symbol pandas indicators"""
+    delta = hist['Close'].diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    ranges = pd.concat([hist['High'] - hist['Low'],
+                        (hist['High'] - hist['Close'].shift()).abs(),
+                        (hist['Low'] - hist['Close'].shift()).abs()], axis=1)
+    return {
+        'Close': hist['Close'].iloc[-1],
+        'MA20': hist['Close'].rolling(20).mean().iloc[-1],
+        'MA50': hist['Close'].rolling(50).mean().iloc[-1],
+        'MA200': hist['Close'].rolling(200).mean().iloc[-1],
+        'RSI': (100 - 100 / (1 + gain / loss)).iloc[-1],
+        'ATR': ranges.max(axis=1).rolling(14).mean().iloc[-1],
+        'Vol_20D_Avg': int(hist['Volume'].rolling(20).mean().iloc[-1]),
+        'Vol_5D_Avg': int(hist['Volume'].rolling(5).mean().iloc[-1]),
+        'High_20D': hist['High'].rolling(20).max().iloc[-21],
+        'Support': hist['Low'].rolling(10).min().iloc[-1],
+    }
+
+
+def test_gapped_symbol_matches_incremental_and_baseline(gapped_histories):
+    panel = indicators.build_panel(gapped_histories)
+    batch = indicators.latest_frame(panel, indicators.compute(panel)).set_index('Symbol')
+
+    state = indicators.IndicatorState(len(panel['symbols']))
+    state.update_panel(panel)
+    incremental = state.frame(panel['symbols']).set_index('Symbol')
+
+    for symbol, hist in gapped_histories.items():
+        name = symbol.replace('.NS', '')
+        expected = baseline_row(hist)
+        for column in COMPARED:
+            b, i, e = batch.at[name, column], incremental.at[name, column], expected[column]
+            if np.isnan(e):
+                assert np.isnan(b) and np.isnan(i), (name, column)
+            else:
+                assert abs(b - e) <= 0.011, (name, column, b, e)
+                assert abs(i - e) <= 0.011, (name, column, i, e)
+
+    # The gap sits inside every long window, yet GAP still has values
+    assert not batch.loc['GAP', ['MA200', 'High_20D', 'MA50']].isna().any()
+    pd.testing.assert_frame_equal(batch.drop(columns='Resistance'),
+                                  incremental.drop(columns='Resistance'),
+                                  check_exact=False, atol=0.011)
+
+
+def test_unpack_leaves_missing_dates_empty(gapped_histories):
+    panel = indicators.build_panel(gapped_histories)
+    values = indicators.compute(panel)
+    missing = np.isnan(panel['close'])
+    for column, arr in values.items():
+        assert np.isnan(arr[missing]).all(), column
+
+
+def test_non_finite_fields_do_not_poison_running_sums(gapped_histories):
+    histories = {s: h.copy() for s, h in gapped_histories.items()}
+    bad = histories['FULL.NS']
+    bad.iloc[230, bad.columns.get_loc('Volume')] = np.nan
+    bad.iloc[235, bad.columns.get_loc('High')] = np.nan
+    bad.iloc[236, bad.columns.get_loc('Low')] = np.inf
+    panel = indicators.build_panel(histories)
+
+    state = indicators.IndicatorState(len(panel['symbols']))
+    state.update_panel(panel)
+    incremental = state.frame(panel['symbols']).set_index('Symbol')
+    batch = indicators.latest_frame(panel, indicators.compute(panel)).set_index('Symbol')
+
+    columns = ['Vol_20D_Avg', 'Vol_5D_Avg', 'ATR', 'Support', 'ADX', 'MA200']
+    assert incremental.loc['FULL', columns].notna().all()
+    pd.testing.assert_series_equal(incremental.loc['FULL', columns], batch.loc['FULL', columns],
+                                   check_exact=False, atol=0.011)
@@ -0,0 +1,19 @@
+import bar_store
+import levels
+
+
+def test_update_reads_each_symbol_once(gapped_histories, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for symbol, hist in gapped_histories.items():
+        bar_store.write_bars(symbol, bar_store.frame_to_bars(hist))
+
+    reads = []
+    load_bars = bar_store.load_bars
+    monkeypatch.setattr(bar_store, 'load_bars',
+                        lambda symbol, *a, **k: reads.append(symbol) or load_bars(symbol, *a, **k))
+
+    symbols = list(gapped_histories) + ['NONE.NS']
+    table = levels.update(symbols, log=lambda *a, **k: None)
+
+    assert sorted(reads) == sorted(symbols)
+    assert list(table['Symbol']) == ['FULL', 'GAP', 'NEW']
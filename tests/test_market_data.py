@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import yfinance
+
+import market_data
+
+
+def grouped(frames):
+    return pd.concat(frames, axis=1)
+
+
+def test_download_chunk_reads_failures_from_the_frame(monkeypatch):
+    dates = pd.bdate_range('2025-01-01', periods=3)
+    good = pd.DataFrame({c: [1.0, 2.0, 3.0] for c in market_data.OHLCV_COLUMNS}, index=dates)
+    empty = good * np.nan
+    calls = []
+
+    def download(symbols, **_):
+        calls.append(list(symbols))
+        return grouped({'A.NS': good, 'B.NS': empty})
+
+    monkeypatch.setattr(yfinance, 'download', download)
+    fetcher = market_data.Fetcher(rate=0, retries=3, backoff=0, log=lambda *a, **k: None)
+
+    frames = fetcher._download_chunk(['A.NS', 'B.NS', 'C.NS'], '6mo', '1d', None, None)
+
+    # B is all-NaN and C absent, but A came back: no data, not throttled
+    assert list(frames) == ['A.NS']
+    assert len(calls) == 1
+
+
+def test_download_chunk_retries_an_empty_response(monkeypatch):
+    dates = pd.bdate_range('2025-01-01', periods=3)
+    good = pd.DataFrame({c: [1.0, 2.0, 3.0] for c in market_data.OHLCV_COLUMNS}, index=dates)
+    responses = [pd.DataFrame(), grouped({'A.NS': good, 'B.NS': good})]
+
+    monkeypatch.setattr(yfinance, 'download', lambda symbols, **_: responses.pop(0))
+    fetcher = market_data.Fetcher(rate=0, retries=3, backoff=0, log=lambda *a, **k: None)
+
+    frames = fetcher._download_chunk(['A.NS', 'B.NS'], '6mo', '1d', None, None)
+
+    assert sorted(frames) == ['A.NS', 'B.NS']
+
+
+def test_delta_fetch_is_cached_by_trading_date_not_start(tmp_path, monkeypatch):
+    dates = pd.bdate_range('2025-01-01', periods=3)
+    good = pd.DataFrame({c: [1.0, 2.0, 3.0] for c in market_data.OHLCV_COLUMNS}, index=dates)
+    calls = []
+
+    def download(symbols, **_):
+        calls.append(list(symbols))
+        return grouped({'A.NS': good, 'B.NS': good})
+
+    monkeypatch.setattr(yfinance, 'download', download)
+    cache = market_data.ResponseCache(str(tmp_path))
+    fetcher = market_data.Fetcher(rate=0, cache=cache, log=lambda *a, **k: None)
+
+    fetcher.fetch(['A.NS', 'B.NS'], start='2025-01-01', delta=True)
+    # The store advanced after the first run: a later start, same day
+    frames, _ = fetcher.fetch(['A.NS', 'B.NS'], start='2025-01-03', delta=True)
+
+    assert len(calls) == 1 and sorted(frames) == ['A.NS', 'B.NS']
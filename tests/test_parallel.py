@@ -0,0 +1,15 @@
+import pandas as pd
+
+import indicators
+import parallel
+
+
+def test_sharded_matches_unsharded_on_gapped_history(gapped_histories):
+    panel = indicators.build_panel(gapped_histories)
+    expected = indicators.latest_frame(panel, indicators.compute(panel))
+
+    sharded = parallel.compute_sharded(panel, workers=2, shards_per_worker=2,
+                                       log=lambda *a, **k: None)
+
+    pd.testing.assert_frame_equal(sharded.reset_index(drop=True), expected.reset_index(drop=True))
+    assert sharded.set_index('Symbol').loc['GAP', ['MA200', 'High_20D']].notna().all()
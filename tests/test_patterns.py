@@ -0,0 +1,38 @@
+import numpy as np
+
+import indicators
+import patterns
+
+
+def flat_panel(bars):
+    """A tight rising range: an uptrend base once the MA has history"""
+    close = (100 + 0.05 * np.arange(bars))[:, None]
+    return {'close': close, 'high': close + 0.5, 'low': close - 0.5,
+            'open': close, 'volume': np.full(close.shape, 1e5)}
+
+
+def test_patterns_need_min_bars_of_history():
+    out = patterns.detect(flat_panel(patterns.MIN_BARS + 5))
+
+    young = slice(None, patterns.MIN_BARS - 1)
+    for name in patterns.PATTERNS:
+        assert not out[name][young].any(), name
+    assert np.isnan(out['Pivot'][young]).all()
+    assert out['Base'][patterns.MIN_BARS - 1:].all()
+
+
+def test_gapped_symbol_matches_its_own_bars(gapped_histories):
+    panel = indicators.build_panel(gapped_histories)
+    out = patterns.detect(panel)
+
+    # A one-symbol panel has no gaps: the reference for that symbol's rows
+    for j, (symbol, history) in enumerate(gapped_histories.items()):
+        alone = patterns.detect(indicators.build_panel({symbol: history}))
+        rows = ~np.isnan(panel['close'][:, j])
+        for name, values in alone.items():
+            np.testing.assert_allclose(out[name][rows, j], values[:, 0], err_msg=f"{symbol} {name}")
+        for name in patterns.PATTERNS:
+            assert not out[name][~rows, j].any()
+
+    gap = list(gapped_histories).index('GAP.NS')
+    assert not np.isnan(out['Base_Depth_Pct'][-1, gap])
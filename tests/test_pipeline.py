@@ -0,0 +1,32 @@
+import pipeline
+
+
+def stage_runs(monkeypatch, failing):
+    """Swap each stage's runner for a stub; returns the names that ran"""
+    ran = []
+
+    def stub(name):
+        def run(args, inputs):
+            ran.append(name)
+            if name in failing:
+                raise RuntimeError(name)
+            return name
+        return run
+
+    for name, spec in pipeline.STAGES.items():
+        monkeypatch.setitem(spec, 'run', stub(name))
+    monkeypatch.setattr(pipeline, 'save_timings', lambda timings: None)
+    monkeypatch.setattr(pipeline, 'log', lambda message: None)
+    return ran
+
+
+def test_tracker_runs_when_analyzer_fails(monkeypatch):
+    ran = stage_runs(monkeypatch, failing={'analyze'})
+    args = pipeline.parse_args(['--only', 'collect,screen,analyze,notify,track'])
+
+    assert not pipeline.run(args)
+    assert ran == ['collect', 'screen', 'analyze', 'track']
+
+
+def test_from_analyze_includes_tracker():
+    assert pipeline.downstream('analyze') == {'analyze', 'notify', 'track', 'report'}
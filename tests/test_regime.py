@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+import bar_store
+import regime
+
+
+def store_index(symbol, closes):
+    dates = pd.bdate_range('2024-01-01', periods=len(closes))
+    frame = pd.DataFrame({'Open': closes, 'High': closes, 'Low': closes,
+                          'Close': closes, 'Volume': 0.0}, index=dates)
+    bar_store.write_bars(symbol, bar_store.frame_to_bars(frame))
+
+
+def test_missing_vix_is_neutral(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store_index(regime.NIFTY, np.linspace(100, 200, 260))
+
+    snapshot = regime.compute({'regime_sector_indices': {}})
+
+    assert snapshot['VIX'] is None and snapshot['VIX_Percentile'] is None
+    assert snapshot['Status'] == 'GREEN'
+    assert 'VIX: n/a' in regime.describe(snapshot)
+
+
+def test_high_vix_still_blocks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store_index(regime.NIFTY, np.linspace(100, 200, 260))
+    store_index(regime.VIX, np.full(260, regime.VIX_MAX + 5.0))
+
+    assert regime.compute({'regime_sector_indices': {}})['Status'] == 'YELLOW'
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+
+import bar_store
+import indicators
+import replay
+
+CHECKED = ['MA20', 'MA50', 'MA200', 'RSI', 'ATR', 'High_20D', 'Support']
+
+
+def store(histories):
+    for symbol, hist in histories.items():
+        bar_store.write_bars(symbol, bar_store.frame_to_bars(hist))
+
+
+def test_store_replay_last_day_matches_incremental(gapped_histories, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store(gapped_histories)
+    symbols = list(gapped_histories)
+
+    dates, names, columns, eligible = replay.store_panel(symbols)
+
+    panel = bar_store.load_panel(symbols)
+    state = indicators.IndicatorState(len(symbols))
+    state.update_panel(panel)
+    live = state.frame(panel['symbols']).set_index('Symbol')
+
+    for j, name in enumerate(names):
+        assert eligible[-1, j]
+        for column in CHECKED:
+            assert np.isclose(columns[column][-1, j], live.at[name, column], atol=0.011, equal_nan=True), \
+                (name, column)
+    assert not np.isnan(columns['MA200'][-1, names.index('GAP')])
+
+
+def test_archive_replay_gets_timeframe_columns(gapped_histories, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store(gapped_histories)
+    symbols = list(gapped_histories)
+
+    dates, names, columns, _ = replay.store_panel(symbols)
+    panel = bar_store.load_panel(symbols)
+    frame = indicators.latest_frame(panel, indicators.compute(panel))
+    frame.to_csv(os.path.join('data', f"raw_data_{str(dates[-1]).replace('-', '')}.csv"), index=False)
+
+    a_dates, a_names, a_columns, _ = replay.archive_panel(['Close'], archive_dir='data/')
+    a_columns.update(replay.archive_timeframes(a_dates, a_names, ['weekly', 'monthly']))
+
+    for name in ('W_Close', 'W_MA10', 'M_RSI'):
+        for j, symbol in enumerate(a_names):
+            expected = columns[name][-1, names.index(symbol)]
+            assert np.isclose(a_columns[name][0, j], expected, atol=0.011, equal_nan=True), (name, symbol)
+    assert not np.isnan(a_columns['W_Close']).any()
@@ -0,0 +1,52 @@
+import os
+from datetime import datetime, timedelta
+
+from response_cache import ResponseCache
+
+
+def test_puts_stay_in_memory_until_flush(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10 * 2**20)
+    for n in range(50):
+        cache.put(f'k{n}', list(range(n)))
+
+    assert not os.path.exists(cache.index_path)
+    cache.flush()
+    assert set(ResponseCache(str(tmp_path)).index) == {f'k{n}' for n in range(50)}
+
+
+def test_flush_evicts_least_recently_used_in_one_pass(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=3100)
+    for n in range(10):
+        cache.put(f'k{n}', bytes([n]) * 1000)
+        cache.index[f'k{n}']['used'] = n
+
+    cache.flush()
+
+    assert sorted(cache.index) == ['k7', 'k8', 'k9']
+    assert cache.stats['evicted'] == 7
+    assert len(os.listdir(cache.blob_dir)) == 3
+
+
+def test_shared_and_replaced_blobs_are_kept(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put('a', 'same')
+    cache.put('b', 'same')
+    cache.put('a', 'same')  # replacing an entry with its own payload
+
+    assert cache.get('a') == 'same' and cache.get('b') == 'same'
+    assert len(os.listdir(cache.blob_dir)) == 1
+
+
+def test_load_drops_expired_entries_and_orphan_blobs(tmp_path):
+    clock = [datetime(2025, 1, 6, 10, 0)]   # a Monday, market open
+    cache = ResponseCache(str(tmp_path), intraday_ttl=60, clock=lambda: clock[0])
+    cache.put('old', 'stale')
+    cache.flush()
+    cache.put('crashed', 'never indexed')   # blob written, index not saved
+
+    clock[0] += timedelta(minutes=5)
+    reloaded = ResponseCache(str(tmp_path), intraday_ttl=60, clock=lambda: clock[0])
+
+    assert reloaded.index == {}
+    assert reloaded.stats['expired'] == 1
+    assert os.listdir(reloaded.blob_dir) == []
@@ -0,0 +1,137 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import rules
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FILTERS_FILE = os.path.join(ROOT, rules.FILTERS_FILE)
+
+
+def universe(n=2000, seed=0):
+    """One row per stock, spread so every rule removes some and some survive"""
+    rng = np.random.default_rng(seed)
+    close = rng.uniform(50, 6000, n)
+    ma20 = close * rng.uniform(0.85, 1.02, n)
+    ma50 = ma20 * rng.uniform(0.9, 1.02, n)
+    ma200 = ma50 * rng.uniform(0.85, 1.02, n)
+    vol20 = rng.uniform(1e5, 2e6, n)
+    return pd.DataFrame({
+        'Close': close, 'MA20': ma20, 'MA50': ma50, 'MA200': ma200,
+        'RSI': rng.uniform(30, 90, n), 'ADX': rng.uniform(5, 50, n),
+        'Vol_20D_Avg': vol20, 'Vol_5D_Avg': vol20 * rng.uniform(0.8, 2.5, n),
+        'High_20D': close * rng.uniform(0.95, 1.02, n),
+        'Support': close * rng.uniform(0.9, 1.0, n),
+    })
+
+
+def per_filter(df):
+    """The relaxed mode as the screener applied it before rules.py: one pandas filter at a time"""
+    steps = [
+        lambda d: d[d['Vol_20D_Avg'] >= 200000],
+        lambda d: d[(d['Close'] >= 100) & (d['Close'] <= 5000)],
+        lambda d: d[d['Close'] > d['MA50']],
+        lambda d: d[d['MA50'] > d['MA200']],
+        lambda d: d[(d['RSI'] >= 45) & (d['RSI'] <= 75)],
+        lambda d: d[d['ADX'] >= 15],
+        lambda d: d[d['Vol_5D_Avg'] / d['Vol_20D_Avg'] >= 1.1],
+        lambda d: d[d['Close'] > d['High_20D']],
+        lambda d: d[(d['Close'] - d['MA20']) / d['MA20'] * 100 <= 15],
+        lambda d: d[2 * (d['Close'] - d['Support'] * 0.995) / (d['Close'] - d['Support'] * 0.995) >= 1.8],
+        lambda d: d[(d['Close'] - d['Support'] * 0.995) / d['Close'] * 100 <= 5],
+    ]
+    counts = []
+    for step in steps:
+        df = step(df)
+        counts.append(len(df))
+    return df, counts
+
+
+def test_ruleset_compiles_modes_and_inputs():
+    standard = rules.load('standard', FILTERS_FILE)
+    testing = rules.load('testing', FILTERS_FILE)
+
+    names = [r.name for r in standard.rules]
+    assert 'Delivery filter' in names and 'Close > MA20' not in names
+    assert 'Close > MA50' not in [r.name for r in testing.rules]
+    assert not testing.tradeable and standard.select == 'filter'
+    assert standard.gates == standard.rules and standard.scored == []
+
+    # Inputs are raw fields only: derived names are computed, not read
+    assert {'Close', 'Support', 'Support_Zone_Low', 'RSI'} <= set(standard.inputs)
+    assert not set(standard.derived) & set(standard.inputs)
+
+    price = next(r for r in testing.rules if r.name == 'Price filter')
+    assert price.value == (50.0, 10000.0)
+
+    with pytest.raises(ValueError):
+        rules.load('no_such_mode', FILTERS_FILE)
+
+
+def test_rs_filter_follows_the_mode_knob():
+    config = rules.load_config(FILTERS_FILE)
+    rs = lambda ruleset: [r for r in ruleset.rules if r.name == 'RS filter']
+
+    assert rs(rules.RuleSet('standard', config)) == []
+    assert rs(rules.RuleSet('scored', config))[0].value == 70.0
+
+    config['modes']['standard']['rs_min_percentile'] = 60
+    assert rs(rules.RuleSet('standard', config))[0].value == 60.0
+
+
+def test_coalesce_falls_back_only_where_missing():
+    fn, fields = rules.compile_expression('coalesce(Zone, Support) * 2')
+    columns = {'Zone': np.array([10.0, np.nan, 30.0]), 'Support': np.array([1.0, 2.0, np.nan])}
+
+    assert fields == {'Zone', 'Support'}
+    np.testing.assert_array_equal(fn(columns), [20.0, 4.0, 60.0])
+
+    with pytest.raises(ValueError):
+        rules.compile_expression('__import__("os")')
+
+
+def test_fused_mask_matches_per_filter_result():
+    df = universe()
+    ruleset = rules.load('relaxed', FILTERS_FILE)
+
+    columns = ruleset.columns(df)
+    mask, survivors = ruleset.evaluate(columns)
+    expected, counts = per_filter(df)
+
+    assert len(expected) > 0
+    assert list(df.index[mask]) == list(expected.index)
+    assert list(survivors) == counts
+
+    # The same rows as a (dates x symbols) panel: one count per rule and date
+    panel = {name: df[name].to_numpy().reshape(4, -1) for name in df}
+    panel_mask, panel_survivors = ruleset.evaluate(ruleset.columns(panel, (4, len(df) // 4)))
+    np.testing.assert_array_equal(panel_mask.ravel(), mask)
+    assert panel_survivors.shape == (len(ruleset.gates), 4)
+    np.testing.assert_array_equal(panel_survivors.sum(axis=1), survivors)
+
+
+def test_score_mode_gates_then_ranks():
+    df = universe(seed=1)
+    ruleset = rules.load('scored', FILTERS_FILE)
+    assert {r.layer for r in ruleset.gates} == {1}
+    assert ruleset.scored and not {r.layer for r in ruleset.scored} & {1}
+
+    columns = ruleset.columns(df)
+    chosen, survivors, total, breakdown = ruleset.select_top(columns)
+    gates, _ = ruleset.evaluate(columns)
+
+    assert 0 < chosen.sum() <= ruleset.top_k
+    assert gates[chosen].all() and (total[chosen] >= ruleset.min_score).all()
+    # Nothing left out scores above the weakest pick among the eligible rows
+    eligible = gates & (total >= ruleset.min_score) & ~chosen
+    assert not (total[eligible] > total[chosen].min()).any()
+    np.testing.assert_allclose(sum(breakdown.values()), total)
+    assert set(breakdown) == {f"Score_{r.key}" for r in ruleset.scored}
+
+
+def test_rule_score_is_half_at_the_threshold():
+    rule = rules.Rule({'field': 'ADX', 'op': '>=', 'value': 25, 'scale': 5})
+    columns = {'ADX': np.array([25.0, 30.0, 20.0, 27.5, np.nan])}
+    np.testing.assert_allclose(rule.score(columns), [0.5, 1.0, 0.0, 0.75, 0.0])
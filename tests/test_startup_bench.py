@@ -0,0 +1,17 @@
+import sys
+
+import pytest
+
+import startup_bench
+
+
+def test_failed_import_exits_non_zero(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(startup_bench, 'RESULTS_FILE', str(tmp_path / 'logs' / 'times.json'))
+    monkeypatch.setattr(sys, 'argv', ['startup_bench.py', '--runs', '1', 'no_such_script'])
+
+    with pytest.raises(SystemExit) as exit_info:
+        startup_bench.main()
+
+    assert exit_info.value.code == 1
+    assert 'import failed: no_such_script' in capsys.readouterr().out
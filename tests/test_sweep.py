@@ -0,0 +1,64 @@
+import numpy as np
+
+import bar_store
+import rules
+import sweep
+
+HORIZON = 10
+
+CONFIG = {
+    'modes': {'test': {}},
+    'derived': {'Entry': 'Close', 'SL': 'Low * 0.9', 'Target': 'Close * 1.1'},
+    'rules': [
+        {'name': 'Volume filter', 'layer': 1, 'field': 'Vol_20D_Avg', 'op': '>=', 'value': 0},
+        {'name': 'Trend', 'layer': 2, 'field': 'MA200', 'op': '>', 'value': 0},
+    ],
+}
+
+
+def test_gapped_symbol_outcomes_are_counted(gapped_histories, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    symbols = ['FULL.NS', 'GAP.NS']   # FULL's dates put GAP's missing days on the panel
+    for symbol in symbols:
+        bar_store.write_bars(symbol, bar_store.frame_to_bars(gapped_histories[symbol]))
+
+    ruleset = rules.RuleSet('test', CONFIG)
+    axes = sweep.axes_of(ruleset, {'Volume filter': [0]})
+    state = sweep.prepare(ruleset, axes, HORIZON, symbols=symbols, log=lambda *a, **k: None)
+
+    # Every bar with a full MA200 and HORIZON bars after it, each scored
+    # HORIZON of its own bars ahead, in (date, symbol) order
+    expected = []
+    for j, symbol in enumerate(symbols):
+        close = gapped_histories[symbol]['Close'].to_numpy()
+        dates = gapped_histories[symbol].index
+        for k in range(199, len(close) - HORIZON):
+            expected.append((dates[k], j, close[k + HORIZON] / close[k] - 1))
+    expected = np.array([fwd for _, _, fwd in sorted(expected)])
+
+    np.testing.assert_allclose(state['fwd'], expected, atol=1e-3)   # closes rounded to 2 dp
+
+
+def test_forward_return_counts_the_symbols_own_bars():
+    close = np.array([[1.0], [2.0], [np.nan], [4.0], [8.0]])
+    columns = {'Close': close, 'High': close, 'Low': close,
+               'Entry': close, 'SL': close * 0.5, 'Target': close * 100}
+
+    fwd, _ = sweep.outcomes(columns, horizon=2)
+
+    expected = np.array([3.0, 3.0, np.nan, np.nan, np.nan])   # 1 -> 4, 2 -> 8
+    np.testing.assert_allclose(fwd[:, 0], expected)
+
+
+def test_wins_follow_the_trade_result():
+    # A stop-out whose close recovers by the horizon is still a loss
+    sweep._init({
+        'masks': [np.ones((1, 3), dtype=bool)],
+        'fwd': np.array([0.05, 0.02, -0.01]),
+        'result': np.array([-1.0, 2.0, -0.2]),
+        'day_starts': np.array([0]),
+    })
+
+    totals = sweep._evaluate_block(np.zeros((1, 1), dtype=int))
+
+    assert totals['wins'][0] == 1